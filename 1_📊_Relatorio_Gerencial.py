@@ -1,13 +1,7 @@
 import streamlit as st 
-import pandas as pd
-import requests
-import time
-import plotly.express as px
 from datetime import datetime, timedelta
-from io import BytesIO
 
-# Importação do utils
-from utils import check_password, logout_button
+from acesso import check_password, logout_button
 
 # Configurações
 st.set_page_config(page_title="Relatório Gerencial Intercom", page_icon="📊", layout="wide")
@@ -23,164 +17,59 @@ if usuario == "analista":
     st.info("Utilize o menu lateral para acessar o **Painel do Analista**.")
     st.stop()
 
-WORKSPACE_ID = "xwvpdtlu"
+# Importações pesadas só depois do login (a tela de senha abre sem carregar pandas, pyarrow etc.)
+from utils import PainelParcial, cliente_intercom, acervo_paginas, conversas_do_acervo, escolher_workspaces, workspace_por_id, iniciar_medicao, iniciar_vigilancia, painel_performance, medir, chave_consulta, dataset_da_sessao, mostrar_uso_memoria, reaproveitar_ou_revalidar, carregar_uma_vez, recarregador_relatorio, selo_atualizacao, vista_atributos, kpis_mongo, taxa_classificacao_mongo, ranking_motivos_mongo, csat_por_motivo_mongo, sla_por_atendente_mongo
+from nucleo import ATRIBUTOS_DA_TELA, intervalo_ts, nomes_atributos, format_sla_string, buscar_definicoes_atributos, buscar_admins, buscar_conversas_workspaces, ResumoParcial, process_data, colunas_sugeridas
+from secoes_gerencial import secao_distribuicao, secao_equipe, secao_cruzamentos, secao_top_motivos, secao_csat, secao_sla, secao_dados, mostrar_resumo_mongo
+
+iniciar_medicao() # Cronômetro do painel ⏱ Performance (só liga se o gestor pedir)
+iniciar_vigilancia() # Thread dos alertas de meta/SLA (só sobe uma vez por servidor, e só se estiver ligada no secrets)
 
 # Autenticação Intercom
-try:
-    INTERCOM_ACCESS_TOKEN = st.secrets["INTERCOM_TOKEN"]
-except:
-    INTERCOM_ACCESS_TOKEN = st.sidebar.text_input("Intercom Token", type="password", key="token_gerencial")
+# Um ou vários workspaces (cada um com seu token, pool de conexões e orçamento de chamadas)
+WORKSPACES = escolher_workspaces("gerencial")
+IDS_WORKSPACES = tuple(ws.id for ws in WORKSPACES)
 
-if not INTERCOM_ACCESS_TOKEN:
+if not WORKSPACES:
     st.warning("⚠️ Configure o Token.")
     st.stop()
 
-HEADERS = {"Authorization": f"Bearer {INTERCOM_ACCESS_TOKEN}", "Accept": "application/json"}
-
 # Funções
 
-def format_sla_string(seconds):
-    if not seconds or pd.isna(seconds) or seconds == 0: return "-"
-    seconds = int(seconds)
-    days = seconds // 86400
-    rem = seconds % 86400
-    hours = rem // 3600
-    rem %= 3600
-    minutes = rem // 60
-    secs = rem % 60
-    parts = []
-    if days > 0: parts.append(f"{days}d")
-    if hours > 0: parts.append(f"{hours}h")
-    if minutes > 0: parts.append(f"{minutes}m")
-    if days == 0 and hours == 0: parts.append(f"{secs}s")
-    return " ".join(parts) if parts else "< 1s"
-
 @st.cache_data(ttl=3600)
-def get_attribute_definitions():
-    url = "https://api.intercom.io/data_attributes"
-    params = {"model": "conversation"}
-    try:
-        r = requests.get(url, headers=HEADERS, params=params)
-        return {item['name']: item['label'] for item in r.json().get('data', [])}
-    except:
-        return {}
+def get_attribute_definitions(ids_workspaces):
+    mapa = {}
+    for ws_id in ids_workspaces:
+        mapa.update(buscar_definicoes_atributos(cliente_intercom(workspace=workspace_por_id(ws_id))))
+    return mapa
 
 @st.cache_data(ttl=3600)
-def get_all_admins():
-    url = "https://api.intercom.io/admins"
-    try:
-        r = requests.get(url, headers=HEADERS)
-        return {str(a['id']): a['name'] for a in r.json().get('admins', [])}
-    except:
-        return {}
-
-@st.cache_data(ttl=300, show_spinner=False)
-def fetch_conversations(start_date, end_date, team_ids=None):
-    url = "https://api.intercom.io/conversations/search"
-    ts_start = int(datetime.combine(start_date, datetime.min.time()).timestamp())
-    ts_end = int(datetime.combine(end_date, datetime.max.time()).timestamp())
-    
-    query_rules = [
-        {"field": "created_at", "operator": ">", "value": ts_start},
-        {"field": "created_at", "operator": "<", "value": ts_end}
-    ]
-    if team_ids:
-        query_rules.append({"field": "team_assignee_id", "operator": "IN", "value": team_ids})
-
-    payload = {"query": {"operator": "AND", "value": query_rules}, "pagination": {"per_page": 150}}
-    
-    conversas = []
-    has_more = True
-    status_text = st.empty()
-    
-    while has_more:
-        try:
-            resp = requests.post(url, headers=HEADERS, json=payload)
-            data = resp.json()
-            batch = data.get('conversations', [])
-            conversas.extend(batch)
-            status_text.caption(f"📥 Baixando... {len(conversas)} conversas.")
-            
-            if data.get('pages', {}).get('next'):
-                payload['pagination']['starting_after'] = data['pages']['next']['starting_after']
-                time.sleep(0.1)
-            else:
-                has_more = False
-        except Exception as e:
-            st.error(f"Erro: {e}")
-            break
-    status_text.empty()
+def get_all_admins(ids_workspaces):
+    admins = {}
+    for ws_id in ids_workspaces:
+        admins.update(buscar_admins(cliente_intercom(workspace=workspace_por_id(ws_id))))
+    return admins
+
+def fetch_conversations(start_date, end_date, team_ids=None, ids_workspaces=()):
+    """
+    Com vários workspaces, baixa todos em paralelo e junta (cada um no seu pool e no seu orçamento).
+    Sem st.cache_data: a faixa parcial é tela e não voltaria num acerto do cache. Quem guarda o
+    resultado é o carregar_uma_vez (repositório do servidor + single-flight).
+    """
+    # Os KPIs vão aparecendo (marcados como parciais) conforme as páginas chegam
+    resumo = ResumoParcial(get_attribute_definitions(ids_workspaces))
+    parcial = PainelParcial(resumo)
+    conversas = buscar_conversas_workspaces(
+        {ws_id: cliente_intercom(workspace=workspace_por_id(ws_id)) for ws_id in ids_workspaces},
+        start_date, end_date, team_ids,
+        ao_progresso=parcial.atualizar,
+        ao_erro=st.error,
+        acervo=acervo_paginas(), # Se o acervo estiver ligado, cada página também vai pro disco
+        ao_pagina=resumo.adicionar,
+    )
+    parcial.limpar()
     return conversas
 
-def process_data(conversas, mapping, admin_map):
-    rows = []
-    for c in conversas:
-        link = f"https://app.intercom.com/a/inbox/{WORKSPACE_ID}/inbox/conversation/{c['id']}"
-        admin_id = c.get('admin_assignee_id')
-        assignee_name = admin_map.get(str(admin_id), f"ID {admin_id}") if admin_id else "Não atribuído"
-
-        # Captura e traduz o estado nativo da conversa
-        estado_raw = c.get('state', '')
-        mapa_estados = {'closed': 'Fechada', 'open': 'Aberta', 'snoozed': 'Pausada'}
-        estado_pt = mapa_estados.get(estado_raw, estado_raw.capitalize())
-
-        stats = c.get('statistics') or {}
-        time_reply_sec = stats.get('time_to_admin_reply') or stats.get('response_time')
-        time_close_sec = stats.get('time_to_close')
-        if not time_close_sec:
-            if stats.get('last_close_at') and c.get('created_at'):
-                time_close_sec = stats.get('last_close_at') - c.get('created_at')
-
-        row = {
-            "ID": c['id'],
-            "timestamp_real": c['created_at'], 
-            "Data": datetime.fromtimestamp(c['created_at']).strftime("%d/%m/%Y %H:%M"),
-            "Estado": estado_pt,
-            "Atendente": assignee_name,
-            "Link": link,
-            "Tempo Resposta (seg)": time_reply_sec,
-            "Tempo Resolução (seg)": time_close_sec,
-            "Tempo Resposta": format_sla_string(time_reply_sec),
-            "Tempo Resolução": format_sla_string(time_close_sec),
-            "CSAT Nota": (c.get('conversation_rating') or {}).get('rating'),
-            "CSAT Comentario": (c.get('conversation_rating') or {}).get('remark')
-        }
-        
-        attrs = c.get('custom_attributes', {})
-        for key, value in attrs.items():
-            nome_bonito = mapping.get(key)
-            if nome_bonito: row[nome_bonito] = value
-            else: row[key] = value
-        rows.append(row)
-    
-    df = pd.DataFrame(rows)
-    coluna_teimosa = "Motivo 2 (Se houver)"
-    if not df.empty and coluna_teimosa not in df.columns:
-        df[coluna_teimosa] = None 
-        
-    if not df.empty:
-        df = df.sort_values(by="timestamp_real", ascending=True)
-    return df
-
-def gerar_excel_multias(df, colunas_selecionadas):
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        for col in colunas_selecionadas:
-            if col in df.columns and col not in ["Data", "Link", "ID", "Qtd. Atributos"]:
-                try:
-                    resumo = df[col].value_counts().reset_index()
-                    resumo.columns = [col, 'Quantidade']
-                    nome_aba = col[:30].replace("/", "-")
-                    resumo.to_excel(writer, index=False, sheet_name=nome_aba)
-                except: pass
-
-        cols_fixas = ["Data", "Estado", "Atendente", "Tempo Resposta", "Tempo Resolução", "CSAT Nota", "CSAT Comentario", "Link"]
-        cols_finais = cols_fixas + [c for c in colunas_selecionadas if c not in cols_fixas]
-        cols_existentes = [c for c in cols_finais if c in df.columns]
-        df[cols_existentes].to_excel(writer, index=False, sheet_name='Base Completa')
-        writer.sheets['Base Completa'].set_column('A:A', 18) 
-    return output.getvalue()
-
 # Interface
 
 st.title("📊 Relatório Gerencial: Atributos & SLA")
@@ -193,38 +82,87 @@ with st.sidebar:
 
     data_hoje = datetime.now()
     periodo = st.date_input("Período", (data_hoje - timedelta(days=7), data_hoje), format="DD/MM/YYYY")
-    team_input = st.text_input("IDs dos Times:", value="2975006")
+    team_input = st.text_input("IDs dos Times:", value=",".join(str(t) for ws in WORKSPACES for t in ws.times))
+    fontes = ["🌐 Intercom (ao vivo)", "🍃 MongoDB (agregado)"] + (["🗄️ Acervo local (sem API)"] if acervo_paginas() is not None else [])
+    fonte = st.radio("Fonte dos dados:", fontes, help="No modo MongoDB, o banco agrupa os dados e só o resumo é baixado. O acervo refaz o relatório com as páginas já baixadas, sem chamar o Intercom.")
     btn_run = st.button("🚀 Gerar Dados", type="primary")
     logout_button()
 
-if btn_run:
+modo_mongo = fonte.startswith("🍃")
+modo_acervo = fonte.startswith("🗄️")
+
+if btn_run and modo_mongo:
     start, end = periodo
     ids_times = [int(x.strip()) for x in team_input.split(",") if x.strip().isdigit()] if team_input else None
+    ts_start, ts_end = intervalo_ts(start, end)
+
+    with st.spinner("Agregando no MongoDB..."), medir("agregacoes_mongo"):
+        kpis = kpis_mongo(ts_start, ts_end, ids_times)
+        if kpis is None or kpis["total"] == 0:
+            st.warning("Nenhum dado encontrado no MongoDB para este período.")
+            st.session_state.pop('resumo_mongo', None)
+        else:
+            st.session_state['resumo_mongo'] = {
+                "kpis": kpis,
+                "taxa": taxa_classificacao_mongo(ts_start, ts_end, ids_times),
+                "ranking": ranking_motivos_mongo(ts_start, ts_end, ids_times),
+                "csat": csat_por_motivo_mongo(ts_start, ts_end, ids_times),
+                "sla": sla_por_atendente_mongo(ts_start, ts_end, ids_times),
+            }
+
+if btn_run and not modo_mongo:
+    start, end = periodo
+    ids_times = [int(x.strip()) for x in team_input.split(",") if x.strip().isdigit()] if team_input else None
+    
+    chave = chave_consulta("gerencial", start, end, ids_times, extra="acervo" if modo_acervo else None, ids_workspaces=IDS_WORKSPACES)
     
-    with st.spinner("Analisando dados..."):
-        mapa = get_attribute_definitions()
-        admins_map = get_all_admins()
-        raw = fetch_conversations(start, end, ids_times)
+    # Já tem cópia da consulta (de outra sessão ou de antes)? Mostra na hora e, se venceu, atualiza em segundo plano.
+    # Do acervo sempre refaz (a graça é rodar o process_data atual de novo)
+    if modo_acervo or not reaproveitar_ou_revalidar('chave_df_final', chave, recarregador_relatorio("gerencial", start, end, ids_times, IDS_WORKSPACES)):
+        def carregar():
+            if modo_acervo:
+                raw, mapa, admins_map = conversas_do_acervo(IDS_WORKSPACES, start, end, ids_times)
+            else:
+                mapa = get_attribute_definitions(IDS_WORKSPACES)
+                admins_map = get_all_admins(IDS_WORKSPACES)
+                with medir("fetch_conversations"):
+                    raw = fetch_conversations(start, end, ids_times, IDS_WORKSPACES)
+            if not raw:
+                return None
+            with medir("process_data", conversas=len(raw)):
+                return process_data(raw, mapa, admins_map, modelo="gerencial", workspace_id=IDS_WORKSPACES[0], atributos_longos=True)
         
-        if raw:
-            df = process_data(raw, mapa, admins_map)
-            st.session_state['df_final'] = df
+        # Se outro gestor já pediu a mesma consulta e ela ainda está baixando, espera a dele em vez de baixar de novo
+        df = carregar_uma_vez(chave, carregar)
+        if df is not None:
+            st.session_state['chave_df_final'] = chave # A sessão guarda só a chave
             st.toast(f"✅ {len(df)} conversas carregadas.")
         else:
             st.warning("Nenhum dado encontrado.")
 
-if 'df_final' in st.session_state:
-    df = st.session_state['df_final']
+df = None if modo_mongo else dataset_da_sessao('chave_df_final')
+if df is not None:
+    mostrar_uso_memoria('chave_df_final')
+
+if modo_mongo:
+    if 'resumo_mongo' in st.session_state:
+        mostrar_resumo_mongo(st.session_state['resumo_mongo'])
+
+elif 'chave_df_final' in st.session_state and df is None:
+    st.warning("Os dados saíram da memória do servidor. Clique em 🚀 Gerar Dados novamente.")
+
+elif df is not None:
     st.divider()
+    selo_atualizacao('chave_df_final')
     
     # Seleção de Colunas
-    todas_colunas = list(df.columns)
-    COL_EXPANSAO = "Expansão (Passagem de bastão para CSM)"
-    sugestao = ["Tipo de Atendimento", COL_EXPANSAO, "Motivo de Contato", "Motivo 2 (Se houver)", "Status do atendimento"]
-    padrao = [c for c in sugestao if c in todas_colunas]
-    ignorar = ["ID", "timestamp_real", "Data", "Link", "Atendente", "CSAT Nota", "CSAT Comentario", "Tempo Resposta (seg)", "Tempo Resolução (seg)", "Tempo Resposta", "Tempo Resolução"]
+    todas_colunas = nomes_atributos(df) # Colunas + atributos ainda no formato longo
+    padrao = colunas_sugeridas(df, "gerencial")
+    ignorar = ["ID", "timestamp_real", "timestamp_atualizacao", "team_assignee_id", "Data", "Link", "Atendente", "CSAT Nota", "CSAT Comentario", "Tempo Resposta (seg)", "Tempo Resolução (seg)", "Tempo Resposta", "Tempo Resolução"]
     
     cols_usuario = st.multiselect("Atributos para análise:", [c for c in todas_colunas if c not in ignorar], default=padrao)
+    # Só os atributos escolhidos (e os que os KPIs e abas usam) viram coluna
+    df = vista_atributos(df, ATRIBUTOS_DA_TELA["gerencial"] + cols_usuario)
 
     # KPIs
     st.markdown("### 📌 Resumo")
@@ -241,15 +179,16 @@ if 'df_final' in st.session_state:
     
     k1, k2, k3, k4, k5 = st.columns(5)
     
-    total_conv = len(df)
-    preenchidos = df["Motivo de Contato"].notna().sum() if "Motivo de Contato" in df.columns else 0
-    resolvidos = df[df["Status do atendimento"] == "Resolvido"].shape[0] if "Status do atendimento" in df.columns else 0
-    tempo_med = df["Tempo Resolução (seg)"].mean() if "Tempo Resolução (seg)" in df.columns else 0
+    with medir("kpis"):
+        total_conv = len(df)
+        preenchidos = df["Motivo de Contato"].notna().sum() if "Motivo de Contato" in df.columns else 0
+        resolvidos = df[df["Status do atendimento"] == "Resolvido"].shape[0] if "Status do atendimento" in df.columns else 0
+        tempo_med = df["Tempo Resolução (seg)"].mean() if "Tempo Resolução (seg)" in df.columns else 0
     
-    top_motivo = "N/A"
-    if "Motivo de Contato" in df.columns:
-        c = df["Motivo de Contato"].value_counts()
-        if not c.empty: top_motivo = c.index[0].split(">")[-1].strip()
+        top_motivo = "N/A"
+        if "Motivo de Contato" in df.columns:
+            c = df["Motivo de Contato"].value_counts()
+            if not c.empty: top_motivo = c.index[0].split(">")[-1].strip()
 
     k1.metric("Total Conversas", total_conv)
     k2.metric("Classificados", preenchidos)
@@ -267,327 +206,16 @@ if 'df_final' in st.session_state:
         label_visibility="collapsed"
     )
 
-    if aba_selecionada == "📊 Distribuição":
-        c_filt1, c_filt2 = st.columns([3, 1])
-        with c_filt1:
-            graf_sel = st.selectbox("Selecione o Atributo:", cols_usuario, key="sel_graf_dist")
-        with c_filt2:
-            qtd_dist = st.slider("Qtd. Itens:", 5, 50, 10, key="slider_dist_qtd")
-
-        if cols_usuario:
-            c1, c2 = st.columns([2, 1])
-            
-            df_clean = df[df[graf_sel].notna()]
-            contagem = df_clean[graf_sel].value_counts().reset_index()
-            contagem.columns = ["Opção", "Qtd"]
-            contagem = contagem.head(qtd_dist) 
-            
-            total_registros = contagem["Qtd"].sum()
-            contagem["Label"] = contagem.apply(lambda x: f"{x['Qtd']} ({(x['Qtd']/total_registros*100):.1f}%)", axis=1)
-            contagem = contagem.sort_values("Qtd", ascending=False).reset_index(drop=True)
-
-            with c1:
-                altura_graf = max(600, len(contagem) * 50) 
-                fig = px.bar(contagem, x="Qtd", y="Opção", text="Label", orientation='h', title=f"Distribuição: {graf_sel} (Top {qtd_dist})", height=altura_graf)
-                fig.update_layout(yaxis={'categoryorder':'total ascending'})
-                st.plotly_chart(fig, use_container_width=True)
-                
-            with c2:
-                st.write(f"**Ranking (Top {qtd_dist}):**")
-                st.dataframe(contagem[["Opção", "Qtd"]], use_container_width=True, hide_index=True)
-        else:
-            st.warning("Selecione atributos no topo da página.")
-
-    if aba_selecionada == "👥 Equipe & Performance":
-        # --- NOVA SEÇÃO: TAXA DE CLASSIFICAÇÃO ---
-        st.subheader("🎯 Taxa de Classificação (Conversas Fechadas)")
-        
-        # Filtra apenas os chamados com o Estado nativo "Fechada" (closed)
-        if "Estado" in df.columns:
-            df_calc = df[df["Estado"] == "Fechada"].copy()
-        else:
-            df_calc = df.copy()
-
-        if "Motivo de Contato" in df_calc.columns and not df_calc.empty:
-            total_geral = len(df_calc)
-            classificados_geral = df_calc["Motivo de Contato"].notna().sum()
-            taxa_geral = (classificados_geral / total_geral * 100) if total_geral > 0 else 0
-            
-            # Métrica geral e Barra de progresso
-            st.metric(
-                "Taxa Geral da Equipe", 
-                f"{taxa_geral:.1f}%", 
-                f"{classificados_geral} de {total_geral} conversas fechadas classificadas", 
-                delta_color="off"
-            )
-            st.progress(min(taxa_geral / 100, 1.0))
-            
-            # Tabela individual por Analista
-            resumo_analistas = df_calc.groupby("Atendente").agg(
-                Total=('ID', 'count'),
-                Classificados=('Motivo de Contato', lambda x: x.notna().sum())
-            ).reset_index()
-            
-            resumo_analistas['Pendentes'] = resumo_analistas['Total'] - resumo_analistas['Classificados']
-            resumo_analistas['Taxa (%)'] = (resumo_analistas['Classificados'] / resumo_analistas['Total'] * 100).round(1)
-            
-            # Ordenar pelos que têm a maior taxa no topo
-            resumo_analistas = resumo_analistas.sort_values(by="Taxa (%)", ascending=False)
-            
-            # Adicionar o símbolo de % para apresentar na tabela
-            resumo_analistas_view = resumo_analistas.copy()
-            resumo_analistas_view['Taxa (%)'] = resumo_analistas_view['Taxa (%)'].apply(lambda x: f"{x}%")
-            
-            st.write("**Desempenho Individual (Apenas Fechadas):**")
-            st.dataframe(resumo_analistas_view, use_container_width=True, hide_index=True)
-        else:
-            st.warning("Sem dados de conversas fechadas para calcular a taxa ou o atributo 'Motivo de Contato' não existe.")
-            
-        st.divider()
-        
-        st.subheader("Volume de Conversas")
-        vol = df['Atendente'].value_counts().reset_index()
-        vol.columns = ['Agente', 'Volume']
-        st.plotly_chart(px.bar(vol, x='Agente', y='Volume', text='Volume', height=500), use_container_width=True)
-        
-        st.divider()
-        
-        st.subheader("🚀 Matriz de Eficiência: Volume x Tempo")
-        st.info("💡 **Como ler:** O canto inferior direito mostra quem atendeu mais chamados em menos tempo. O canto superior esquerdo mostra quem atendeu um volume menor, mas levou mais tempo. Isso é muito comum para quem assume os casos mais complexos.")
-        
-        if "Tempo Resolução (seg)" in df.columns:
-            df_perf = df.groupby("Atendente").agg(Volume=('ID', 'count'), Tempo_Medio_Seg=('Tempo Resolução (seg)', 'mean')).reset_index()
-            df_perf = df_perf[df_perf['Tempo_Medio_Seg'] > 0]
-            df_perf['Tempo Médio'] = df_perf['Tempo_Medio_Seg'].apply(format_sla_string)
-            
-            fig_scatter = px.scatter(df_perf, x="Volume", y="Tempo_Medio_Seg", text="Atendente", size="Volume", color="Tempo_Medio_Seg", color_continuous_scale="RdYlGn_r", hover_data=["Tempo Médio"], title="Relação: Quem atende mais vs Quem demora mais", height=700)
-            media_vol = df_perf["Volume"].mean()
-            media_tempo = df_perf["Tempo_Medio_Seg"].mean()
-            fig_scatter.add_vline(x=media_vol, line_dash="dash", line_color="gray", annotation_text="Média Vol.")
-            fig_scatter.add_hline(y=media_tempo, line_dash="dash", line_color="gray", annotation_text="Média Tempo")
-            st.plotly_chart(fig_scatter, use_container_width=True)
-        else:
-            st.warning("Dados de tempo não disponíveis.")
-
-    if aba_selecionada == "🔀 Cruzamentos":
-        qtd_cross = st.slider("Quantidade de itens no Ranking:", 5, 50, 10, key="slider_cross")
-
-        def plot_stack(df_in, x_col, color_col, title, limit=10):
-            top_n = df_in[x_col].value_counts().head(limit).index.tolist()
-            df_filtered = df_in[df_in[x_col].isin(top_n)]
-            g = df_filtered.groupby([x_col, color_col]).size().reset_index(name='Qtd')
-            g['Total'] = g.groupby(x_col)['Qtd'].transform('sum')
-            g['Pct'] = g.apply(lambda x: f"{(x['Qtd']/x['Total']*100):.0f}%", axis=1)
-            h_dyn = max(600, len(top_n) * 50) 
-            f = px.bar(g, y=x_col, x='Qtd', color=color_col, text='Pct', orientation='h', title=title, height=h_dyn)
-            f.update_layout(yaxis={'categoryorder':'total ascending'})
-            return f
-
-        if "Motivo de Contato" in df.columns and "Status do atendimento" in df.columns:
-            st.plotly_chart(plot_stack(df.dropna(subset=["Motivo de Contato", "Status do atendimento"]), "Motivo de Contato", "Status do atendimento", "1. Status por Motivo", qtd_cross), use_container_width=True)
-        
-        st.divider()
-
-        if "Motivo de Contato" in df.columns and "Tipo de Atendimento" in df.columns:
-            st.plotly_chart(plot_stack(df.dropna(subset=["Motivo de Contato", "Tipo de Atendimento"]), "Motivo de Contato", "Tipo de Atendimento", "2. Tipo por Motivo", qtd_cross), use_container_width=True)
-        
-        st.divider()
-        
-        if "Tipo de Atendimento" in df.columns and "Status do atendimento" in df.columns:
-            st.plotly_chart(plot_stack(df.dropna(subset=["Tipo de Atendimento", "Status do atendimento"]), "Tipo de Atendimento", "Status do atendimento", "3. Status por Tipo de atendimento", qtd_cross), use_container_width=True)
-
-    if aba_selecionada == "🔗 Top Motivos":
-        col_m1, col_m2 = "Motivo de Contato", "Motivo 2 (Se houver)"
-        if col_m1 in df.columns and col_m2 in df.columns:
-            qtd_top = st.slider("Quantidade de Motivos no Ranking:", 5, 50, 10)
-            rank = pd.concat([df[col_m1], df[col_m2]]).value_counts().reset_index()
-            rank.columns = ["Motivo", "Total"]
-            rank_cut = rank.head(qtd_top)
-            total_abs = rank["Total"].sum()
-            rank_cut["Label"] = rank_cut["Total"].apply(lambda x: f"{x} ({(x/total_abs*100):.1f}%)")
-            h_mot = max(600, qtd_top*50)
-
-            fig_glob = px.bar(rank_cut, x="Total", y="Motivo", orientation='h', text="Label", title=f"Top {qtd_top} Motivos de Contato", height=h_mot)
-            fig_glob.update_layout(yaxis={'categoryorder':'total ascending'})
-            st.plotly_chart(fig_glob, use_container_width=True)
-            
-            with st.expander("Ver lista completa"):
-                st.dataframe(rank, use_container_width=True)
-
-    if aba_selecionada == "⭐ CSAT / DSAT":
-        if "CSAT Nota" not in df.columns:
-             st.warning("Sem dados.")
-        else:
-            df_csat = df.dropna(subset=["CSAT Nota"])
-            if df_csat.empty:
-                st.info("Sem avaliações.")
-            else:
-                k1, k2 = st.columns(2)
-                k1.metric("Média Geral CSAT", f"{df_csat['CSAT Nota'].mean():.2f}/5.0")
-                k2.metric("Total de Avaliações", len(df_csat))
-                
-                st.divider()
-                
-                c_conf1, c_conf2 = st.columns([2, 1])
-                with c_conf1:
-                    ordem_csat = st.selectbox(
-                        "Ordenar Gráfico de Média por:", 
-                        ["Melhores Notas Primeiro (Ranking)", "Piores Notas Primeiro (Foco DSat)"], 
-                        key="sel_ordem_csat_final" 
-                    )
-                with c_conf2:
-                    qtd_csat = st.slider("Qtd. Motivos:", 5, 50, 10, key="slider_csat_qtd")
-                
-                eh_dsat = "Piores" in ordem_csat
-                
-                if "Motivo de Contato" in df.columns:
-                    csat_summary = df_csat.groupby("Motivo de Contato")["CSAT Nota"].agg(['mean', 'count']).reset_index()
-                    csat_summary.columns = ["Motivo de Contato", "Média", "Qtd"]
-                    
-                    st.subheader("1. Média de CSAT")
-                    
-                    if eh_dsat:
-                        df_chart1 = csat_summary.sort_values("Média", ascending=True).head(qtd_csat)
-                        df_chart1 = df_chart1.sort_values("Média", ascending=False)
-                    else:
-                        df_chart1 = csat_summary.sort_values("Média", ascending=False).head(qtd_csat)
-                        df_chart1 = df_chart1.sort_values("Média", ascending=True)
-
-                    df_chart1["Label"] = df_chart1.apply(lambda x: f"{x['Média']:.2f} ({int(x['Qtd'])} av.)", axis=1)
-                    
-                    h_c1 = max(400, len(df_chart1) * 50)
-                    
-                    fig1 = px.bar(
-                        df_chart1, 
-                        x="Média", 
-                        y="Motivo de Contato", 
-                        orientation='h', 
-                        text="Label", 
-                        color="Média", 
-                        color_continuous_scale="RdYlGn", 
-                        range_color=[1, 5], 
-                        height=h_c1,
-                        title=f"Média CSAT (Top {qtd_csat})"
-                    )
-                    fig1.update_layout(coloraxis_showscale=False)
-                    st.plotly_chart(fig1, use_container_width=True)
-                    
-                    st.divider()
-                    
-                    st.subheader("2. Total de Avaliações (Volume)")
-                    
-                    df_chart2 = csat_summary.sort_values("Qtd", ascending=False).head(qtd_csat)
-                    df_chart2 = df_chart2.sort_values("Qtd", ascending=True)
-                    
-                    df_chart2["Label"] = df_chart2["Qtd"].astype(int).astype(str)
-                    
-                    h_c2 = max(400, len(df_chart2) * 50)
-                    
-                    fig2 = px.bar(
-                        df_chart2,
-                        x="Qtd",
-                        y="Motivo de Contato",
-                        orientation='h',
-                        text="Label",
-                        height=h_c2,
-                        title=f"Volume de Avaliações (Top {qtd_csat})"
-                    )
-                    fig2.update_xaxes(title="Quantidade")
-                    st.plotly_chart(fig2, use_container_width=True)
-
-    if aba_selecionada == "⏱️ SLA":
-        st.header("Análise de Tempo")
-        col_res = "Tempo Resolução (seg)"
-        if col_res in df.columns:
-            df_t = df.dropna(subset=[col_res])
-            if not df_t.empty:
-                st.subheader("⚡ Velocidade por Agente")
-                tag = df_t.groupby("Atendente")[col_res].mean().reset_index().sort_values(col_res)
-                tag["Label"] = tag[col_res].apply(format_sla_string)
-                f_tag = px.bar(tag, x=col_res, y="Atendente", text="Label", orientation='h', title="Média de Tempo (Menor é melhor)", height=max(500, len(tag)*50))
-                f_tag.update_xaxes(showticklabels=False)
-                st.plotly_chart(f_tag, use_container_width=True)
-                
-                st.divider()
-                
-                st.subheader("🐢 Motivos mais demorados (Média de Resolução)")
-                qtd_sla = st.slider("Qtd. Motivos:", 5, 50, 10, key="slider_sla")
-                
-                if "Motivo de Contato" in df.columns:
-                    t_motivo = df_t.groupby("Motivo de Contato")[col_res].mean().reset_index()
-                    t_motivo = t_motivo.sort_values(col_res, ascending=False).head(qtd_sla)
-                    t_motivo = t_motivo.sort_values(col_res, ascending=True)
-                    t_motivo["Label"] = t_motivo[col_res].apply(format_sla_string)
-                    h_dyn = max(600, len(t_motivo) * 50)
-                    
-                    fig_tm = px.bar(t_motivo, x=col_res, y="Motivo de Contato", text="Label", orientation='h', height=h_dyn, title=f"Top {qtd_sla} Motivos mais demorados")
-                    fig_tm.update_xaxes(showticklabels=False)
-                    st.plotly_chart(fig_tm, use_container_width=True)
-            else: st.warning("Sem dados de tempo.")
-
-    if aba_selecionada == "📋 Dados":
-        with st.form("form_filtros_tabela"):
-            st.write("🔍 Filtros da Pesquisa")
-            c1, c2, c3, c4 = st.columns(4)
-            
-            with c1:
-                agentes_unicos = sorted(df["Atendente"].astype(str).unique())
-                sel_agentes = st.multiselect("👤 Analista:", agentes_unicos)
-                
-            with c2:
-                if "Tipo de Atendimento" in df.columns:
-                    tipos_unicos = sorted(df["Tipo de Atendimento"].dropna().astype(str).unique())
-                    sel_tipos = st.multiselect("💬 Tipo:", tipos_unicos)
-                else:
-                    sel_tipos = []
-                    
-            with c3:
-                if "Motivo de Contato" in df.columns:
-                    motivos_unicos = sorted(df["Motivo de Contato"].dropna().astype(str).unique())
-                    sel_motivos = st.multiselect("🎯 Motivo:", motivos_unicos)
-                else:
-                    sel_motivos = []
-                    
-            with c4:
-                if "Status do atendimento" in df.columns:
-                    status_unicos = sorted(df["Status do atendimento"].dropna().astype(str).unique())
-                    sel_status = st.multiselect("🚦 Status:", status_unicos)
-                else:
-                    sel_status = []
-
-            aplicar = st.form_submit_button("Aplicar Filtros")
-
-        df_view = df.copy()
-        
-        if sel_agentes:
-            df_view = df_view[df_view["Atendente"].isin(sel_agentes)]
-            
-        if sel_tipos:
-            df_view = df_view[df_view["Tipo de Atendimento"].isin(sel_tipos)]
-            
-        if sel_motivos:
-            df_view = df_view[df_view["Motivo de Contato"].isin(sel_motivos)]
-            
-        if sel_status:
-            df_view = df_view[df_view["Status do atendimento"].isin(sel_status)]
-
-        c_resumo, c_botao = st.columns([4, 1])
-        
-        with c_resumo:
-            st.caption(f"Exibindo **{len(df_view)}** conversas após os filtros.")
-            
-        with c_botao:
-            excel = gerar_excel_multias(df_view, cols_usuario)
-            st.download_button("📥 Baixar Excel", data=excel, file_name="relatorio_filtrado.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", type="primary", use_container_width=True)
-        
-        cols_display = ["Data", "Estado", "Atendente", "Link", "Tempo Resolução"] + cols_usuario
-        cols_existentes = [c for c in cols_display if c in df_view.columns]
-        
-        st.dataframe(
-            df_view[cols_existentes], 
-            use_container_width=True, 
-            hide_index=True,
-            column_config={
-                "Link": st.column_config.LinkColumn("Link", display_text="🔗 Abrir Conversa")
-            }
-        )
+    secoes = {
+        "📊 Distribuição": secao_distribuicao,
+        "👥 Equipe & Performance": secao_equipe,
+        "🔀 Cruzamentos": secao_cruzamentos,
+        "🔗 Top Motivos": secao_top_motivos,
+        "⭐ CSAT / DSAT": secao_csat,
+        "⏱️ SLA": secao_sla,
+        "📋 Dados": secao_dados,
+    }
+    with medir("aba", nome=aba_selecionada):
+        secoes[aba_selecionada](df, cols_usuario)
+
+painel_performance("gerencial")
@@ -0,0 +1,271 @@
+"""
+Acervo das páginas cruas do Intercom no disco (comprimidas), pra reprocessar sem baixar de novo.
+Cada página que chega do /conversations/search é separada por dia (created_at) e por time e vai pro fim do arquivo:
+  <pasta>/<workspace>/<AAAA-MM-DD>/time_<id>.jsonl.zst   (ou .jsonl.gz sem o zstandard)
+Cada dia tem um índice (_indice.json: id -> [time, updated_at]). Baixar de novo a mesma conversa não grava nada;
+uma versão mais nova vai pro fim do arquivo e o dia fica marcado para o compactar(), que reescreve o dia com
+uma cópia só de cada conversa, no arquivo do time atual (tira do time antigo quando ela muda de time).
+Junto ficam as buscas completas (pra saber se o período está todo no acervo) e a última cópia dos
+atributos e admins, então o reprocessamento não gasta nenhuma chamada da API.
+
+zstandard e orjson são opcionais (sem eles vai gzip e json da biblioteca padrão). Não depende do Streamlit.
+"""
+import gzip
+import json
+import os
+import threading
+from datetime import date, datetime, timedelta
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _dumps(obj):
+    return orjson.dumps(obj) if orjson else json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+def _loads(linha):
+    return orjson.loads(linha) if orjson else json.loads(linha)
+
+ARQUIVO_INDICE = "_indice.json"
+
+def _dia(ts):
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d")
+
+class AcervoPaginas:
+    """Grava e lê o acervo de um ou mais workspaces (cada um na sua subpasta)."""
+
+    def __init__(self, pasta, compressao=None):
+        self.pasta = pasta
+        self.compressao = compressao or ("zstd" if zstandard else "gzip")
+        if self.compressao == "zstd" and zstandard is None:
+            raise ValueError("compressao='zstd' precisa do pacote zstandard (pip install zstandard)")
+        self.extensao = ".jsonl.zst" if self.compressao == "zstd" else ".jsonl.gz"
+        self.lock = threading.Lock() # As páginas de vários workspaces chegam de threads diferentes
+        self._sujos = set() # (workspace, dia) com cópia velha de alguma conversa, esperando o compactar()
+
+    def _pasta_ws(self, workspace_id):
+        return os.path.join(self.pasta, str(workspace_id))
+
+    # --- ESCRITA ---
+
+    def _comprimir(self, linhas):
+        bloco = b"\n".join(linhas) + b"\n"
+        # Cada bloco é independente (gzip e zstd aceitam vários blocos no mesmo arquivo)
+        return zstandard.ZstdCompressor(level=3).compress(bloco) if self.compressao == "zstd" else gzip.compress(bloco, compresslevel=5)
+
+    def _arquivos_dia(self, pasta):
+        if not os.path.isdir(pasta):
+            return []
+        return sorted(n for n in os.listdir(pasta) if n.startswith("time_") and n.endswith((".jsonl.zst", ".jsonl.gz")))
+
+    def _ler_indice(self, pasta):
+        """Índice do dia. Acervo antigo (sem índice) é indexado lendo os arquivos; se tiver repetida, o dia fica sujo."""
+        try:
+            with open(os.path.join(pasta, ARQUIVO_INDICE), encoding="utf-8") as f:
+                return json.load(f), False
+        except (OSError, ValueError):
+            pass
+        indice, repetidas = {}, False
+        for nome in self._arquivos_dia(pasta):
+            for linha in self._ler_arquivo(os.path.join(pasta, nome)):
+                c = _loads(linha)
+                atual = indice.get(str(c['id']))
+                repetidas |= atual is not None
+                if atual is None or (c.get('updated_at') or 0) >= atual[1]:
+                    indice[str(c['id'])] = [nome.split(".", 1)[0][len("time_"):], c.get('updated_at') or 0]
+        return indice, repetidas
+
+    def _gravar_indice(self, pasta, indice):
+        caminho = os.path.join(pasta, ARQUIVO_INDICE)
+        with open(f"{caminho}.tmp", "w", encoding="utf-8") as f:
+            json.dump(indice, f)
+        os.replace(f"{caminho}.tmp", caminho)
+
+    def guardar_pagina(self, workspace_id, conversas):
+        """
+        Separa a página por dia/time e acrescenta um bloco comprimido no fim de cada arquivo.
+        Só entra o que o acervo ainda não tem na mesma versão (ou numa mais nova), pelo índice do dia.
+        """
+        por_dia = {}
+        for c in conversas:
+            por_dia.setdefault(_dia(c['created_at']), []).append(c)
+        with self.lock:
+            for dia, do_dia in por_dia.items():
+                pasta = os.path.join(self._pasta_ws(workspace_id), dia)
+                indice, sujo = self._ler_indice(pasta)
+                grupos = {}
+                for c in do_dia:
+                    cid, atualizada = str(c['id']), c.get('updated_at') or 0
+                    time_id = str(c.get('team_assignee_id') or "sem_time")
+                    anterior = indice.get(cid)
+                    if anterior is not None and anterior[1] >= atualizada:
+                        continue # Já tem essa versão (ou uma mais nova)
+                    sujo |= anterior is not None # A cópia velha continua no arquivo até compactar
+                    indice[cid] = [time_id, atualizada]
+                    grupos.setdefault(time_id, []).append(_dumps(c))
+                if not grupos and not sujo:
+                    continue
+                os.makedirs(pasta, exist_ok=True)
+                for time_id, linhas in grupos.items():
+                    with open(os.path.join(pasta, f"time_{time_id}{self.extensao}"), "ab") as f:
+                        f.write(self._comprimir(linhas))
+                self._gravar_indice(pasta, indice)
+                if sujo:
+                    self._sujos.add((str(workspace_id), dia))
+
+    def compactar(self, workspace_id=None):
+        """
+        Reescreve os dias marcados (de um workspace ou de todos) com uma cópia só de cada conversa: a mais nova,
+        no arquivo do time atual. Devolve quantos dias foram reescritos.
+        """
+        with self.lock:
+            pendentes = sorted(d for d in self._sujos if workspace_id is None or d[0] == str(workspace_id))
+            for ws_id, dia in pendentes:
+                self._compactar_dia(os.path.join(self._pasta_ws(ws_id), dia))
+                self._sujos.discard((ws_id, dia))
+        return len(pendentes)
+
+    def _compactar_dia(self, pasta):
+        arquivos = self._arquivos_dia(pasta)
+        por_id = {}
+        for nome in arquivos:
+            for linha in self._ler_arquivo(os.path.join(pasta, nome)):
+                c = _loads(linha)
+                atual = por_id.get(str(c['id']))
+                if atual is None or (c.get('updated_at') or 0) >= (atual.get('updated_at') or 0):
+                    por_id[str(c['id'])] = c
+        grupos, indice = {}, {}
+        for cid, c in por_id.items():
+            time_id = str(c.get('team_assignee_id') or "sem_time")
+            grupos.setdefault(f"time_{time_id}{self.extensao}", []).append(_dumps(c))
+            indice[cid] = [time_id, c.get('updated_at') or 0]
+        for nome, linhas in grupos.items():
+            caminho = os.path.join(pasta, nome)
+            with open(f"{caminho}.tmp", "wb") as f:
+                f.write(self._comprimir(linhas))
+            os.replace(f"{caminho}.tmp", caminho)
+        for nome in arquivos:
+            if nome not in grupos: # Time que ficou sem conversa nesse dia
+                os.remove(os.path.join(pasta, nome))
+        self._gravar_indice(pasta, indice)
+
+    def registrar_busca(self, workspace_id, ts_inicio, ts_fim, team_ids=None):
+        """Anota uma busca que terminou inteira (é o que diz se um período está coberto)."""
+        linha = {"inicio": ts_inicio, "fim": ts_fim, "times": sorted(team_ids) if team_ids else None,
+                 "em": int(datetime.now().timestamp())}
+        with self.lock:
+            os.makedirs(self._pasta_ws(workspace_id), exist_ok=True)
+            with open(os.path.join(self._pasta_ws(workspace_id), "buscas.jsonl"), "a", encoding="utf-8") as f:
+                f.write(json.dumps(linha) + "\n")
+
+    def guardar_referencias(self, workspace_id, atributos, admins):
+        """Última cópia do name -> label dos atributos e do id -> nome dos admins."""
+        caminho = os.path.join(self._pasta_ws(workspace_id), "referencias.json")
+        with self.lock:
+            os.makedirs(self._pasta_ws(workspace_id), exist_ok=True)
+            with open(f"{caminho}.tmp", "w", encoding="utf-8") as f:
+                json.dump({"atributos": atributos, "admins": admins}, f, ensure_ascii=False)
+            os.replace(f"{caminho}.tmp", caminho)
+
+    # --- LEITURA ---
+
+    def referencias(self, workspace_id):
+        """(atributos, admins) da última busca, ou ({}, {}) se não tiver."""
+        try:
+            with open(os.path.join(self._pasta_ws(workspace_id), "referencias.json"), encoding="utf-8") as f:
+                dados = json.load(f)
+            return dados.get("atributos", {}), dados.get("admins", {})
+        except (OSError, ValueError):
+            return {}, {}
+
+    def coberto(self, workspace_id, ts_inicio, ts_fim, team_ids=None):
+        """True se alguma busca completa já cobriu esse período e esses times (None = todos os times)."""
+        try:
+            with open(os.path.join(self._pasta_ws(workspace_id), "buscas.jsonl"), encoding="utf-8") as f:
+                buscas = [json.loads(l) for l in f if l.strip()]
+        except OSError:
+            return False
+        pedidos = set(team_ids) if team_ids else None
+        for b in buscas:
+            if b["inicio"] <= ts_inicio and b["fim"] >= ts_fim:
+                if b["times"] is None or (pedidos is not None and pedidos <= set(b["times"])):
+                    return True
+        return False
+
+    def _ler_arquivo(self, caminho):
+        with open(caminho, "rb") as f:
+            if caminho.endswith(".zst"):
+                if zstandard is None:
+                    raise ValueError(f"{caminho} está em zstd: instale o pacote zstandard para ler")
+                dados = zstandard.ZstdDecompressor().stream_reader(f, read_across_frames=True).read()
+            else:
+                dados = gzip.decompress(f.read())
+        return [l for l in dados.split(b"\n") if l]
+
+    def carregar(self, workspace_id, ts_inicio, ts_fim, team_ids=None):
+        """
+        Conversas criadas no período, só lendo os arquivos dos dias e times pedidos.
+        Se a mesma conversa foi baixada mais de uma vez, fica a versão mais nova (maior updated_at), no time atual.
+        """
+        times = {f"time_{t}" for t in team_ids} if team_ids else None
+        inicio_dia = date.fromtimestamp(ts_inicio)
+        fim_dia = date.fromtimestamp(ts_fim)
+        por_id = {}
+        dia = inicio_dia
+        while dia <= fim_dia:
+            pasta = os.path.join(self._pasta_ws(workspace_id), dia.isoformat())
+            if os.path.isdir(pasta):
+                try:
+                    with open(os.path.join(pasta, ARQUIVO_INDICE), encoding="utf-8") as f:
+                        indice = json.load(f)
+                except (OSError, ValueError):
+                    indice = {}
+                for nome in self._arquivos_dia(pasta):
+                    if times is not None and nome.split(".", 1)[0] not in times:
+                        continue
+                    time_arquivo = nome.split(".", 1)[0][len("time_"):]
+                    for linha in self._ler_arquivo(os.path.join(pasta, nome)):
+                        c = _loads(linha)
+                        if not (ts_inicio < c['created_at'] < ts_fim):
+                            continue
+                        versao = indice.get(str(c['id']))
+                        if versao and (versao[0] != time_arquivo or versao[1] > (c.get('updated_at') or 0)):
+                            continue # Cópia velha que ainda não foi compactada (ou ficou no time antigo)
+                        atual = por_id.get(c['id'])
+                        if atual is None or (c.get('updated_at') or 0) >= (atual.get('updated_at') or 0):
+                            por_id[c['id']] = c
+            dia += timedelta(days=1)
+        return sorted(por_id.values(), key=lambda c: c['created_at'])
+
+    def reprocessar(self, ids_workspaces, ts_inicio, ts_fim, team_ids=None):
+        """
+        Tudo que o process_data precisa, só do disco: (conversas, atributos, admins, workspaces sem cobertura).
+        Junta vários workspaces do mesmo jeito do download (campo "workspace_id" quando tem mais de um).
+        """
+        conversas, atributos, admins, faltando = [], {}, {}, []
+        for ws_id in ids_workspaces:
+            if not self.coberto(ws_id, ts_inicio, ts_fim, team_ids):
+                faltando.append(ws_id)
+            do_ws = self.carregar(ws_id, ts_inicio, ts_fim, team_ids)
+            if len(ids_workspaces) > 1:
+                for c in do_ws:
+                    c["workspace_id"] = ws_id
+            conversas.extend(do_ws)
+            mapa_ws, admins_ws = self.referencias(ws_id)
+            atributos.update(mapa_ws)
+            admins.update(admins_ws)
+        return conversas, atributos, admins, faltando
+
+    def tamanho_bytes(self, workspace_id=None):
+        """Espaço ocupado no disco (de um workspace ou do acervo todo)."""
+        raiz = self._pasta_ws(workspace_id) if workspace_id else self.pasta
+        total = 0
+        for pasta, _, arquivos in os.walk(raiz):
+            total += sum(os.path.getsize(os.path.join(pasta, a)) for a in arquivos)
+        return total
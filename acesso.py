@@ -0,0 +1,63 @@
+"""
+Login e logout dos painéis.
+Só depende do Streamlit de propósito: as páginas importam isso antes de tudo e só carregam
+pandas, pyarrow, utils etc. depois que a senha passou, então a tela de login abre rápido.
+"""
+import streamlit as st
+
+def check_password():
+    """
+    Verifica a senha e retorna o NÍVEL DE ACESSO:
+    - Retorna "gestor" se usar a senha de admin.
+    - Retorna "analista" se usar a senha do time.
+    - Retorna False se não estiver logado.
+    """
+    
+    # 1. Verifica se já está logado na sessão
+    if st.session_state.get("password_correct", False):
+        return st.session_state.get("user_role", None)
+
+    # 2. Função de validação ao digitar
+    def password_entered():
+        senha_digitada = st.session_state["password_input"]
+        
+        if senha_digitada == st.secrets["SENHA_GESTOR"]:
+            st.session_state["password_correct"] = True
+            st.session_state["user_role"] = "gestor" # <--- Crachá de Chefe
+            del st.session_state["password_input"]
+            
+        elif senha_digitada == st.secrets["SENHA_TIME"]:
+            st.session_state["password_correct"] = True
+            st.session_state["user_role"] = "analista" # <--- Crachá de Analista
+            del st.session_state["password_input"]
+            
+        else:
+            st.session_state["password_correct"] = False
+
+    # 3. Caixa de Login
+    st.markdown("### 🔒 Acesso Restrito")
+    st.text_input(
+        "Digite sua senha de acesso:", 
+        type="password", 
+        on_change=password_entered, 
+        key="password_input"
+    )
+    
+    # Mensagem de erro
+    if "password_correct" in st.session_state and not st.session_state["password_correct"]:
+        st.error("😕 Senha incorreta.")
+
+    return False
+
+def logout_button():
+    """Desenha um botão de sair na barra lateral"""
+    # Linha divisória para separar dos filtros
+    st.sidebar.markdown("---") 
+    
+    if st.sidebar.button("🚪 Sair do Sistema"):
+        # Limpa as chaves de autenticação
+        st.session_state["password_correct"] = False
+        st.session_state["user_role"] = None
+        
+        # Força o recarregamento da página para voltar ao Login
+        st.rerun()
@@ -0,0 +1,132 @@
+"""
+Despachante de alertas do Slack em segundo plano.
+Quem chama só coloca a mensagem na fila e segue a vida (não trava o rerun de ninguém).
+Uma thread junta tudo que chegou dentro do intervalo, tira as repetidas e manda UMA mensagem só,
+usando uma sessão HTTP reaproveitada, com timeout e novas tentativas.
+Não depende do Streamlit.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+class DespachanteSlack:
+    """Fila + thread que agrupa os alertas por intervalo e envia pro webhook."""
+
+    def __init__(self, webhook, intervalo_seg=10, timeout=(3, 10), max_tentativas=3, max_linhas=30):
+        self.webhook = webhook
+        self.intervalo_seg = intervalo_seg
+        self.timeout = timeout # (conexão, leitura)
+        self.max_tentativas = max_tentativas
+        self.max_linhas = max_linhas
+        self.fila = queue.Queue()
+        self.sessao = requests.Session() # Reaproveita a conexão (keep-alive) entre os envios
+        self.lock = threading.Lock()
+        self.thread = None
+        self.parado = False
+        self.estatisticas = {"recebidos": 0, "repetidos": 0, "mensagens_enviadas": 0, "falhas": 0}
+
+    def enviar(self, mensagem):
+        """Coloca o alerta na fila e volta na hora."""
+        if self.parado:
+            return
+        self._garantir_thread()
+        self.fila.put(("alerta", mensagem))
+
+    def flush(self, timeout=None):
+        """Manda agora o que estiver pendente e espera terminar (True se deu tempo)."""
+        if self.thread is None:
+            return True
+        pronto = threading.Event()
+        self.fila.put(("flush", pronto))
+        return pronto.wait(timeout)
+
+    def parar(self, timeout=15):
+        """Gancho de desligamento: envia o que sobrou e encerra a thread."""
+        if self.parado:
+            return
+        self.flush(timeout)
+        self.parado = True
+        if self.thread is not None:
+            self.fila.put(("parar", None))
+            self.thread.join(timeout)
+        self.sessao.close()
+
+    def _garantir_thread(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._loop, name="despachante-slack", daemon=True)
+                self.thread.start()
+
+    def _loop(self):
+        pendentes = OrderedDict() # mensagem -> quantas vezes chegou (mantém a ordem de chegada)
+        prazo = None
+        while True:
+            espera = None if prazo is None else max(0, prazo - time.monotonic())
+            try:
+                tipo, valor = self.fila.get(timeout=espera)
+            except queue.Empty:
+                tipo, valor = "tempo", None # Fechou o intervalo
+
+            if tipo == "alerta":
+                self.estatisticas["recebidos"] += 1
+                if valor in pendentes:
+                    self.estatisticas["repetidos"] += 1
+                pendentes[valor] = pendentes.get(valor, 0) + 1
+                if prazo is None:
+                    prazo = time.monotonic() + self.intervalo_seg # O primeiro alerta abre a janela
+                continue
+
+            if pendentes:
+                self._postar(self.montar_texto(pendentes))
+                pendentes.clear()
+            prazo = None
+            if tipo == "flush":
+                valor.set()
+            elif tipo == "parar":
+                return
+
+    def montar_texto(self, pendentes):
+        """Junta os alertas da janela numa mensagem só ("(x3)" para os repetidos)."""
+        linhas = [m if qtd == 1 else f"{m} (x{qtd})" for m, qtd in pendentes.items()]
+        if len(linhas) == 1:
+            return linhas[0]
+        sobra = len(linhas) - self.max_linhas
+        linhas = linhas[:self.max_linhas]
+        if sobra > 0:
+            linhas.append(f"… e mais {sobra} alertas.")
+        total = sum(pendentes.values())
+        return f"🔔 *{total} alertas nos últimos {self.intervalo_seg}s:*\n" + "\n".join(f"• {l}" for l in linhas)
+
+    def _postar(self, texto):
+        """POST com timeout e novas tentativas (espera o Retry-After quando o Slack pede)."""
+        for tentativa in range(self.max_tentativas):
+            try:
+                resposta = self.sessao.post(self.webhook, json={"text": texto}, timeout=self.timeout)
+                if resposta.status_code < 400:
+                    self.estatisticas["mensagens_enviadas"] += 1
+                    return True
+                if resposta.status_code not in (429, 500, 502, 503, 504):
+                    logger.warning("Erro ao enviar alerta Slack: %s %s", resposta.status_code, resposta.text[:200])
+                    break
+                espera = float(resposta.headers.get("Retry-After") or 2 ** tentativa)
+            except requests.RequestException as e:
+                logger.warning("Erro ao enviar alerta Slack (tentativa %d): %s", tentativa + 1, e)
+                espera = 2 ** tentativa
+            if tentativa + 1 < self.max_tentativas:
+                time.sleep(min(espera, 30))
+        self.estatisticas["falhas"] += 1
+        logger.warning("Alerta Slack descartado depois de %d tentativas", self.max_tentativas)
+        return False
+
+def criar_despachante(webhook, **opcoes):
+    """Cria o despachante e registra o flush no desligamento do processo."""
+    despachante = DespachanteSlack(webhook, **opcoes)
+    atexit.register(despachante.parar)
+    return despachante
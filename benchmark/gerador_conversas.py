@@ -0,0 +1,155 @@
+"""
+Gerador de conversas falsas (mas com cara de Intercom) para o benchmark.
+É determinístico: a conversa de número i é sempre a mesma para o mesmo seed,
+então não precisa guardar nada na memória, nem com 1 milhão de conversas.
+"""
+import random
+import time
+from datetime import datetime, timedelta
+
+ESCALAS = {"10k": 10_000, "100k": 100_000, "1M": 1_000_000}
+
+TIMES = [2975006, 1972225, 5000001]
+
+ADMINS = [
+    {"id": 100 + i, "name": nome, "team_ids": [TIMES[i % 2]]}
+    for i, nome in enumerate(["Ana", "Bruno", "Carla", "Diego", "Elisa", "Fábio", "Gabi", "Heitor", "Iara", "João", "Karen", "Lucas"])
+]
+
+# name -> label, igual o /data_attributes devolve
+ATRIBUTOS = {
+    "motivo_contato": "Motivo de Contato",
+    "motivo_2": "Motivo 2 (Se houver)",
+    "status_atendimento": "Status do atendimento",
+    "tipo_atendimento": "Tipo de Atendimento",
+    "expansao": "Expansão (Passagem de bastão para CSM)",
+    "categoria_sistema": "Categoria do sistema",
+    "cadastros": "Cadastros",
+    "equipe": "Equipe",
+    "Ticket category": "Ticket category",
+}
+
+MOTIVOS = {
+    "Financeiro": {"Boleto": ["2ª via", "Vencido", "Valor errado"], "Nota fiscal": ["Emissão", "Cancelamento"], "Cobrança": []},
+    "Sistema": {"Login": ["Senha", "Bloqueio"], "Relatórios": ["Lentidão", "Exportação"], "Integrações": ["API", "Webhook"]},
+    "Cadastro": {"Cliente": ["Novo", "Alteração"], "Produto": ["Preço", "Estoque"]},
+    "Dúvida": {"Uso": [], "Planos": ["Upgrade", "Downgrade"]},
+}
+
+def _motivos_folha():
+    folhas = []
+    for n1, filhos in MOTIVOS.items():
+        for n2, netos in filhos.items():
+            folhas.append(f"{n1} > {n2}")
+            folhas += [f"{n1} > {n2} > {n3}" for n3 in netos]
+    return folhas
+
+MOTIVOS_FOLHA = _motivos_folha()
+# updated_at nunca passa de created_at + isso (fechamento em até 3 dias + até 10 min de folga)
+ATRASO_MAX_ATUALIZACAO = 3 * 86400 + 600
+COMENTARIOS = [None, None, None, "Muito bom!", "Demorou um pouco", "Resolveu rápido", "Não resolveu meu problema", "Atendente muito educada"]
+
+class GeradorConversas:
+    """
+    `total` conversas espalhadas por igual entre `inicio_ts` e `fim_ts`.
+    A conversa i tem created_at crescente com i, então dá pra achar o intervalo de um filtro de datas na conta.
+    """
+
+    def __init__(self, total, inicio_ts=None, fim_ts=None, seed=42):
+        if fim_ts is None:
+            hoje = datetime.combine(datetime.now().date(), datetime.min.time())
+            fim_ts = int((hoje + timedelta(days=1)).timestamp()) - 1
+        if inicio_ts is None:
+            inicio_ts = fim_ts - 7 * 86400 + 1 # Mesma janela padrão do relatório (últimos 7 dias)
+        self.total = total
+        self.inicio_ts = inicio_ts
+        self.fim_ts = fim_ts
+        self.seed = seed
+        self.passo = max((fim_ts - inicio_ts) / max(total, 1), 1e-6)
+
+    def created_at(self, i):
+        return int(self.inicio_ts + i * self.passo)
+
+    def indice_apos(self, ts):
+        """Primeiro i com created_at > ts."""
+        i = max(0, min(self.total, int((ts - self.inicio_ts) / self.passo)))
+        while i > 0 and self.created_at(i - 1) > ts:
+            i -= 1
+        while i < self.total and self.created_at(i) <= ts:
+            i += 1
+        return i
+
+    # Os campos usados nos filtros da busca saem de uma conta barata (sem montar a conversa inteira)
+    def team(self, i):
+        h = ((i * 2654435761 + self.seed) >> 4) % 10
+        return TIMES[0] if h < 6 else (TIMES[1] if h < 9 else TIMES[2]) # 60% / 30% / 10%
+
+    def admin(self, i):
+        h = ((i * 40503 + self.seed) >> 3) % 20
+        return None if h == 0 else ADMINS[h % len(ADMINS)]["id"]
+
+    def estado(self, i):
+        h = ((i * 69069 + self.seed) >> 2) % 10
+        return "closed" if h < 7 else ("open" if h < 9 else "snoozed")
+
+    def conversa(self, i):
+        """Payload no mesmo formato do /conversations/search."""
+        r = random.Random(self.seed * 1_000_003 + i)
+        criado = self.created_at(i)
+        estado = self.estado(i)
+
+        attrs = {"Ticket category": "Back-office ticket" if r.random() < 0.1 else "Customer ticket"}
+        if r.random() < 0.85: # Nem todo mundo classifica...
+            attrs["motivo_contato"] = r.choice(MOTIVOS_FOLHA)
+            attrs["status_atendimento"] = r.choice(["Resolvido", "Resolvido", "Resolvido", "Pendente", "Encaminhado"])
+            attrs["tipo_atendimento"] = r.choice(["Dúvida", "Erro", "Solicitação", "Reclamação"])
+            if r.random() < 0.2:
+                attrs["motivo_2"] = r.choice(MOTIVOS_FOLHA)
+        if r.random() < 0.6:
+            attrs["categoria_sistema"] = r.choice(["Financeiro", "Estoque", "Vendas", "Fiscal"])
+            attrs["cadastros"] = r.choice(["Cliente", "Produto", "Fornecedor", "Usuário"])
+        if r.random() < 0.5:
+            attrs["equipe"] = r.choice(["N1", "N2", "Implantação"])
+        if r.random() < 0.05:
+            attrs["expansao"] = r.choice(["Sim", "Não"])
+        if r.random() < 0.15: # Atributos esparsos (criados e abandonados ao longo do tempo)
+            attrs[f"Campo antigo {r.randint(1, 40)}"] = r.choice([True, False, "x", r.randint(1, 99)])
+
+        resposta = r.randint(15, 3 * 3600)
+        fechamento = r.randint(resposta, 3 * 86400) if estado == "closed" else None
+        stats = {
+            "time_to_admin_reply": resposta if r.random() < 0.9 else None,
+            "response_time": resposta,
+            "time_to_close": fechamento if r.random() < 0.8 else None,
+            "last_close_at": criado + fechamento if fechamento else None,
+            "count_reopens": r.choice([0, 0, 0, 1, 2]),
+        }
+        avaliacao = None
+        if estado == "closed" and r.random() < 0.3:
+            avaliacao = {"rating": r.choices([1, 2, 3, 4, 5], weights=[5, 5, 10, 30, 50])[0], "remark": r.choice(COMENTARIOS), "created_at": criado + (fechamento or 0) + 60}
+
+        return {
+            "type": "conversation",
+            "id": str(900_000_000 + i),
+            "created_at": criado,
+            "updated_at": criado + (fechamento or resposta) + r.randint(0, 600),
+            "state": estado,
+            "open": estado != "closed",
+            "read": True,
+            "priority": r.choice(["not_priority", "not_priority", "priority"]),
+            "admin_assignee_id": self.admin(i),
+            "team_assignee_id": self.team(i),
+            "source": {"type": "conversation", "delivered_as": r.choice(["customer_initiated", "admin_initiated"]), "subject": "", "body": f"<p>Mensagem {i}</p>"},
+            "statistics": stats,
+            "conversation_rating": avaliacao,
+            "custom_attributes": attrs,
+            "tags": {"type": "tag.list", "tags": []},
+        }
+
+if __name__ == "__main__":
+    # Amostra rápida: python benchmark/gerador_conversas.py
+    import json
+    g = GeradorConversas(10, seed=1)
+    inicio = time.perf_counter()
+    print(json.dumps(g.conversa(0), ensure_ascii=False, indent=2))
+    print(f"10 conversas em {(time.perf_counter() - inicio) * 1000:.1f} ms")
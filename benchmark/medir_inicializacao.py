@@ -0,0 +1,88 @@
+"""
+Mede o "cold start" da tela de login: um processo Python novo roda a página (via AppTest)
+até o formulário de senha, sem usuário logado. O Streamlit já está importado antes do cronômetro
+(no servidor ele já está carregado), então o tempo medido é o custo das nossas importações + script.
+
+Também confere que as dependências pesadas (pandas, pyarrow, plotly, pymongo, xlsxwriter) NÃO foram carregadas no login.
+
+Uma medida sozinha varia muito (disco, CPU dividida com outros processos): a primeira rodada de cada página
+é descartada (aquecimento) e as páginas se alternam a cada repetição, para que uma fase mais lenta da
+máquina pegue todas igual. O orçamento vale para a mediana.
+
+Uso:
+  python benchmark/medir_inicializacao.py --orcamento-ms 300 --repeticoes 7
+Sai com código 1 se alguma página passar do orçamento ou carregar dependência pesada.
+"""
+import argparse
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAGINAS = {
+    "gerencial": "1_*.py",
+    "analista": "pages/2_*.py",
+    "v2": "pages/3_*.py",
+}
+
+# Só devem aparecer depois do login, quando alguém realmente usar
+PESADOS = ["pandas", "pyarrow", "plotly", "pymongo", "xlsxwriter"]
+
+# Roda dentro do processo filho
+_FILHO = """
+import json, sys, time
+sys.path.insert(0, {raiz!r})
+from streamlit.testing.v1 import AppTest
+antes = set(sys.modules)
+inicio = time.perf_counter()
+at = AppTest.from_file({arquivo!r}, default_timeout=60)
+at.secrets["SENHA_GESTOR"] = "x"
+at.secrets["SENHA_TIME"] = "y"
+at.run()
+ms = (time.perf_counter() - inicio) * 1000
+novos = sorted(set(m.split(".")[0] for m in set(sys.modules) - antes))
+print(json.dumps({{"ms": ms, "modulos": novos, "erros": [e.message for e in at.exception], "tem_senha": len(at.text_input) > 0}}))
+"""
+
+def medir_pagina(arquivo):
+    codigo = _FILHO.format(raiz=RAIZ, arquivo=arquivo)
+    saida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, cwd=RAIZ)
+    if saida.returncode != 0:
+        raise SystemExit(saida.stderr[-2000:])
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de inicialização da tela de login")
+    parser.add_argument("--orcamento-ms", type=float, default=300, help="Tempo máximo (mediana) até a tela de login")
+    parser.add_argument("--repeticoes", type=int, default=7)
+    parser.add_argument("--aquecimento", type=int, default=1, help="Rodadas descartadas antes de medir")
+    args = parser.parse_args()
+
+    arquivos = {nome: glob.glob(os.path.join(RAIZ, padrao))[0] for nome, padrao in PAGINAS.items()}
+    medidas = {nome: [] for nome in PAGINAS}
+    for rodada in range(args.aquecimento + args.repeticoes):
+        for nome, arquivo in arquivos.items():
+            medida = medir_pagina(arquivo)
+            if rodada >= args.aquecimento:
+                medidas[nome].append(medida)
+
+    estourou = False
+    for nome, lista in medidas.items():
+        tempos = [m["ms"] for m in lista]
+        mediana = statistics.median(tempos)
+        ultima = lista[-1]
+        pesados = [m for m in PESADOS if m in ultima["modulos"]]
+        ok = mediana <= args.orcamento_ms and not pesados and not ultima["erros"] and ultima["tem_senha"]
+        estourou |= not ok
+        print(f"{'✅' if ok else '❌'} {nome:<10} login em {mediana:7.1f} ms (mín {min(tempos):.0f}, máx {max(tempos):.0f};"
+              f" orçamento {args.orcamento_ms:.0f} ms) | pesados carregados: {', '.join(pesados) or 'nenhum'}")
+        if ultima["erros"]:
+            print(f"   erros: {ultima['erros']}")
+    return 1 if estourou else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
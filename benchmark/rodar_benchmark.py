@@ -0,0 +1,193 @@
+"""
+Benchmark de ponta a ponta do relatório contra o stub do Intercom.
+
+Para cada escala sobe o stub num processo separado e roda a página (via AppTest do Streamlit)
+em outro processo limpo: clica em Gerar, passa por todas as abas e gera cada formato de exportação.
+Os tempos vêm do cronômetro do painel ⏱ Performance (desempenho.py). A memória vem do pico de RSS
+do processo e, com --tracemalloc, do pico do heap do Python em cada passo.
+
+Uso:
+  python benchmark/rodar_benchmark.py --escalas 10k,100k --latencia-ms 50 --saida resultado.json
+"""
+import argparse
+import glob
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+PASTA = os.path.dirname(os.path.abspath(__file__))
+RAIZ = os.path.dirname(PASTA)
+
+PAGINAS = {
+    "gerencial": {"arquivo": "1_*.py", "navegacao": "Navegação", "formato": "sel_formato_export", "aba_dados": "📋 Dados"},
+    "v2": {"arquivo": "pages/3_*.py", "navegacao": "Navegação V2", "formato": "sel_formato_v2", "aba_dados": "📋 Tabela V2"},
+}
+
+def _porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 # No Linux vem em KB
+
+# --- PROCESSO QUE RODA A PÁGINA ---
+
+def _ler_log(caminho, posicao):
+    """Linhas novas do log de desempenho desde `posicao` (cada execução da página é uma linha)."""
+    if not os.path.exists(caminho):
+        return [], posicao
+    with open(caminho, encoding="utf-8") as f:
+        f.seek(posicao)
+        linhas = [json.loads(l) for l in f if l.strip()]
+        return linhas, f.tell()
+
+def rodar_pagina(pagina, url, total, usar_tracemalloc=False):
+    """Roda a página contra o stub e devolve a lista de passos medidos."""
+    sys.path.insert(0, RAIZ)
+    os.chdir(RAIZ)
+    from streamlit.testing.v1 import AppTest
+    from telemetria import TELEMETRIA_PROCESSO
+
+    config = PAGINAS[pagina]
+    log = os.path.join(tempfile.mkdtemp(prefix="bench_"), "perf.jsonl")
+    at = AppTest.from_file(glob.glob(os.path.join(RAIZ, config["arquivo"]))[0], default_timeout=6 * 3600)
+    at.secrets["SENHA_GESTOR"] = "benchmark"
+    at.secrets["SENHA_TIME"] = "benchmark"
+    at.secrets["INTERCOM_TOKEN"] = "benchmark"
+    at.secrets["INTERCOM_API_URL"] = url
+    at.secrets["ARQUIVO_LOG_DESEMPENHO"] = log
+    at.secrets["MEMORIA_DATASETS_MB"] = 64 * 1024 # O benchmark quer medir a base inteira, sem despejo
+    at.session_state["password_correct"] = True
+    at.session_state["user_role"] = "gestor"
+
+    passos = []
+    posicao = 0
+
+    def passo(nome, acao):
+        nonlocal posicao
+        if usar_tracemalloc:
+            tracemalloc.reset_peak()
+        inicio = time.perf_counter()
+        acao()
+        parede = time.perf_counter() - inicio
+        if at.exception:
+            raise RuntimeError(f"{nome}: {[e.message for e in at.exception]}")
+        execucoes, posicao = _ler_log(log, posicao)
+        etapas, conversas = {}, None
+        for ex in execucoes:
+            for r in ex["etapas"]:
+                if r["etapa"] != "fetch_pagina":
+                    etapas[r["etapa"]] = round(etapas.get(r["etapa"], 0) + r["ms"], 2)
+                conversas = r.get("conversas", conversas)
+        passos.append({
+            "passo": nome,
+            "parede_ms": round(parede * 1000, 1),
+            "etapas_ms": etapas,
+            "conversas": conversas,
+            "rss_pico_mb": round(_rss_mb(), 1),
+            "heap_pico_mb": round(tracemalloc.get_traced_memory()[1] / 2**20, 1) if usar_tracemalloc else None,
+        })
+
+    if usar_tracemalloc:
+        tracemalloc.start()
+
+    at.run()
+    at.toggle(key="perf_ativo").set_value(True).run()
+    passo("gerar", lambda: [b for b in at.sidebar.button if "Gerar" in b.label][0].click().run())
+
+    navegacao = [r for r in at.radio if r.label == config["navegacao"]][0]
+    for aba in navegacao.options:
+        passo(f"aba {aba}", lambda aba=aba: [r for r in at.radio if r.label == config["navegacao"]][0].set_value(aba).run())
+
+    [r for r in at.radio if r.label == config["navegacao"]][0].set_value(config["aba_dados"]).run()
+    _, posicao = _ler_log(log, posicao) # Essa troca de aba não entra na conta da exportação
+    for formato in at.selectbox(key=config["formato"]).options:
+        passo(f"export {formato}", lambda formato=formato: at.selectbox(key=config["formato"]).set_value(formato).run())
+
+    return {"pagina": pagina, "total": total, "passos": passos, "telemetria": TELEMETRIA_PROCESSO.resumo()}
+
+# --- ORQUESTRAÇÃO ---
+
+def medir_escala(escala, args):
+    """Sobe o stub, roda a página num processo novo e derruba o stub."""
+    porta = _porta_livre()
+    stub = subprocess.Popen(
+        [sys.executable, os.path.join(PASTA, "stub_intercom.py"), "--escala", escala, "--porta", str(porta),
+         "--latencia-ms", str(args.latencia_ms), "--prob-429", str(args.prob_429), "--limite", str(args.limite)],
+        stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        stub.stdout.readline() # Espera o "Stub do Intercom em ..."
+        comando = [sys.executable, __file__, "--interno", "--pagina", args.pagina, "--escala", escala, "--url", f"http://127.0.0.1:{porta}"]
+        if args.tracemalloc:
+            comando.append("--tracemalloc")
+        saida = subprocess.run(comando, capture_output=True, text=True)
+        if saida.returncode != 0:
+            print(saida.stderr[-3000:], file=sys.stderr)
+            raise SystemExit(f"Falhou na escala {escala}")
+        return json.loads(saida.stdout.strip().splitlines()[-1])
+    finally:
+        stub.terminate()
+        stub.wait()
+
+def imprimir(resultado):
+    total = resultado["total"]
+    print(f"\n=== {resultado['pagina']} | {resultado['escala']} ({total} conversas no stub) ===")
+    print(f"{'passo':<32}{'parede (ms)':>13}{'RSS pico (MB)':>15}{'heap pico (MB)':>16}  etapas (ms)")
+    for p in resultado["passos"]:
+        heap = "-" if p["heap_pico_mb"] is None else p["heap_pico_mb"]
+        print(f"{p['passo']:<32}{p['parede_ms']:>13}{p['rss_pico_mb']:>15}{heap:>16}  {p['etapas_ms']}")
+
+    gerar = resultado["passos"][0]
+    qtd = gerar["conversas"] or 0
+    for etapa in ("fetch_conversations", "process_data"):
+        ms = gerar["etapas_ms"].get(etapa)
+        if ms:
+            print(f"  {etapa}: {ms / 1000:.1f}s ({qtd / (ms / 1000):,.0f} conversas/s)")
+    chamadas = sum(t["Chamadas"] for t in resultado["telemetria"])
+    espera = sum(t["Espera 429 (s)"] for t in resultado["telemetria"])
+    print(f"  chamadas à API: {chamadas} | espera por 429: {espera:.1f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do relatório contra o stub do Intercom")
+    parser.add_argument("--pagina", choices=list(PAGINAS), default="gerencial")
+    parser.add_argument("--escalas", default="10k", help="Lista separada por vírgula: 10k,100k,1M")
+    parser.add_argument("--latencia-ms", type=float, default=0)
+    parser.add_argument("--prob-429", type=float, default=0.0)
+    parser.add_argument("--limite", type=int, default=1000)
+    parser.add_argument("--tracemalloc", action="store_true", help="Mede o pico do heap do Python (deixa tudo mais lento)")
+    parser.add_argument("--saida", help="Arquivo JSON com o resultado completo")
+    # Uso interno: o processo filho que roda a página
+    parser.add_argument("--interno", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--escala", help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.interno:
+        sys.path.insert(0, PASTA)
+        from gerador_conversas import ESCALAS
+        resultado = rodar_pagina(args.pagina, args.url, ESCALAS[args.escala], args.tracemalloc)
+        resultado["escala"] = args.escala
+        print(json.dumps(resultado, ensure_ascii=False))
+        return
+
+    resultados = []
+    for escala in [e.strip() for e in args.escalas.split(",") if e.strip()]:
+        resultado = medir_escala(escala, args)
+        imprimir(resultado)
+        resultados.append(resultado)
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+        print(f"\nResultado salvo em {args.saida}")
+
+if __name__ == "__main__":
+    main()
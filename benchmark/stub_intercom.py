@@ -0,0 +1,212 @@
+"""
+Stub local da API do Intercom para medir o relatório sem um workspace de verdade.
+
+Imita o que o app usa:
+  POST /conversations/search  (filtros de created_at, updated_at, team_assignee_id, admin_assignee_id, state
+                               e custom_attributes.* com = e !=; paginação por cursor e total_count)
+  GET  /admins, /teams, /data_attributes
+Também devolve os headers X-RateLimit-* e dá pra injetar latência e erros 429.
+
+Uso:
+  python benchmark/stub_intercom.py --escala 100k --porta 8765 --latencia-ms 80 --prob-429 0.01
+E no .streamlit/secrets.toml:
+  INTERCOM_API_URL = "http://127.0.0.1:8765"
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from gerador_conversas import ADMINS, ATRASO_MAX_ATUALIZACAO, ATRIBUTOS, ESCALAS, TIMES, GeradorConversas
+
+class LimitadorRequisicoes:
+    """Janela fixa igual a do Intercom: `limite` chamadas a cada `janela_seg` segundos."""
+
+    def __init__(self, limite, janela_seg=10):
+        self.limite = limite
+        self.janela_seg = janela_seg
+        self.lock = threading.Lock()
+        self.inicio_janela = time.time()
+        self.usadas = 0
+
+    def consumir(self):
+        """Devolve (permitido, restante, reset_epoch)."""
+        with self.lock:
+            agora = time.time()
+            if agora - self.inicio_janela >= self.janela_seg:
+                self.inicio_janela = agora
+                self.usadas = 0
+            reset = int(math.ceil(self.inicio_janela + self.janela_seg))
+            if self.usadas >= self.limite:
+                return False, 0, reset
+            self.usadas += 1
+            return True, self.limite - self.usadas, reset
+
+class StubIntercom:
+    """Regras do stub (separadas do HTTP pra dar pra usar direto em teste)."""
+
+    def __init__(self, gerador, limite=1000, janela_seg=10, latencia_ms=0, prob_429=0.0, seed=7):
+        self.gerador = gerador
+        self.limitador = LimitadorRequisicoes(limite, janela_seg)
+        self.latencia_ms = latencia_ms
+        self.prob_429 = prob_429
+        self.sorteio = random.Random(seed)
+        self.lock_sorteio = threading.Lock()
+        self.cache_total = {} # total_count por filtro (contar 1M conversas a cada página seria caro)
+
+    def _filtros(self, query):
+        """Transforma a query do Intercom em (inicio, fim, condições extras)."""
+        regras = query.get("value", []) if query.get("operator") == "AND" else [query]
+        inicio, fim, extras, caros = 0, self.gerador.total, [], []
+        for r in regras:
+            campo, op, valor = r.get("field"), r.get("operator"), r.get("value")
+            if campo == "created_at" and op == ">":
+                inicio = max(inicio, self.gerador.indice_apos(valor))
+            elif campo == "created_at" and op == "<":
+                fim = min(fim, self.gerador.indice_apos(valor - 1))
+            elif campo == "updated_at" and op == ">":
+                # Quem foi alterado depois de `valor` foi criado no máximo ATRASO_MAX antes: só olha esse pedaço
+                inicio = max(inicio, self.gerador.indice_apos(valor - ATRASO_MAX_ATUALIZACAO))
+                caros.append(lambda i, v=valor: self.gerador.conversa(i)["updated_at"] > v)
+            elif campo == "team_assignee_id":
+                ids = set(int(v) for v in (valor if isinstance(valor, list) else [valor]))
+                extras.append(lambda i, ids=ids: self.gerador.team(i) in ids)
+            elif campo == "admin_assignee_id":
+                extras.append(lambda i, v=valor: str(self.gerador.admin(i)) == str(v))
+            elif campo == "state":
+                extras.append(lambda i, v=valor: self.gerador.estado(i) == v)
+            elif campo and campo.startswith("custom_attributes."):
+                # Esses precisam montar a conversa (mais caro), então vão por último na lista de condições
+                nome = campo.split(".", 1)[1]
+                atributo = lambda i, nome=nome: self.gerador.conversa(i)["custom_attributes"].get(nome)
+                if op == "=":
+                    caros.append(lambda i, v=valor, a=atributo: a(i) == v)
+                elif op == "!=":
+                    caros.append(lambda i, v=valor, a=atributo: a(i) != v)
+        return inicio, fim, extras + caros
+
+    def buscar(self, corpo):
+        query = corpo.get("query", {})
+        paginacao = corpo.get("pagination") or {}
+        por_pagina = min(int(paginacao.get("per_page", 20)), 150)
+        inicio, fim, extras = self._filtros(query)
+
+        cursor = paginacao.get("starting_after")
+        i = max(inicio, int(cursor)) if cursor else inicio
+        conversas = []
+        while i < fim and len(conversas) < por_pagina:
+            if all(f(i) for f in extras):
+                conversas.append(self.gerador.conversa(i))
+            i += 1
+        # Só tem próxima página se ainda existir alguma conversa que passa no filtro
+        while i < fim and not all(f(i) for f in extras):
+            i += 1
+
+        chave = json.dumps(query, sort_keys=True)
+        if chave not in self.cache_total:
+            self.cache_total[chave] = sum(1 for j in range(inicio, fim) if all(f(j) for f in extras)) if extras else max(fim - inicio, 0)
+        total = self.cache_total[chave]
+
+        paginas = {"type": "pages", "per_page": por_pagina, "total_pages": math.ceil(total / por_pagina) if por_pagina else 0}
+        if i < fim:
+            paginas["next"] = {"per_page": por_pagina, "starting_after": str(i)}
+        return {"type": "conversation.list", "conversations": conversas, "total_count": total, "pages": paginas}
+
+    def responder(self, metodo, caminho, corpo, autorizado):
+        """Devolve (status, dict, headers)."""
+        if self.latencia_ms:
+            # Latência com um pouco de variação (e uma cauda de vez em quando)
+            with self.lock_sorteio:
+                fator = self.sorteio.uniform(0.5, 1.5) * (4 if self.sorteio.random() < 0.02 else 1)
+            time.sleep(self.latencia_ms * fator / 1000)
+
+        permitido, restante, reset = self.limitador.consumir()
+        with self.lock_sorteio:
+            injetar_429 = self.sorteio.random() < self.prob_429
+        headers = {
+            "X-RateLimit-Limit": str(self.limitador.limite),
+            "X-RateLimit-Remaining": str(restante),
+            "X-RateLimit-Reset": str(reset),
+        }
+        if not permitido or injetar_429:
+            return 429, {"type": "error.list", "errors": [{"code": "rate_limit_exceeded", "message": "Exceeded rate limit"}]}, headers
+        if not autorizado:
+            return 401, {"type": "error.list", "errors": [{"code": "unauthorized", "message": "Access Token Invalid"}]}, headers
+
+        if metodo == "POST" and caminho == "/conversations/search":
+            return 200, self.buscar(corpo), headers
+        if metodo == "GET" and caminho == "/admins":
+            return 200, {"type": "admin.list", "admins": [{"type": "admin", "email": f"{a['name'].lower()}@empresa.com", **a} for a in ADMINS]}, headers
+        if metodo == "GET" and caminho == "/teams":
+            return 200, {"type": "team.list", "teams": [{"type": "team", "id": str(t), "name": f"Time {t}"} for t in TIMES]}, headers
+        if metodo == "GET" and caminho == "/data_attributes":
+            dados = [{"type": "data_attribute", "model": "conversation", "name": n, "label": l, "custom": True} for n, l in ATRIBUTOS.items()]
+            return 200, {"type": "list", "data": dados}, headers
+        return 404, {"type": "error.list", "errors": [{"code": "not_found", "message": "Resource Not Found"}]}, headers
+
+def criar_servidor(stub, porta=8765, host="127.0.0.1"):
+    """Servidor HTTP (uma thread por conexão) em volta do StubIntercom."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _tratar(self, metodo):
+            tamanho = int(self.headers.get("Content-Length") or 0)
+            corpo = {}
+            if tamanho:
+                try:
+                    corpo = json.loads(self.rfile.read(tamanho))
+                except ValueError:
+                    corpo = {}
+            autorizado = self.headers.get("Authorization", "").startswith("Bearer ") and len(self.headers["Authorization"]) > 7
+            status, dados, headers = stub.responder(metodo, urlparse(self.path).path, corpo, autorizado)
+
+            saida = json.dumps(dados, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(saida)))
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(saida)
+
+        def do_GET(self):
+            self._tratar("GET")
+
+        def do_POST(self):
+            self._tratar("POST")
+
+        def log_message(self, *args):
+            pass # Sem log por requisição (atrapalha a medição)
+
+    servidor = ThreadingHTTPServer((host, porta), Handler)
+    servidor.daemon_threads = True
+    return servidor
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub local da API do Intercom")
+    parser.add_argument("--escala", choices=list(ESCALAS), default="10k")
+    parser.add_argument("--total", type=int, help="Quantidade exata de conversas (ignora --escala)")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--limite", type=int, default=1000, help="Chamadas por janela do rate limit")
+    parser.add_argument("--janela", type=int, default=10, help="Tamanho da janela do rate limit (segundos)")
+    parser.add_argument("--latencia-ms", type=float, default=0)
+    parser.add_argument("--prob-429", type=float, default=0.0)
+    args = parser.parse_args()
+
+    gerador = GeradorConversas(args.total or ESCALAS[args.escala], seed=args.seed)
+    stub = StubIntercom(gerador, limite=args.limite, janela_seg=args.janela, latencia_ms=args.latencia_ms, prob_429=args.prob_429)
+    servidor = criar_servidor(stub, args.porta)
+    print(f"Stub do Intercom em http://127.0.0.1:{args.porta} ({gerador.total} conversas)", flush=True)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
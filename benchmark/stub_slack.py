@@ -0,0 +1,73 @@
+"""
+Webhook falso do Slack para testar os alertas sem mandar nada pro canal de verdade.
+Mostra no console cada mensagem recebida e pode simular lentidão e falhas.
+
+Uso:
+  python benchmark/stub_slack.py --porta 8766 --latencia-ms 2000 --prob-erro 0.2
+E no .streamlit/secrets.toml:
+  SLACK_WEBHOOK = "http://127.0.0.1:8766/webhook"
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+def criar_servidor(porta=8766, latencia_ms=0, prob_erro=0.0, ao_receber=None, host="127.0.0.1"):
+    """Servidor que aceita POST com {"text": ...}. ao_receber(texto) é chamado a cada mensagem aceita."""
+    sorteio = random.Random(3)
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            corpo = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if latencia_ms:
+                time.sleep(latencia_ms / 1000)
+            with lock:
+                falhar = sorteio.random() < prob_erro
+            if falhar:
+                self.send_response(503)
+                self.send_header("Retry-After", "1")
+                self.end_headers()
+                self.wfile.write(b"service_unavailable")
+                return
+            try:
+                texto = json.loads(corpo).get("text", "")
+            except ValueError:
+                self.send_response(400)
+                self.end_headers()
+                self.wfile.write(b"invalid_payload")
+                return
+            if ao_receber:
+                ao_receber(texto)
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer((host, porta), Handler)
+    servidor.daemon_threads = True
+    return servidor
+
+def main():
+    parser = argparse.ArgumentParser(description="Webhook falso do Slack")
+    parser.add_argument("--porta", type=int, default=8766)
+    parser.add_argument("--latencia-ms", type=float, default=0)
+    parser.add_argument("--prob-erro", type=float, default=0.0, help="Chance de responder 503")
+    args = parser.parse_args()
+
+    def mostrar(texto):
+        print(f"[{time.strftime('%H:%M:%S')}] {texto}\n", flush=True)
+
+    servidor = criar_servidor(args.porta, args.latencia_ms, args.prob_erro, ao_receber=mostrar)
+    print(f"Webhook falso do Slack em http://127.0.0.1:{args.porta}/webhook", flush=True)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+Teste de carga: várias sessões usando o app ao mesmo tempo contra o stub do Intercom.
+
+Cada sessão é um AppTest rodando numa thread do MESMO processo (igual ao servidor do Streamlit, onde as
+sessões dividem o processo, os caches e o repositório de bases). Para cada nível de concorrência sobe
+um processo novo e roda jornadas de verdade:
+  - gestor: login pela senha (check_password), 🚀 Gerar Dados, as sete seções do menu, os sliders
+    de cada seção e o Excel da aba 📋 Dados;
+  - analista: login pela senha do time, 🔄 Atualizar, Pendências e Atualizar de novo.
+Mede o tempo de cada rerun (p50/p95 por passo) e o RSS do processo depois de cada passo.
+
+O AppTest foi feito para um teste por vez: a cada run ele cria e apaga um Runtime falso, troca o
+st.secrets e a opção global.appTest, zera o "usa a pasta pages/" e recompila o script. Com várias threads isso embaralha (até clique de botão
+se perde), então o processo deixa essas coisas fixas antes de começar, como no servidor de verdade.
+
+O arquivo só é montado no clique do ⚙️ Preparar arquivo (o 📥 Baixar não roda o script), então o passo
+"excel" mede o rerun desse clique com o xlsx escolhido.
+
+Uso:
+  python benchmark/teste_carga.py --concorrencia 1,5,10,20 --escala 10k --analistas 0.3 --saida carga.json
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+PASTA = os.path.dirname(os.path.abspath(__file__))
+RAIZ = os.path.dirname(PASTA)
+
+SENHA_GESTOR = "carga-gestor"
+SENHA_TIME = "carga-time"
+NAVEGACAO = "Navegação"
+PAGINAS = {"gestor": "1_*.py", "analista": "pages/2_*.py"}
+
+def _porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _rss_mb():
+    """RSS atual do processo (no Linux pelo /proc; fora dele cai no pico do getrusage)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _percentil(valores, p):
+    """Percentil pelo posto mais próximo (sem interpolar, com poucas amostras é o mais honesto)."""
+    ordenados = sorted(valores)
+    return ordenados[max(0, min(len(ordenados) - 1, round(p / 100 * len(ordenados) + 0.5) - 1))]
+
+# --- PROCESSO QUE RODA AS SESSÕES ---
+
+def _preparar_processo(url):
+    """Deixa fixo o que o AppTest troca a cada run (ver a explicação lá em cima)."""
+    import streamlit as st
+    from streamlit import config
+    from unittest.mock import MagicMock
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.dataframe_source_manager import DataframeSourceManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.pages_manager import PagesManager
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.runtime.secrets import Secrets
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    segredos = Secrets()
+    segredos._secrets = {"SENHA_GESTOR": SENHA_GESTOR, "SENHA_TIME": SENHA_TIME, "INTERCOM_TOKEN": "carga", "INTERCOM_API_URL": url}
+    st.secrets = segredos # Com o at.secrets vazio, o AppTest não mexe no st.secrets
+    config.set_option("global.appTest", True) # Assim o "restaurar" de uma sessão não desliga o da outra
+    # Compila cada página uma vez só, antes das threads (compilar em paralelo quebra o ast no 3.11)
+    script_cache = ScriptCache()
+    for arquivo in PAGINAS.values():
+        script_cache.get_bytecode(glob.glob(os.path.join(RAIZ, arquivo))[0])
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: script_cache
+    # O AppTest troca Runtime._instance e PagesManager.uses_pages_directory a cada run. Com subclasses no
+    # lugar, as trocas caem nelas e os valores de verdade (lidos pelo resto do Streamlit) ficam fixos
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    runtime.dataframe_source_mgr = DataframeSourceManager()
+    Runtime._instance = runtime
+    app_test.Runtime = type("RuntimeFixo", (Runtime,), {})
+    PagesManager.uses_pages_directory = os.path.isdir(os.path.join(RAIZ, "pages"))
+    app_test.PagesManager = type("PagesManagerFixo", (PagesManager,), {})
+
+def _novo_app(arquivo):
+    from streamlit.testing.v1 import AppTest
+    return AppTest.from_file(glob.glob(os.path.join(RAIZ, arquivo))[0], default_timeout=3600)
+
+def _navegar(at, aba):
+    return [r for r in at.radio if r.label == NAVEGACAO][0].set_value(aba).run()
+
+def jornada_gestor(passo):
+    at = _novo_app(PAGINAS["gestor"])
+    passo("abrir", at.run)
+    passo("login", lambda: at.text_input(key="password_input").input(SENHA_GESTOR).run())
+    passo("gerar", lambda: [b for b in at.sidebar.button if "Gerar" in b.label][0].click().run())
+
+    for aba in [r for r in at.radio if r.label == NAVEGACAO][0].options:
+        passo(f"aba {aba}", lambda aba=aba: _navegar(at, aba))
+        # Cada slider da seção anda um pouco (um rerun por slider)
+        for i in range(len(at.slider)):
+            slider = at.slider[i]
+            novo = slider.value + 5 if slider.value + 5 <= slider.max else slider.min
+            passo(f"slider {slider.key or slider.label}", lambda i=i, novo=novo: at.slider[i].set_value(novo).run())
+
+    _navegar(at, "📋 Dados")
+    at.selectbox(key="sel_formato_export").set_value("Excel (.xlsx)").run()
+    passo("excel", lambda: at.button(key="export_gerencial_preparar").click().run())
+    return at
+
+def jornada_analista(passo):
+    # Entra pela página principal e troca de página, como no servidor (assim o pages/ vale igual pra todo mundo)
+    at = _novo_app(PAGINAS["gestor"])
+    at.switch_page(os.path.relpath(glob.glob(os.path.join(RAIZ, PAGINAS["analista"]))[0], RAIZ))
+    passo("abrir", at.run)
+    passo("login", lambda: at.text_input(key="password_input").input(SENHA_TIME).run())
+    atualizar = lambda: [b for b in at.button if "Atualizar" in b.label][0].click().run()
+    passo("atualizar", atualizar)
+    def pendencias():
+        at.session_state["aba_analista"] = "🚨 Pendências"
+        return at.run()
+    passo("pendências", pendencias)
+    passo("atualizar de novo", atualizar)
+    return at
+
+JORNADAS = {"gestor": jornada_gestor, "analista": jornada_analista}
+
+def rodar_sessoes(url, sessoes, analistas, semente=7):
+    """Roda as sessões em threads (todas começam juntas) e devolve as amostras de cada passo."""
+    sys.path.insert(0, RAIZ)
+    os.chdir(RAIZ)
+    _preparar_processo(url)
+
+    qtd_analistas = round(sessoes * analistas)
+    papeis = ["analista"] * qtd_analistas + ["gestor"] * (sessoes - qtd_analistas)
+    random.Random(semente).shuffle(papeis)
+
+    amostras = []
+    erros = []
+    lock = threading.Lock()
+    largada = threading.Barrier(sessoes)
+
+    def sessao(n, papel):
+        def passo(nome, acao):
+            inicio = time.perf_counter()
+            at = acao()
+            ms = (time.perf_counter() - inicio) * 1000
+            excecoes = [e.message for e in at.exception]
+            with lock:
+                amostras.append({"papel": papel, "passo": nome, "ms": ms, "rss_mb": _rss_mb(), "sessao": n})
+                if excecoes:
+                    erros.append(f"{papel} #{n} {nome}: {excecoes[0][:300]}")
+            return at
+
+        largada.wait()
+        try:
+            JORNADAS[papel](passo)
+        except Exception as e:
+            with lock:
+                erros.append(f"{papel} #{n}: {type(e).__name__}: {e}")
+
+    inicio = time.perf_counter()
+    threads = [threading.Thread(target=sessao, args=(n, papel)) for n, papel in enumerate(papeis)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return {"sessoes": sessoes, "analistas": qtd_analistas, "duracao_s": round(time.perf_counter() - inicio, 2),
+            "amostras": amostras, "erros": erros, "rss_final_mb": round(_rss_mb(), 1)}
+
+# --- ORQUESTRAÇÃO ---
+
+def resumir(resultado):
+    """Agrupa as amostras por (papel, passo): p50/p95 do rerun e o maior RSS visto."""
+    grupos = {}
+    for a in resultado["amostras"]:
+        grupos.setdefault((a["papel"], a["passo"]), []).append(a)
+    linhas = []
+    for (papel, passo), amostras in grupos.items():
+        tempos = [a["ms"] for a in amostras]
+        linhas.append({
+            "papel": papel, "passo": passo, "amostras": len(tempos),
+            "p50_ms": round(_percentil(tempos, 50), 1), "p95_ms": round(_percentil(tempos, 95), 1),
+            "rss_max_mb": round(max(a["rss_mb"] for a in amostras), 1),
+        })
+    return linhas
+
+def imprimir(resultado):
+    print(f"\n=== {resultado['sessoes']} sessões ao mesmo tempo ({resultado['analistas']} analistas) "
+          f"| {resultado['duracao_s']}s | RSS final {resultado['rss_final_mb']} MB ===")
+    print(f"{'papel':<10}{'passo':<36}{'n':>4}{'p50 (ms)':>11}{'p95 (ms)':>11}{'RSS máx (MB)':>14}")
+    for l in resultado["resumo"]:
+        print(f"{l['papel']:<10}{l['passo']:<36}{l['amostras']:>4}{l['p50_ms']:>11}{l['p95_ms']:>11}{l['rss_max_mb']:>14}")
+    for erro in resultado["erros"][:5]:
+        print(f"  ❌ {erro}")
+
+def medir_nivel(sessoes, url, args):
+    comando = [sys.executable, __file__, "--interno", "--sessoes", str(sessoes), "--url", url, "--analistas", str(args.analistas)]
+    saida = subprocess.run(comando, capture_output=True, text=True)
+    if saida.returncode != 0:
+        print(saida.stderr[-3000:], file=sys.stderr)
+        raise SystemExit(f"Falhou com {sessoes} sessões")
+    resultado = json.loads(saida.stdout.strip().splitlines()[-1])
+    resultado["resumo"] = resumir(resultado)
+    return resultado
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga com várias sessões ao mesmo tempo")
+    parser.add_argument("--concorrencia", default="1,5,10,20", help="Quantidades de sessões, separadas por vírgula")
+    parser.add_argument("--analistas", type=float, default=0.3, help="Fração das sessões que faz a jornada do analista")
+    parser.add_argument("--escala", default="10k")
+    parser.add_argument("--latencia-ms", type=float, default=0)
+    parser.add_argument("--prob-429", type=float, default=0.0)
+    parser.add_argument("--limite", type=int, default=1000)
+    parser.add_argument("--saida", help="Arquivo JSON com o resultado completo (amostras inclusas)")
+    # Uso interno: o processo filho que roda as sessões
+    parser.add_argument("--interno", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--sessoes", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.interno:
+        print(json.dumps(rodar_sessoes(args.url, args.sessoes, args.analistas), ensure_ascii=False))
+        return
+
+    porta = _porta_livre()
+    stub = subprocess.Popen(
+        [sys.executable, os.path.join(PASTA, "stub_intercom.py"), "--escala", args.escala, "--porta", str(porta),
+         "--latencia-ms", str(args.latencia_ms), "--prob-429", str(args.prob_429), "--limite", str(args.limite)],
+        stdout=subprocess.PIPE, text=True,
+    )
+    resultados = []
+    try:
+        stub.stdout.readline() # Espera o "Stub do Intercom em ..."
+        for sessoes in [int(n) for n in args.concorrencia.split(",") if n.strip()]:
+            resultado = medir_nivel(sessoes, f"http://127.0.0.1:{porta}", args)
+            imprimir(resultado)
+            resultados.append(resultado)
+    finally:
+        stub.terminate()
+        stub.wait()
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+        print(f"\nResultado salvo em {args.saida}")
+    return 1 if any(r["erros"] for r in resultados) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""
+Cronômetro das etapas do relatório (download, process_data, abas, gráficos, exportação).
+Não depende do Streamlit: cada execução da página liga a coleta com iniciar_coleta()
+e qualquer função pode se medir com `with medir("etapa"):`.
+Se a coleta estiver desligada, o medir() não faz nada (custo de um getattr).
+"""
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Cada sessão do Streamlit roda o script na sua própria thread, então cada uma tem a sua lista.
+_local = threading.local()
+
+def iniciar_coleta(ativo=True):
+    """Começa uma coleta nova nesta thread (ou desliga, se ativo=False)."""
+    _local.registros = [] if ativo else None
+    return _local.registros
+
+def registros_atuais():
+    """Lista de medições da execução atual (None se a coleta estiver desligada)."""
+    return getattr(_local, "registros", None)
+
+@contextmanager
+def medir(etapa, **detalhes):
+    """Mede quanto tempo o bloco levou e guarda em registros_atuais()."""
+    registros = getattr(_local, "registros", None)
+    if registros is None:
+        yield
+        return
+
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registros.append({"etapa": etapa, "ms": round((time.perf_counter() - inicio) * 1000, 2), **detalhes})
+
+def gravar_log(registros, caminho, **contexto):
+    """Acrescenta uma linha JSON no log local (uma linha por execução) para análise de tendência."""
+    linha = {"ts": time.strftime("%Y-%m-%dT%H:%M:%S"), **contexto, "etapas": registros}
+    try:
+        with open(caminho, "a", encoding="utf-8") as f:
+            f.write(json.dumps(linha, ensure_ascii=False, default=str) + "\n")
+    except OSError as e:
+        print(f"Erro ao gravar log de desempenho: {e}")
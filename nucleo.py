@@ -0,0 +1,830 @@
+"""
+Núcleo do relatório, sem Streamlit: cliente da API do Intercom, download das conversas,
+process_data (gerencial e V2) e as exportações (Excel, Parquet, CSV.gz, zip).
+As páginas e o relatorio_batch.py usam as mesmas funções daqui.
+Onde a tela precisa mostrar alguma coisa (progresso, espera, erro), a função recebe um callback.
+"""
+import hashlib
+import threading
+import time
+import zipfile
+from array import array
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+import requests
+from requests.adapters import HTTPAdapter
+
+from desempenho import medir
+from telemetria import TELEMETRIA_PROCESSO
+
+WORKSPACE_ID = "xwvpdtlu"
+INTERCOM_API_URL = "https://api.intercom.io"
+POR_PAGINA = 150
+TIMES_PADRAO = [2975006] # Time padrão do Relatório Gerencial
+TIMES_SUPORTE = [2975006, 1972225] # Times que entram no Painel do Analista
+LIMITE_REQUISICOES = 1000 # Chamadas por janela de 10s, por workspace (o Intercom libera um pouco mais; fica a margem)
+
+# --- CLIENTE DA API ---
+
+class ClienteIntercom:
+    """
+    Faz chamadas API seguras respeitando o Rate Limit do Intercom.
+    Usa o header 'X-RateLimit-Reset' para espera inteligente.
+    Toda chamada passa pelos coletores de telemetria (latência, status, bytes, rate limit e espera).
+    """
+
+    def __init__(self, token, base_url=INTERCOM_API_URL, coletores=(TELEMETRIA_PROCESSO,), ao_esperar=None, ao_desistir=None,
+                 sessao=None, orcamento=None):
+        self.token = token
+        self.base_url = (base_url or INTERCOM_API_URL).rstrip("/")
+        self.sessao = sessao # requests.Session do workspace (reaproveita as conexões); None = requests direto
+        self.orcamento = orcamento # OrcamentoRequisicoes do workspace, dividido com as outras sessões
+        self.coletores = [c for c in coletores if c is not None]
+        self.ao_esperar = ao_esperar # Chamado com os segundos de espera quando toma 429
+        self.ao_desistir = ao_desistir # Chamado quando estoura as tentativas
+
+    def url(self, caminho):
+        return caminho if caminho.startswith("http") else self.base_url + caminho
+
+    def chamar(self, method, caminho, json=None, params=None, max_retries=3):
+        """Devolve o JSON da resposta ou None se deu erro."""
+        url = self.url(caminho)
+        headers = { # Coloco o uniforme oficial pra API me respeitar
+            "Authorization": f"Bearer {self.token}",
+            "Accept": "application/json",
+            "Content-Type": "application/json"
+        }
+        # Eu tento 3 vezes (max_retries). Se a internet piscar, eu tento de novo.
+        http = self.sessao or requests
+        for attempt in range(max_retries):
+            if self.orcamento:
+                esperou = self.orcamento.reservar() # Segura aqui antes de estourar o limite do workspace
+                if esperou:
+                    for coletor in self.coletores:
+                        coletor.registrar_espera(method, url, esperou)
+            inicio = time.perf_counter()
+            try:
+                if method.upper() == "POST": # Se for pra enviar dados (POST)..
+                    response = http.post(url, json=json, params=params, headers=headers)
+                else: # Se for só pra ler dados (GET)..
+                    response = http.get(url, params=params, headers=headers)
+
+                for coletor in self.coletores:
+                    coletor.registrar(method, url, response.status_code, time.perf_counter() - inicio,
+                                      len(response.content or b""), response.headers.get("X-RateLimit-Remaining"))
+
+                if response.status_code == 200: # Se deu tudo certo (Código 200), eu devolvo o presente (os dados em JSON).
+                    return response.json()
+                # 🛑 AQUI É O PULO DO GATO! Se deu Erro 429 (Rate Limit)...
+                elif response.status_code == 429:
+                    reset_time = response.headers.get("X-RateLimit-Reset")
+                    if reset_time:
+                        try:
+                            wait_seconds = int(reset_time) - int(time.time()) + 1 # Hora de liberar - Hora de agora + 1 segundinho de margem.
+                        except ValueError:
+                            wait_seconds = (2 ** attempt) + 1 # Se o cálculo der ruim, espero exponencialmente (2s, 4s, 8s...).
+                    else:
+                        wait_seconds = (2 ** attempt) + 1 # Se eles não disserem o tempo, eu chuto um tempo seguro.
+
+                    wait_seconds = max(1, wait_seconds) # Nunca espero tempo negativo (o que seria viagem no tempo rs).
+                    if self.orcamento:
+                        self.orcamento.bloquear(wait_seconds) # As outras sessões do mesmo workspace também esperam
+                    if self.ao_esperar:
+                        self.ao_esperar(wait_seconds)
+                    for coletor in self.coletores:
+                        coletor.registrar_espera(method, url, wait_seconds)
+                    time.sleep(wait_seconds) # O código dorme. Zzz...
+                    continue
+                else:
+                    # Se for outro erro bizarro (tipo 500 ou 404), eu anoto no console pra investigar depois.
+                    print(f"Erro API {response.status_code}: {response.text}")
+                    return None
+
+            except Exception as e:
+                for coletor in self.coletores:
+                    coletor.registrar(method, url, 0, time.perf_counter() - inicio)
+                print(f"Erro de Conexão: {e}")
+                return None
+
+        if self.ao_desistir:
+            self.ao_desistir()
+        return None
+
+# --- WORKSPACES ---
+
+class OrcamentoRequisicoes:
+    """
+    Orçamento de chamadas de UM workspace (janela fixa, igual a do Intercom), dividido entre todas as sessões e threads.
+    Quem passaria do limite espera a janela virar do nosso lado, em vez de tomar 429.
+    """
+
+    def __init__(self, limite=LIMITE_REQUISICOES, janela_seg=10):
+        self.limite = limite
+        self.janela_seg = janela_seg
+        self.lock = threading.Lock()
+        self.inicio_janela = time.monotonic()
+        self.usadas = 0
+        self.bloqueado_ate = 0
+
+    def reservar(self):
+        """Pega uma vaga na janela atual. Devolve quantos segundos precisou esperar."""
+        esperou = 0
+        while True:
+            with self.lock:
+                agora = time.monotonic()
+                if agora - self.inicio_janela >= self.janela_seg:
+                    self.inicio_janela = agora
+                    self.usadas = 0
+                if agora < self.bloqueado_ate:
+                    espera = self.bloqueado_ate - agora
+                elif self.usadas < self.limite:
+                    self.usadas += 1
+                    return esperou
+                else:
+                    espera = self.inicio_janela + self.janela_seg - agora
+            time.sleep(espera)
+            esperou += espera
+
+    def bloquear(self, segundos):
+        """Tomou 429: ninguém desse workspace chama de novo até o reset."""
+        with self.lock:
+            self.bloqueado_ate = max(self.bloqueado_ate, time.monotonic() + segundos)
+
+class Workspace:
+    """
+    Um workspace do Intercom com tudo que é dele: token, pool de conexões HTTP, orçamento de chamadas
+    e o prefixo das chaves de cache (pra base de um workspace nunca aparecer no outro).
+    """
+
+    def __init__(self, id, token, nome=None, base_url=INTERCOM_API_URL, times=None, times_suporte=None,
+                 limite_requisicoes=LIMITE_REQUISICOES, janela_seg=10, tamanho_pool=10):
+        self.id = str(id)
+        self.token = token
+        self.nome = nome or self.id
+        self.base_url = base_url or INTERCOM_API_URL
+        self.times = [int(t) for t in (times if times is not None else TIMES_PADRAO)]
+        self.times_suporte = [int(t) for t in (times_suporte if times_suporte is not None else TIMES_SUPORTE)]
+        self.orcamento = OrcamentoRequisicoes(limite_requisicoes, janela_seg)
+        self.sessao = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=tamanho_pool, pool_maxsize=tamanho_pool)
+        self.sessao.mount("https://", adaptador)
+        self.sessao.mount("http://", adaptador)
+
+    def cliente(self, **opcoes):
+        """ClienteIntercom que usa o token, o pool e o orçamento deste workspace."""
+        return ClienteIntercom(self.token, base_url=self.base_url, sessao=self.sessao, orcamento=self.orcamento, **opcoes)
+
+    def link_conversa(self, conversa_id):
+        return f"https://app.intercom.com/a/inbox/{self.id}/inbox/conversation/{conversa_id}"
+
+def workspaces_da_config(config, token=None):
+    """
+    Monta os workspaces a partir do secrets (dict). Com a seção [workspaces.<id>] (token, nome, api_url, times,
+    times_suporte, limite_requisicoes) vira um por entrada; sem ela, continua o workspace único de sempre
+    (WORKSPACE_ID + INTERCOM_TOKEN). `token` força o token do workspace único (ex.: digitado na tela).
+    Devolve {id: Workspace} na ordem do arquivo.
+    """
+    base_url = config.get("INTERCOM_API_URL", INTERCOM_API_URL)
+    secoes = config.get("workspaces") or {}
+    if not secoes:
+        token = token or config.get("INTERCOM_TOKEN")
+        return {WORKSPACE_ID: Workspace(WORKSPACE_ID, token, base_url=base_url)} if token else {}
+    workspaces = {}
+    for ws_id, dados in secoes.items():
+        workspaces[str(ws_id)] = Workspace(
+            ws_id, dados.get("token"),
+            nome=dados.get("nome"),
+            base_url=dados.get("api_url", base_url),
+            times=dados.get("times"),
+            times_suporte=dados.get("times_suporte"),
+            limite_requisicoes=dados.get("limite_requisicoes", LIMITE_REQUISICOES),
+        )
+    return workspaces
+
+def buscar_definicoes_atributos(cliente):
+    """name -> label dos atributos personalizados de conversa."""
+    data = cliente.chamar("GET", "/data_attributes", params={"model": "conversation"}) or {}
+    return {item['name']: item['label'] for item in data.get('data', [])}
+
+def buscar_admins(cliente):
+    """id -> nome de todos os admins."""
+    data = cliente.chamar("GET", "/admins") or {}
+    return {str(a['id']): a['name'] for a in data.get('admins', [])}
+
+def intervalo_ts(start_date, end_date):
+    """Datas do filtro -> (início, fim) em epoch: do começo do primeiro dia ao fim do último."""
+    ts_start = int(datetime.combine(start_date, datetime.min.time()).timestamp())
+    ts_end = int(datetime.combine(end_date, datetime.max.time()).timestamp())
+    return ts_start, ts_end
+
+def buscar_conversas(cliente, start_date, end_date, team_ids=None, ao_progresso=None, ao_erro=None, ao_pagina=None):
+    """
+    Baixa todas as conversas criadas no período (paginando pelo cursor).
+    Se uma página falhar, para e devolve o que já veio (e avisa pelo ao_erro).
+    ao_pagina(conversas) recebe cada página crua assim que ela chega (usado pelo acervo).
+    """
+    ts_start, ts_end = intervalo_ts(start_date, end_date)
+
+    query_rules = [
+        {"field": "created_at", "operator": ">", "value": ts_start},
+        {"field": "created_at", "operator": "<", "value": ts_end}
+    ]
+    if team_ids:
+        query_rules.append({"field": "team_assignee_id", "operator": "IN", "value": team_ids})
+
+    payload = {"query": {"operator": "AND", "value": query_rules}, "pagination": {"per_page": POR_PAGINA}}
+
+    conversas = []
+    while True:
+        with medir("fetch_pagina", pagina=len(conversas) // POR_PAGINA + 1):
+            data = cliente.chamar("POST", "/conversations/search", json=payload)
+        if data is None:
+            if ao_erro:
+                ao_erro("Erro ao baixar conversas do Intercom.")
+            break
+        pagina = data.get('conversations', [])
+        conversas.extend(pagina)
+        if ao_pagina:
+            ao_pagina(pagina)
+        if ao_progresso:
+            ao_progresso(len(conversas))
+
+        if data.get('pages', {}).get('next'):
+            payload['pagination']['starting_after'] = data['pages']['next']['starting_after']
+            time.sleep(0.1)
+        else:
+            break
+    return conversas
+
+def _baixar_workspace(ws_id, cliente, start_date, end_date, team_ids, ao_progresso, ao_erro, acervo, ao_pagina=None):
+    """Baixa um workspace e, com acervo, guarda cada página e anota a busca se ela veio inteira."""
+    falhas = []
+
+    def erro(msg):
+        falhas.append(msg)
+        if ao_erro:
+            ao_erro(msg)
+
+    def pagina_chegou(pagina):
+        if acervo:
+            acervo.guardar_pagina(ws_id, pagina)
+        if ao_pagina:
+            ao_pagina(pagina)
+
+    conversas = buscar_conversas(
+        cliente, start_date, end_date, team_ids, ao_progresso=ao_progresso, ao_erro=erro,
+        ao_pagina=pagina_chegou if (acervo or ao_pagina) else None,
+    )
+    if acervo:
+        acervo.compactar(ws_id) # Tira as cópias velhas das conversas que mudaram desde o último download
+    if acervo and not falhas:
+        acervo.registrar_busca(ws_id, *intervalo_ts(start_date, end_date), team_ids)
+        atributos, admins = buscar_definicoes_atributos(cliente), buscar_admins(cliente)
+        if atributos and admins:
+            acervo.guardar_referencias(ws_id, atributos, admins) # Pro reprocessamento não precisar da API
+    return conversas
+
+def buscar_conversas_workspaces(clientes, start_date, end_date, team_ids=None, ao_progresso=None, ao_erro=None, acervo=None, ao_pagina=None):
+    """
+    Baixa de vários workspaces ao mesmo tempo (uma thread por workspace, cada uma no seu pool e orçamento)
+    e junta tudo numa lista só. clientes = {workspace_id: ClienteIntercom}.
+    Com mais de um workspace, cada conversa ganha o campo "workspace_id" (o link e a coluna Workspace saem dele).
+    ao_progresso e ao_erro rodam na thread de quem chamou (a tela não pode ser mexida de outra thread).
+    ao_pagina(conversas) pode rodar na thread do download, então não mexe na tela (ex.: ResumoParcial.adicionar).
+    Com acervo (AcervoPaginas), as páginas cruas também vão pro disco.
+    """
+    if len(clientes) == 1:
+        (ws_id, cliente), = clientes.items()
+        return _baixar_workspace(ws_id, cliente, start_date, end_date, team_ids, ao_progresso, ao_erro, acervo, ao_pagina)
+
+    baixadas = {ws_id: 0 for ws_id in clientes}
+    erros = []
+
+    def baixar(ws_id, cliente):
+        def progresso(qtd):
+            baixadas[ws_id] = qtd
+        conversas = _baixar_workspace(ws_id, cliente, start_date, end_date, team_ids, progresso,
+                                      lambda msg: erros.append(f"[{ws_id}] {msg}"), acervo, ao_pagina)
+        for c in conversas:
+            c["workspace_id"] = ws_id
+        return conversas
+
+    with ThreadPoolExecutor(max_workers=len(clientes), thread_name_prefix="workspace") as executor:
+        futuros = [executor.submit(baixar, ws_id, cliente) for ws_id, cliente in clientes.items()]
+        pendentes = set(futuros)
+        while pendentes:
+            _, pendentes = wait(pendentes, timeout=0.5)
+            if ao_progresso:
+                ao_progresso(sum(baixadas.values()))
+
+    if ao_erro:
+        for msg in erros:
+            ao_erro(msg)
+    juntas = []
+    for futuro in futuros:
+        juntas.extend(futuro.result())
+    return juntas
+
+def buscar_alteradas(cliente, desde_ts, team_ids=None, ao_erro=None):
+    """
+    Conversas criadas OU alteradas depois de desde_ts (pelo updated_at).
+    Devolve (conversas, completo): se uma página falhar, completo=False e quem chamou não deve avançar o cursor.
+    """
+    query_rules = [{"field": "updated_at", "operator": ">", "value": int(desde_ts)}]
+    if team_ids:
+        query_rules.append({"field": "team_assignee_id", "operator": "IN", "value": team_ids})
+    payload = {"query": {"operator": "AND", "value": query_rules}, "pagination": {"per_page": POR_PAGINA}}
+
+    conversas = []
+    while True:
+        with medir("fetch_alteradas", pagina=len(conversas) // POR_PAGINA + 1):
+            data = cliente.chamar("POST", "/conversations/search", json=payload)
+        if data is None:
+            if ao_erro:
+                ao_erro("Erro ao baixar conversas alteradas do Intercom.")
+            return conversas, False
+        conversas.extend(data.get('conversations', []))
+        if data.get('pages', {}).get('next'):
+            payload['pagination']['starting_after'] = data['pages']['next']['starting_after']
+            time.sleep(0.1)
+        else:
+            return conversas, True
+
+# --- PROCESSAMENTO ---
+
+def tempo_resolucao(conversa):
+    """Segundos até fechar (time_to_close ou, se não vier, last_close_at - created_at)."""
+    stats = conversa.get('statistics') or {}
+    segundos = stats.get('time_to_close')
+    if not segundos:
+        if stats.get('last_close_at') and conversa.get('created_at'):
+            segundos = stats.get('last_close_at') - conversa.get('created_at')
+    return segundos
+
+class ResumoParcial:
+    """
+    KPIs somados página a página enquanto o download ainda não terminou (a tela mostra como parcial).
+    Lê os atributos do mesmo jeito do process_data: pelo label (mapping) ou, sem label, pela chave crua.
+    Pode receber páginas de várias threads ao mesmo tempo.
+    """
+
+    def __init__(self, mapping, campo_ranking="Motivo de Contato", campo_status="Status do atendimento"):
+        self.campo_ranking = campo_ranking
+        self.chaves_ranking = [k for k, label in mapping.items() if label == campo_ranking] + [campo_ranking]
+        self.chaves_status = [k for k, label in mapping.items() if label == campo_status] + [campo_status]
+        self.total = 0
+        self.classificados = 0
+        self.resolvidos = 0
+        self.soma_tempo = 0
+        self.qtd_tempo = 0
+        self.ranking = Counter()
+        self.lock = threading.Lock()
+
+    def adicionar(self, conversas):
+        with self.lock:
+            for c in conversas:
+                attrs = c.get('custom_attributes') or {}
+                self.total += 1
+                valor = next((attrs[k] for k in self.chaves_ranking if attrs.get(k) is not None), None)
+                if valor is not None:
+                    self.classificados += 1
+                    self.ranking[valor] += 1
+                if any(attrs.get(k) == "Resolvido" for k in self.chaves_status):
+                    self.resolvidos += 1
+                segundos = tempo_resolucao(c)
+                if segundos is not None:
+                    self.soma_tempo += segundos
+                    self.qtd_tempo += 1
+
+    def fotografia(self, top=10):
+        """Cópia dos números até agora: total, classificados, resolvidos, tempo_medio e ranking [(valor, qtd)]."""
+        with self.lock:
+            return {
+                "total": self.total,
+                "classificados": self.classificados,
+                "resolvidos": self.resolvidos,
+                "tempo_medio": self.soma_tempo / self.qtd_tempo if self.qtd_tempo else 0,
+                "ranking": self.ranking.most_common(top),
+            }
+
+def format_sla_string(seconds):
+    if not seconds or pd.isna(seconds) or seconds == 0: return "-"
+    seconds = int(seconds)
+    days = seconds // 86400
+    rem = seconds % 86400
+    hours = rem // 3600
+    rem %= 3600
+    minutes = rem // 60
+    secs = rem % 60
+    parts = []
+    if days > 0: parts.append(f"{days}d")
+    if hours > 0: parts.append(f"{hours}h")
+    if minutes > 0: parts.append(f"{minutes}m")
+    if days == 0 and hours == 0: parts.append(f"{secs}s")
+    return " ".join(parts) if parts else "< 1s"
+
+MAPA_ESTADOS = {'closed': 'Fechada', 'open': 'Aberta', 'snoozed': 'Pausada'}
+COL_EXPANSAO = "Expansão (Passagem de bastão para CSM)"
+
+# Atributos que já vêm marcados na análise de cada relatório
+SUGESTAO_COLUNAS = {
+    "gerencial": ["Tipo de Atendimento", COL_EXPANSAO, "Motivo de Contato", "Motivo 2 (Se houver)", "Status do atendimento"],
+    "v2": ["Tipo de Atendimento", "Categoria do sistema", "Cadastros", "Equipe", "Status do atendimento"],
+}
+
+# Atributos que a própria página usa nos KPIs e nas abas (viram coluna mesmo fora da seleção)
+ATRIBUTOS_DA_TELA = {
+    "gerencial": ["Motivo de Contato", "Motivo 2 (Se houver)", "Status do atendimento", "Tipo de Atendimento"],
+    "v2": ["Categoria do sistema", "Cadastros", "Equipe", "Status do atendimento"],
+}
+
+class AtributosLongos:
+    """
+    Atributos personalizados em formato longo: um registro (linha, atributo, valor) por atributo preenchido,
+    com nomes e valores codificados por dicionário. Atributo vazio não ocupa nada
+    (no formato largo, cada atributo era uma coluna inteira, quase toda None).
+    Vai no df.attrs["atributos"]; "linha" é o rótulo do índice da conversa no DataFrame.
+    """
+
+    def __init__(self):
+        self.nomes = [] # código -> nome do atributo
+        self.valores = [] # código -> valor
+        self._cod_nome = {}
+        self._cod_valor = {}
+        self.linhas = array("i")
+        self.cod_nomes = array("i")
+        self.cod_valores = array("i")
+
+    def __deepcopy__(self, memo):
+        return self # O pandas copia os attrs a cada filtro; depois do process_data ninguém mexe aqui
+
+    def registrar_nome(self, nome):
+        cod = self._cod_nome.get(nome)
+        if cod is None:
+            cod = self._cod_nome[nome] = len(self.nomes)
+            self.nomes.append(nome)
+        return cod
+
+    def _codificar_valor(self, valor):
+        chave = (type(valor), valor) # True e 1 são iguais num dict, mas não na tela
+        try:
+            cod = self._cod_valor.get(chave)
+        except TypeError: # Valor que não dá hash (lista): entra sem dicionário
+            self.valores.append(valor)
+            return len(self.valores) - 1
+        if cod is None:
+            cod = self._cod_valor[chave] = len(self.valores)
+            self.valores.append(valor)
+        return cod
+
+    def adicionar(self, linha, atributos, mapping):
+        """Anota os atributos preenchidos de uma conversa (key do Intercom -> nome bonito pelo mapping)."""
+        for key, valor in atributos.items():
+            if valor is None:
+                continue
+            self.linhas.append(linha)
+            self.cod_nomes.append(self.registrar_nome(mapping.get(key) or key))
+            self.cod_valores.append(self._codificar_valor(valor))
+
+    def fechar(self):
+        """Troca os arrays de montagem por numpy (e joga fora os dicionários de montagem)."""
+        self.linhas = np.frombuffer(self.linhas, dtype=np.int32)
+        self.cod_nomes = np.frombuffer(self.cod_nomes, dtype=np.int32).astype(np.int16 if len(self.nomes) < 2**15 else np.int32)
+        self.cod_valores = np.frombuffer(self.cod_valores, dtype=np.int32)
+        self._cod_nome = {nome: i for i, nome in enumerate(self.nomes)}
+        self._cod_valor = None
+        self._valores_np = np.array(self.valores + [None], dtype=object)[:-1] # O None extra impede o numpy de abrir listas
+        return self
+
+    def nbytes(self):
+        """Memória aproximada (arrays + dicionário de valores)."""
+        return int(self.linhas.nbytes + self.cod_nomes.nbytes + self.cod_valores.nbytes
+                   + self._valores_np.nbytes + sum(len(v) for v in self.valores if isinstance(v, str)))
+
+    def coluna(self, nome, index):
+        """
+        Materializa um atributo como coluna alinhada ao index (NaN onde não foi preenchido).
+        Sem nenhum valor no recorte, vira coluna object de None, igual a coluna teimosa do DataFrame largo.
+        """
+        dados = np.full(len(index), np.nan, dtype=object)
+        cod = self._cod_nome.get(nome)
+        achou = np.zeros(0, dtype=bool)
+        if cod is not None:
+            sel = self.cod_nomes == cod
+            posicoes = index.get_indexer(self.linhas[sel]) # -1 = linha que não está nesse recorte
+            achou = posicoes >= 0
+            dados[posicoes[achou]] = self._valores_np[self.cod_valores[sel][achou]]
+        if not achou.any():
+            return pd.Series([None] * len(index), index=index, name=nome, dtype=object)
+        # Via lista, o pandas infere o tipo igual ao DataFrame largo (texto, número ou misto)
+        return pd.Series(dados.tolist(), index=index, name=nome)
+
+def tabela_atributos(df):
+    """O AtributosLongos do DataFrame (None se ele veio no formato largo)."""
+    return df.attrs.get("atributos")
+
+def nomes_atributos(df):
+    """Colunas do DataFrame + atributos que ainda estão no formato longo."""
+    longos = tabela_atributos(df)
+    return list(df.columns) + ([n for n in longos.nomes if n not in df.columns] if longos else [])
+
+def com_atributos(df, nomes):
+    """Cópia rasa do DataFrame com os atributos pedidos materializados como coluna (os que não existem são ignorados)."""
+    longos = tabela_atributos(df)
+    faltando = [n for n in dict.fromkeys(nomes) if longos and n in longos._cod_nome and n not in df.columns]
+    if not faltando:
+        return df
+    vista = df.copy(deep=False)
+    for nome in faltando:
+        vista[nome] = longos.coluna(nome, df.index)
+    return vista
+
+def process_data(conversas, mapping, admin_map, modelo="gerencial", workspace_id=WORKSPACE_ID, atributos_longos=False):
+    """
+    Transforma as conversas cruas em DataFrame (uma linha por conversa).
+    modelo="gerencial" traz estado, tempo de resposta e comentário do CSAT; "v2" é a versão enxuta.
+    atributos_longos=True deixa os atributos personalizados fora das colunas, no AtributosLongos
+    do df.attrs["atributos"] (as páginas materializam só os que forem usar, com com_atributos).
+    """
+    gerencial = modelo == "gerencial"
+    longos = AtributosLongos() if atributos_longos else None
+    rows = []
+    for i, c in enumerate(conversas):
+        link = f"https://app.intercom.com/a/inbox/{c.get('workspace_id', workspace_id)}/inbox/conversation/{c['id']}"
+        admin_id = c.get('admin_assignee_id')
+        assignee_name = admin_map.get(str(admin_id), f"ID {admin_id}") if admin_id else "Não atribuído"
+
+        stats = c.get('statistics') or {}
+        time_reply_sec = stats.get('time_to_admin_reply') or stats.get('response_time')
+        time_close_sec = tempo_resolucao(c)
+        avaliacao = c.get('conversation_rating') or {}
+
+        if gerencial:
+            # Captura e traduz o estado nativo da conversa
+            estado_raw = c.get('state', '')
+            row = {
+                "ID": c['id'],
+                "timestamp_real": c['created_at'],
+                "timestamp_atualizacao": c.get('updated_at'),
+                "team_assignee_id": c.get('team_assignee_id'),
+                "Data": datetime.fromtimestamp(c['created_at']).strftime("%d/%m/%Y %H:%M"),
+                "Estado": MAPA_ESTADOS.get(estado_raw, estado_raw.capitalize()),
+                "Atendente": assignee_name,
+                "Link": link,
+                "Tempo Resposta (seg)": time_reply_sec,
+                "Tempo Resolução (seg)": time_close_sec,
+                "Tempo Resposta": format_sla_string(time_reply_sec),
+                "Tempo Resolução": format_sla_string(time_close_sec),
+                "CSAT Nota": avaliacao.get('rating'),
+                "CSAT Comentario": avaliacao.get('remark')
+            }
+        else:
+            row = {
+                "ID": c['id'],
+                "timestamp_real": c['created_at'],
+                "Data": datetime.fromtimestamp(c['created_at']).strftime("%d/%m/%Y %H:%M"),
+                "Atendente": assignee_name,
+                "Link": link,
+                "Tempo Resolução (seg)": time_close_sec,
+                "Tempo Resolução": format_sla_string(time_close_sec),
+                "CSAT Nota": avaliacao.get('rating')
+            }
+
+        if 'workspace_id' in c:
+            row["Workspace"] = c['workspace_id'] # Só aparece no relatório de vários workspaces juntos
+
+        attrs = c.get('custom_attributes', {})
+        if longos is not None:
+            longos.adicionar(i, attrs, mapping) # i = rótulo da linha no DataFrame
+        else:
+            for key, value in attrs.items():
+                nome_bonito = mapping.get(key)
+                if nome_bonito: row[nome_bonito] = value
+                else: row[key] = value
+        rows.append(row)
+
+    df = pd.DataFrame(rows)
+    coluna_teimosa = "Motivo 2 (Se houver)"
+    if longos is not None:
+        if gerencial and rows:
+            longos.registrar_nome(coluna_teimosa) # Aparece na seleção mesmo sem ninguém ter preenchido
+        df.attrs["atributos"] = longos.fechar()
+    elif gerencial and not df.empty and coluna_teimosa not in df.columns:
+        df[coluna_teimosa] = None
+
+    if not df.empty:
+        df = df.sort_values(by="timestamp_real", ascending=True)
+    return df
+
+# --- HIERARQUIA DOS MOTIVOS ---
+SEPARADOR_MOTIVO = ">" # "Financeiro > Boleto > 2ª via"
+
+class ArvoreMotivos:
+    """
+    Os caminhos do Motivo ("A > B > C") viram uma árvore, montada uma vez por dataset,
+    com quantidade, CSAT e tempo de resolução já somados em todos os níveis.
+    O nó "A > B" soma tudo que está embaixo dele (inclusive quem foi classificado só até "A > B").
+    Com mais de uma coluna (Motivo 1 + Motivo 2), cada menção conta uma vez.
+    """
+
+    def __init__(self, df, colunas=("Motivo de Contato",), col_csat="CSAT Nota", col_tempo="Tempo Resolução (seg)"):
+        self.colunas = tuple(c for c in colunas if c in df.columns)
+        somas = {} # caminho (tupla) -> [qtd, soma_csat, n_csat, soma_tempo, n_tempo]
+        csat = pd.to_numeric(df[col_csat], errors="coerce").to_numpy(dtype=float) if col_csat in df.columns else np.full(len(df), np.nan)
+        tempo = pd.to_numeric(df[col_tempo], errors="coerce").to_numpy(dtype=float) if col_tempo in df.columns else np.full(len(df), np.nan)
+        tem_csat, tem_tempo = ~np.isnan(csat), ~np.isnan(tempo)
+
+        for col in self.colunas:
+            # Agrupa pelos valores distintos (centenas) e só eles são quebrados em níveis, não as linhas
+            codigos, distintos = pd.factorize(df[col])
+            n = len(distintos)
+            ok = codigos >= 0
+            qtd = np.bincount(codigos[ok], minlength=n)
+            soma_csat = np.bincount(codigos[ok & tem_csat], weights=csat[ok & tem_csat], minlength=n)
+            n_csat = np.bincount(codigos[ok & tem_csat], minlength=n)
+            soma_tempo = np.bincount(codigos[ok & tem_tempo], weights=tempo[ok & tem_tempo], minlength=n)
+            n_tempo = np.bincount(codigos[ok & tem_tempo], minlength=n)
+            for i, valor in enumerate(distintos):
+                partes = tuple(p.strip() for p in str(valor).split(SEPARADOR_MOTIVO) if p.strip())
+                for nivel in range(1, len(partes) + 1):
+                    acum = somas.setdefault(partes[:nivel], [0, 0.0, 0, 0.0, 0])
+                    acum[0] += qtd[i]
+                    acum[1] += soma_csat[i]
+                    acum[2] += n_csat[i]
+                    acum[3] += soma_tempo[i]
+                    acum[4] += n_tempo[i]
+
+        caminhos = sorted(somas)
+        valores = np.array([somas[c] for c in caminhos], dtype=float).reshape(-1, 5)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.nos = pd.DataFrame({
+                "Motivo": [c[-1] for c in caminhos],
+                "Caminho": [f" {SEPARADOR_MOTIVO} ".join(c) for c in caminhos],
+                "Nível": [len(c) for c in caminhos],
+                "Qtd": valores[:, 0].astype(int),
+                "CSAT Média": np.where(valores[:, 2] > 0, valores[:, 1] / valores[:, 2], np.nan),
+                "Avaliações": valores[:, 2].astype(int),
+                "Tempo Médio (seg)": np.where(valores[:, 4] > 0, valores[:, 3] / valores[:, 4], np.nan),
+            })
+        self._posicao = {c: i for i, c in enumerate(caminhos)}
+        self._filhos = {} # caminho do pai -> posições dos filhos em self.nos
+        for i, c in enumerate(caminhos):
+            self._filhos.setdefault(c[:-1], []).append(i)
+        self.nos["Subníveis"] = [len(self._filhos.get(c, [])) for c in caminhos]
+        self.total = int(self.nos.loc[self.nos["Nível"] == 1, "Qtd"].sum()) # Menções com Motivo preenchido
+
+    def filhos(self, caminho=()):
+        """Nós do nível logo abaixo do caminho (() = primeiro nível), do maior para o menor."""
+        posicoes = self._filhos.get(tuple(caminho), [])
+        return self.nos.iloc[posicoes].sort_values("Qtd", ascending=False, kind="stable").reset_index(drop=True)
+
+    def nivel(self, caminho=()):
+        """O que mostrar ao escolher o caminho: os filhos, ou o próprio nó se ele for uma folha (não fica vazio)."""
+        filhos = self.filhos(caminho)
+        posicao = self._posicao.get(tuple(caminho))
+        if not filhos.empty or posicao is None:
+            return filhos
+        return self.nos.iloc[[posicao]].reset_index(drop=True)
+
+    def no(self, caminho):
+        """Linha do nó (Series) ou None se o caminho não existe."""
+        posicao = self._posicao.get(tuple(caminho))
+        return None if posicao is None else self.nos.iloc[posicao]
+
+    def folhas(self):
+        """Nós sem subníveis (o Motivo completo)."""
+        return self.nos[self.nos["Subníveis"] == 0].sort_values("Qtd", ascending=False, kind="stable").reset_index(drop=True)
+
+def colunas_sugeridas(df, modelo="gerencial"):
+    """Atributos sugeridos do modelo que existem no DataFrame (em coluna ou no formato longo)."""
+    existentes = set(nomes_atributos(df))
+    return [c for c in SUGESTAO_COLUNAS[modelo] if c in existentes]
+
+# --- EXPORTAÇÕES ---
+
+LIMITE_LINHAS_EXCEL = 1_048_575 # 1 linha fica pro cabeçalho
+
+def gerar_excel_multias(df, colunas_selecionadas):
+    """Excel do Relatório Gerencial: uma aba de contagem por atributo + a base completa."""
+    output = BytesIO()
+    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+        colunas = [col for col in dict.fromkeys(colunas_selecionadas) if col in df.columns and col not in ["Data", "Link", "ID", "Qtd. Atributos"]]
+        for col, nome_aba in nomes_arquivos_unicos(colunas, tamanho=30, extensao="").items():
+            try:
+                contagem_arrow(df[col], str(col)).to_pandas().to_excel(writer, index=False, sheet_name=nome_aba)
+            except: pass
+
+        cols_fixas = ["Data", "Estado", "Atendente", "Tempo Resposta", "Tempo Resolução", "CSAT Nota", "CSAT Comentario", "Link"]
+        cols_finais = cols_fixas + [c for c in colunas_selecionadas if c not in cols_fixas]
+        cols_existentes = [c for c in cols_finais if c in df.columns]
+        df[cols_existentes].to_excel(writer, index=False, sheet_name='Base Completa')
+        writer.sheets['Base Completa'].set_column('A:A', 18)
+    return output.getvalue()
+
+def gerar_excel_v2(df, colunas_selecionadas):
+    """Excel do Relatório V2: base V2 + uma aba de contagem por atributo."""
+    output = BytesIO()
+    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+        # Aba Base Completa
+        cols_fixas = ["Data", "Atendente", "Tempo Resolução", "Link"]
+        cols_finais = cols_fixas + colunas_selecionadas
+        cols_existentes = [c for c in cols_finais if c in df.columns]
+        df[cols_existentes].to_excel(writer, index=False, sheet_name='Base V2')
+        writer.sheets['Base V2'].set_column('A:A', 18)
+
+        # Abas Individuais
+        colunas = [col for col in dict.fromkeys(colunas_selecionadas) if col in df.columns]
+        for col, nome_aba in nomes_arquivos_unicos(colunas, tamanho=30, extensao="").items():
+            try:
+                resumo = contagem_arrow(df[col], str(col)).to_pandas()
+                resumo.columns = [col, 'Qtd']
+                resumo.to_excel(writer, index=False, sheet_name=nome_aba)
+            except: pass
+    return output.getvalue()
+
+def array_arrow(serie):
+    """Uma coluna em Arrow. Atributo com tipos misturados (texto, número, booleano) que o Arrow não aceita vira texto."""
+    try:
+        return pa.Array.from_pandas(serie)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.Array.from_pandas(serie.astype("string"))
+
+def tabela_arrow(df):
+    """Converte o DataFrame em tabela Arrow, coluna por coluna (só a coluna com tipos misturados vira texto)."""
+    return pa.Table.from_arrays([array_arrow(df[col]) for col in df.columns], names=[str(c) for c in df.columns])
+
+def gerar_parquet(df):
+    """Exporta o DataFrame em Parquet (comprimido com zstd)."""
+    output = BytesIO()
+    pq.write_table(tabela_arrow(df), output, compression="zstd")
+    return output.getvalue()
+
+def gerar_csv_gz(df):
+    """Exporta o DataFrame em CSV compactado com gzip, escrito direto da tabela Arrow."""
+    sink = pa.BufferOutputStream()
+    with pa.CompressedOutputStream(sink, "gzip") as stream:
+        pa_csv.write_csv(tabela_arrow(df), stream)
+    return sink.getvalue().to_pybytes()
+
+def contagem_arrow(serie, nome):
+    """Contagem dos valores da coluna (o value_counts, sem os vazios) feita no Arrow, do mais para o menos frequente."""
+    contagem = pc.value_counts(pc.drop_null(array_arrow(serie)))
+    tabela = pa.table({nome: contagem.field("values"), "Quantidade": contagem.field("counts")})
+    return tabela.take(pc.sort_indices(tabela, sort_keys=[("Quantidade", "descending")]))
+
+def nomes_arquivos_unicos(colunas, tamanho=60, extensao=".csv"):
+    """
+    Nome de arquivo de cada coluna (cortado em `tamanho`, sem "/").
+    Se dois nomes longos ficarem iguais depois do corte, o de baixo ganha um pedaço do hash do nome inteiro.
+    """
+    nomes, usados = {}, set()
+    for col in colunas:
+        nome = str(col)[:tamanho].replace("/", "-")
+        if nome in usados:
+            nome = f"{nome[:tamanho - 9]}_{hashlib.sha1(str(col).encode('utf-8')).hexdigest()[:8]}"
+        usados.add(nome)
+        nomes[col] = nome + extensao
+    return nomes
+
+def gerar_zip_resumos(df, colunas_selecionadas):
+    """Gera um .zip com um CSV de contagem para cada atributo selecionado (contado e escrito pelo Arrow)."""
+    output = BytesIO()
+    colunas = [col for col in dict.fromkeys(colunas_selecionadas) if col in df.columns]
+    with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for col, nome_arquivo in nomes_arquivos_unicos(colunas).items():
+            sink = pa.BufferOutputStream()
+            pa_csv.write_csv(contagem_arrow(df[col], str(col)), sink)
+            zf.writestr(nome_arquivo, sink.getvalue().to_pybytes())
+    return output.getvalue()
+
+# Formato -> (extensão, mime) usados nos botões de download
+FORMATOS_EXPORTACAO = {
+    "Excel (.xlsx)": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "CSV (.csv.gz)": ("csv.gz", "application/gzip"),
+    "Resumos (.zip)": ("zip", "application/zip"),
+}
+
+def gerar_arquivo(df, extensao, colunas_selecionadas, modelo="gerencial"):
+    """Gera o arquivo de exportação pela extensão (xlsx, parquet, csv.gz ou zip)."""
+    if extensao in ("parquet", "csv.gz") and tabela_atributos(df) is not None:
+        df = com_atributos(df, tabela_atributos(df).nomes) # Base inteira: todos os atributos viram coluna
+    if extensao == "xlsx":
+        gerar_excel = gerar_excel_multias if modelo == "gerencial" else gerar_excel_v2
+        return gerar_excel(df, colunas_selecionadas)
+    if extensao == "parquet":
+        return gerar_parquet(df)
+    if extensao == "csv.gz":
+        return gerar_csv_gz(df)
+    if extensao == "zip":
+        return gerar_zip_resumos(df, colunas_selecionadas)
+    raise ValueError(f"Formato desconhecido: {extensao}")
@@ -1,6 +1,4 @@
 import streamlit as st
-import pandas as pd
-import requests
 import time
 from datetime import datetime, timedelta
 import sys
@@ -11,9 +9,9 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 try:
-    from utils import check_password, logout_button
+    from acesso import check_password, logout_button
 except ImportError:
-    st.error("Erro: utils.py não encontrado. Verifique se o arquivo está na pasta raiz.")
+    st.error("Erro: acesso.py não encontrado. Verifique se o arquivo está na pasta raiz.")
     st.stop()
 
 # --- CONFIGURAÇÃO DA PÁGINA ---
@@ -24,45 +22,47 @@ nivel_acesso = check_password()
 if not nivel_acesso:
     st.stop()
 
-# --- CONFIGURAÇÕES DO INTERCOM ---
-WORKSPACE_ID = "xwvpdtlu"
+# Importações pesadas só depois do login (a tela de senha abre sem carregar pandas, pyarrow etc.)
+import pandas as pd
+from utils import make_api_request, escolher_workspaces, workspace_por_id, repositorio_datasets, chave_consulta, dataset_da_sessao, mostrar_uso_memoria, reaproveitar_ou_revalidar, selo_atualizacao, tabela_paginada
+from nucleo import intervalo_ts
 
-try:
-    INTERCOM_ACCESS_TOKEN = st.secrets["INTERCOM_TOKEN"]
-except:
-    INTERCOM_ACCESS_TOKEN = st.sidebar.text_input("Intercom Token", type="password", key="token_analista_manual")
+# --- CONFIGURAÇÕES DO INTERCOM ---
+# O analista olha um workspace por vez (cada um com seu token, pool de conexões e orçamento de chamadas)
+WORKSPACES = escolher_workspaces("analista_manual", permitir_todos=False)
 
-if not INTERCOM_ACCESS_TOKEN:
+if not WORKSPACES:
     st.warning("⚠️ Token não configurado.")
     st.stop()
 
-HEADERS = {"Authorization": f"Bearer {INTERCOM_ACCESS_TOKEN}", "Accept": "application/json"}
+WORKSPACE = WORKSPACES[0]
+WORKSPACE_ID = WORKSPACE.id
 
 logout_button()
 
 # --- CONFIGURAÇÃO DE FILTROS FIXOS ---
-TIMES_PERMITIDOS_IDS = [2975006, 1972225]
+TIMES_PERMITIDOS_IDS = WORKSPACE.times_suporte
 
 # --- FUNÇÕES ---
 
 @st.cache_data(ttl=3600)
-def get_teams_list():
+def get_teams_list(workspace_id):
     """Busca a lista de times (ID -> Nome)"""
-    url = "https://api.intercom.io/teams"
+    url = "/teams"
     try:
-        r = requests.get(url, headers=HEADERS)
-        teams = r.json().get('teams', [])
+        data = make_api_request("GET", url, workspace=workspace_por_id(workspace_id)) or {}
+        teams = data.get('teams', [])
         return {t['name']: t['id'] for t in teams}
     except:
         return {}
 
 @st.cache_data(ttl=3600)
-def get_admin_list():
+def get_admin_list(workspace_id):
     """Busca lista de analistas e seus times"""
-    url = "https://api.intercom.io/admins"
+    url = "/admins"
     try:
-        r = requests.get(url, headers=HEADERS)
-        admins = r.json().get('admins', [])
+        data = make_api_request("GET", url, workspace=workspace_por_id(workspace_id)) or {}
+        admins = data.get('admins', [])
         
         dados_admins = {}
         for a in admins:
@@ -77,28 +77,64 @@ def get_admin_list():
         return {}
 
 @st.cache_data(ttl=3600)
-def get_attribute_definitions():
-    url = "https://api.intercom.io/data_attributes"
+def get_attribute_definitions(workspace_id):
+    url = "/data_attributes"
     params = {"model": "conversation"}
     try:
-        r = requests.get(url, headers=HEADERS, params=params)
-        return {item['name']: item['label'] for item in r.json().get('data', [])}
+        data = make_api_request("GET", url, params=params, workspace=workspace_por_id(workspace_id)) or {}
+        return {item['name']: item['label'] for item in data.get('data', [])}
     except:
         return {}
 
-def fetch_my_conversations(start_date, end_date, admin_id):
-    url = "https://api.intercom.io/conversations/search"
-    ts_start = int(datetime.combine(start_date, datetime.min.time()).timestamp())
-    ts_end = int(datetime.combine(end_date, datetime.max.time()).timestamp())
-    
-    # 1. Filtros da API (O Grosso)
-    query_rules = [
+def regras_analista(start_date, end_date, admin_id):
+    """Filtros da API (O Grosso): conversas fechadas do analista, nos times de suporte, dentro do período."""
+    ts_start, ts_end = intervalo_ts(start_date, end_date)
+    return [
         {"field": "created_at", "operator": ">", "value": ts_start},
         {"field": "created_at", "operator": "<", "value": ts_end},
         {"field": "admin_assignee_id", "operator": "=", "value": admin_id},
         {"field": "state", "operator": "=", "value": "closed"},
         {"field": "team_assignee_id", "operator": "IN", "value": TIMES_PERMITIDOS_IDS}
     ]
+
+def contar_conversas(query_rules):
+    """Só o total_count da busca (página de 1 conversa), sem baixar a lista."""
+    payload = {"query": {"operator": "AND", "value": query_rules}, "pagination": {"per_page": 1}}
+    data = make_api_request("POST", "/conversations/search", json=payload, workspace=WORKSPACE)
+    if data is None or 'total_count' not in data:
+        return None
+    return data['total_count']
+
+@st.cache_data(ttl=300, show_spinner=False)
+def fetch_my_counts(workspace_id, start_date, end_date, admin_id):
+    """
+    Caminho rápido dos KPIs: 2 buscas que só contam (todas as fechadas e as fechadas com Motivo).
+    O Back-office sai no próprio filtro da API. É uma estimativa: a API não trata igual a lista o atributo
+    ausente ou vazio, então a tela mostra como aproximado até a lista (a regra de motivo_classificado) chegar.
+    Devolve (total, classificados) ou None se a API não souber contar (aí a tela baixa a lista).
+    """
+    campo_motivo = next((nome for nome, label in get_attribute_definitions(workspace_id).items() if label == "Motivo de Contato"), None)
+    if not campo_motivo:
+        return None
+    base = regras_analista(start_date, end_date, admin_id) + [
+        {"field": "custom_attributes.Ticket category", "operator": "!=", "value": "Back-office ticket"}
+    ]
+    total = contar_conversas(base)
+    if total is None:
+        return None
+    classificados = contar_conversas(base + [{"field": f"custom_attributes.{campo_motivo}", "operator": "!=", "value": None}]) if total else 0
+    if classificados is None:
+        return None
+    return total, classificados
+
+def fetch_my_conversations(start_date, end_date, admin_id, cliente=None, ao_erro=None):
+    """
+    Lista completa (sem Back-office). Com `cliente`, roda sem desenhar nada (atualização em segundo plano)
+    e levanta erro se o download parar no meio: lista pela metade não substitui a cópia inteira.
+    Na tela, devolve o que chegou e avisa o motivo da parada por ao_erro(msg).
+    """
+    url = "/conversations/search"
+    query_rules = regras_analista(start_date, end_date, admin_id)
     
     payload = {
         "query": {"operator": "AND", "value": query_rules},
@@ -107,13 +143,19 @@ def fetch_my_conversations(start_date, end_date, admin_id):
     
     conversas_validas = [] # Lista final limpa
     has_more = True
+    falha = None # Motivo de ter parado antes da última página
     
-    bar = st.progress(0, text="Buscando conversas fechadas...")
+    bar = st.progress(0, text="Buscando conversas fechadas...") if cliente is None else None
     
     while has_more:
         try:
-            resp = requests.post(url, headers=HEADERS, json=payload)
-            data = resp.json()
+            if cliente is not None:
+                data = cliente.chamar("POST", url, json=payload)
+            else:
+                data = make_api_request("POST", url, json=payload, workspace=WORKSPACE)
+            if data is None:
+                falha = "a API não respondeu"
+                break
             batch = data.get('conversations', [])
             
             # --- FILTRO FINO (PYTHON) ---
@@ -129,26 +171,63 @@ def fetch_my_conversations(start_date, end_date, admin_id):
                 # Se passou no teste, adiciona na lista
                 conversas_validas.append(c)
             
-            bar.progress(50, text=f"Baixado: {len(conversas_validas)} conversas válidas...")
+            if bar:
+                bar.progress(50, text=f"Baixado: {len(conversas_validas)} conversas válidas...")
             
             if data.get('pages', {}).get('next'):
                 payload['pagination']['starting_after'] = data['pages']['next']['starting_after']
                 time.sleep(0.1)
             else:
                 has_more = False
-        except:
+        except Exception as e:
+            falha = str(e)
             break
             
-    bar.empty()
+    if bar:
+        bar.empty()
+    if falha is not None and cliente is not None:
+        raise RuntimeError(f"Download das conversas do analista pela metade: {falha}")
+    if falha is not None and ao_erro:
+        ao_erro(falha)
     return conversas_validas
 
+def motivo_classificado(motivo):
+    """A regra única de "classificado": Motivo preenchido (nem ausente, nem vazio)."""
+    return motivo is not None and str(motivo).strip() != ""
+
+def montar_lista(raw, mapa_attrs):
+    """DataFrame da tela (Motivo, Link, Status) a partir das conversas cruas."""
+    rows = []
+    for c in raw:
+        attrs = c.get('custom_attributes', {})
+        
+        motivo = None
+        # Tenta achar o motivo pelo nome bonito ou pela chave
+        for k, v in attrs.items():
+            label = mapa_attrs.get(k, k)
+            if label == "Motivo de Contato":
+                motivo = v
+                break
+        
+        link = WORKSPACE.link_conversa(c['id'])
+        
+        rows.append({
+            "ID": c['id'],
+            "timestamp_real": c['created_at'],
+            "Data": datetime.fromtimestamp(c['created_at']).strftime("%d/%m/%Y %H:%M"),
+            "Motivo": motivo,
+            "Link": link,
+            "Status": "✅ Classificado" if motivo_classificado(motivo) else "🚨 Pendente"
+        })
+    return pd.DataFrame(rows)
+
 # --- INTERFACE DO ANALISTA ---
 
 st.title("🎯 Painel do Analista: Minha Performance")
 st.markdown("Acompanhe sua meta de classificação (Apenas conversas **fechadas** dos times de **Suporte**).")
 
 # Carrega dados básicos (Cacheado)
-dados_admins = get_admin_list()
+dados_admins = get_admin_list(WORKSPACE_ID)
 
 if dados_admins:
     # --- FILTRAGEM DE ANALISTAS ---
@@ -182,56 +261,89 @@ if dados_admins:
             btn_atualizar = st.form_submit_button("🔄 Atualizar", type="primary", use_container_width=True)
 
     # --- LÓGICA DE BUSCA (SÓ RODA SE APERTAR O BOTÃO) ---
+    # Aqui só contamos (rápido). A lista completa só é baixada quando alguém abre Pendências ou Histórico.
     if btn_atualizar:
         if usuario_selecionado:
             admin_id_alvo = dados_admins[usuario_selecionado]['id']
             start, end = periodo
-            
-            with st.spinner("Analisando métricas..."):
-                raw = fetch_my_conversations(start, end, admin_id_alvo)
-                mapa_attrs = get_attribute_definitions()
-            
-            if raw:
-                rows = []
-                for c in raw:
-                    attrs = c.get('custom_attributes', {})
-                    
-                    motivo = None
-                    # Tenta achar o motivo pelo nome bonito ou pela chave
-                    for k, v in attrs.items():
-                        label = mapa_attrs.get(k, k)
-                        if label == "Motivo de Contato":
-                            motivo = v
-                            break
-                    
-                    link = f"https://app.intercom.com/a/inbox/{WORKSPACE_ID}/inbox/conversation/{c['id']}"
-                    
-                    rows.append({
-                        "ID": c['id'],
-                        "Data": datetime.fromtimestamp(c['created_at']).strftime("%d/%m/%Y %H:%M"),
-                        "Motivo": motivo,
-                        "Link": link,
-                        "Status": "✅ Classificado" if motivo else "🚨 Pendente"
-                    })
-                
-                # Salva no Session State para não sumir ao trocar de aba
-                st.session_state['df_analista_resultado'] = pd.DataFrame(rows)
-                st.session_state['analista_nome_atual'] = usuario_selecionado
-                st.success("Dados atualizados!")
+            chave = chave_consulta("analista", start, end, TIMES_PERMITIDOS_IDS, extra=admin_id_alvo, ids_workspaces=[WORKSPACE_ID])
+            mapa_attrs = get_attribute_definitions(WORKSPACE_ID)
+            recarregar = lambda: montar_lista(fetch_my_conversations(start, end, admin_id_alvo, cliente=WORKSPACE.cliente()), mapa_attrs)
+            # Lista já baixada antes (mesmo vencida)? Aparece na hora e os números saem dela; a nova vem em segundo plano
+            if reaproveitar_ou_revalidar('chave_analista', chave, recarregar):
+                contagem = None
             else:
-                st.session_state['df_analista_resultado'] = pd.DataFrame() # DataFrame Vazio
-                st.session_state['analista_nome_atual'] = usuario_selecionado
-                st.warning("Nenhuma conversa encontrada neste período para os times selecionados.")
+                st.session_state.pop('chave_analista', None)
+                with st.spinner("Analisando métricas..."):
+                    contagem = fetch_my_counts(WORKSPACE_ID, start, end, admin_id_alvo)
+            st.session_state['consulta_analista'] = {
+                "chave": chave,
+                "admin_id": admin_id_alvo,
+                "periodo": (start, end),
+                "contagem": contagem,
+            }
+            st.session_state['analista_nome_atual'] = usuario_selecionado
+            st.session_state.pop('lista_parcial_analista', None) # Atualizar de novo tenta a lista inteira
+
+    def avisar_lista_parcial(parcial):
+        st.warning(
+            f"⚠️ O download parou no meio ({parcial['falha']}): os números abaixo saem só das "
+            f"{len(parcial['df'])} conversas que chegaram. Clique em 🔄 Atualizar para tentar de novo."
+        )
+
+    def carregar_lista(consulta):
+        """
+        Baixa a lista completa (só quando precisa) e guarda no repositório do servidor.
+        Se o download parar no meio, a lista que chegou fica só nesta sessão: no repositório as outras
+        sessões reaproveitariam a lista cortada como se fosse a inteira.
+        """
+        start, end = consulta["periodo"]
+        falhas = []
+        with st.spinner("Baixando suas conversas..."):
+            raw = fetch_my_conversations(start, end, consulta["admin_id"], ao_erro=falhas.append)
+            mapa_attrs = get_attribute_definitions(WORKSPACE_ID)
+
+        df = montar_lista(raw, mapa_attrs)
+        if falhas:
+            st.session_state['lista_parcial_analista'] = {"chave": consulta["chave"], "df": df, "falha": falhas[0]}
+            avisar_lista_parcial(st.session_state['lista_parcial_analista'])
+            return df
+
+        # Guarda no repositório do servidor; a sessão só fica com a chave (não some ao trocar de aba)
+        repositorio_datasets().guardar(consulta["chave"], df)
+        st.session_state['chave_analista'] = consulta["chave"]
+        return dataset_da_sessao('chave_analista')
+
+    # --- EXIBIÇÃO DOS RESULTADOS ---
+    consulta = st.session_state.get('consulta_analista')
+    df = dataset_da_sessao('chave_analista')
+    parcial = st.session_state.get('lista_parcial_analista')
+    if df is None and consulta is not None and parcial is not None and parcial["chave"] == consulta["chave"]:
+        df = parcial["df"] # Lista cortada de um download anterior desta sessão (não baixa de novo a cada clique)
+        avisar_lista_parcial(parcial)
+    if consulta is not None and consulta["contagem"] is None and df is None:
+        df = carregar_lista(consulta) # A API não soube contar: vai pelo caminho antigo (lista inteira)
 
-    # --- EXIBIÇÃO DOS RESULTADOS (LÊ DA MEMÓRIA) ---
-    if 'df_analista_resultado' in st.session_state and not st.session_state['df_analista_resultado'].empty:
+    if df is not None:
+        # Lista já baixada: os números saem dela
+        total = len(df)
+        classificados = int((df["Status"] == "✅ Classificado").sum()) if total else 0
+    elif consulta is not None:
+        total, classificados = consulta["contagem"]
+    else:
+        total = 0
+
+    if consulta is not None and total == 0:
+        st.warning("Nenhuma conversa encontrada neste período para os times selecionados.")
+    elif consulta is not None:
+        if df is not None:
+            mostrar_uso_memoria('chave_analista')
+            selo_atualizacao('chave_analista')
+        else:
+            st.caption("≈ Números aproximados (contagem rápida da API). Os exatos saem da lista ao abrir **🚨 Pendências** ou **📋 Histórico**.")
         
-        df = st.session_state['df_analista_resultado']
         nome_atual = st.session_state.get('analista_nome_atual', 'Analista')
 
-        # Só exibe se o DataFrame tiver dados
-        total = len(df)
-        classificados = len(df[df["Motivo"].notna()])
         pendentes = total - classificados
         taxa = (classificados / total * 100) if total > 0 else 0
         
@@ -269,27 +381,37 @@ if dados_admins:
 
         st.divider()
 
-        tab_pendentes, tab_todos = st.tabs(["🚨 Pendências", "📋 Histórico"])
+        # Abas "preguiçosas": só a aba aberta roda, então a lista só é baixada ao abrir Pendências ou Histórico
+        tab_resumo, tab_pendentes, tab_todos = st.tabs(["📊 Resumo", "🚨 Pendências", "📋 Histórico"], key="aba_analista", on_change="rerun")
+
+        with tab_resumo:
+            st.caption("Abra **🚨 Pendências** ou **📋 Histórico** para ver as conversas.")
+
+        if (tab_pendentes.open or tab_todos.open) and df is None:
+            df = carregar_lista(consulta)
         
-        with tab_pendentes:
-            df_pendentes = df[df["Status"] == "🚨 Pendente"]
-            if not df_pendentes.empty:
-                st.error(f"Você tem **{len(df_pendentes)} conversas fechadas** sem motivo classificado.")
-                st.dataframe(
-                    df_pendentes[["Data", "ID", "Link"]],
-                    use_container_width=True,
-                    column_config={"Link": st.column_config.LinkColumn("Link", display_text="🔗 Abrir no Intercom")},
-                    hide_index=True
+        if tab_pendentes.open:
+            with tab_pendentes:
+                df_pendentes = df[df["Status"] == "🚨 Pendente"]
+                if not df_pendentes.empty:
+                    st.error(f"Você tem **{len(df_pendentes)} conversas fechadas** sem motivo classificado.")
+                    st.dataframe(
+                        df_pendentes[["Data", "ID", "Link"]],
+                        use_container_width=True,
+                        column_config={"Link": st.column_config.LinkColumn("Link", display_text="🔗 Abrir no Intercom")},
+                        hide_index=True
+                    )
+                else:
+                    st.success("Tudo limpo! Nenhuma pendência encontrada. 🚀")
+
+        if tab_todos.open:
+            with tab_todos:
+                tabela_paginada(
+                    df,
+                    "tabela_historico",
+                    colunas=["Data", "ID", "Motivo", "Status", "Link"],
+                    column_config={"Link": st.column_config.LinkColumn("Link", display_text="Abrir")},
+                    chaves_ordenacao={"Data": "timestamp_real"}
                 )
-            else:
-                st.success("Tudo limpo! Nenhuma pendência encontrada. 🚀")
-
-        with tab_todos:
-            st.dataframe(
-                df[["Data", "ID", "Motivo", "Status", "Link"]],
-                use_container_width=True,
-                column_config={"Link": st.column_config.LinkColumn("Link", display_text="Abrir")},
-                hide_index=True
-            )
 else:
     st.info("Carregando lista de analistas...")
@@ -1,13 +1,8 @@
 import streamlit as st 
-import pandas as pd
-import requests
-import time
-import plotly.express as px
 from datetime import datetime, timedelta
-from io import BytesIO
 
-# --- IMPORTAÇÃO DO UTILS ---
-from utils import check_password, logout_button
+# --- LOGIN (módulo leve) ---
+from acesso import check_password, logout_button
 
 # --- CONFIGURAÇÕES ---
 st.set_page_config(page_title="Relatório V2 - Categorias", page_icon="📈", layout="wide")
@@ -22,153 +17,161 @@ if usuario == "analista":
     st.error("⛔ Acesso Negado: Área restrita à gestão.")
     st.stop()
 
-WORKSPACE_ID = "xwvpdtlu"
+# --- IMPORTAÇÃO DO UTILS (só depois do login: a tela de senha abre sem carregar pandas, pyarrow etc.) ---
+from utils import PainelParcial, cliente_intercom, acervo_paginas, conversas_do_acervo, escolher_workspaces, workspace_por_id, iniciar_medicao, fragmento_medido, iniciar_vigilancia, painel_performance, medir, chave_consulta, dataset_da_sessao, mostrar_uso_memoria, reaproveitar_ou_revalidar, carregar_uma_vez, recarregador_relatorio, selo_atualizacao, tabela_paginada, exportacao_sob_demanda, vista_atributos, grafico_em_cache
+from nucleo import ATRIBUTOS_DA_TELA, nomes_atributos, format_sla_string, buscar_definicoes_atributos, buscar_admins, buscar_conversas_workspaces, ResumoParcial, process_data, colunas_sugeridas, FORMATOS_EXPORTACAO, LIMITE_LINHAS_EXCEL
+
+iniciar_medicao() # Cronômetro do painel ⏱ Performance (só liga se o gestor pedir)
+iniciar_vigilancia() # Thread dos alertas de meta/SLA (só sobe uma vez por servidor, e só se estiver ligada no secrets)
 
 # --- AUTENTICAÇÃO INTERCOM ---
-try:
-    INTERCOM_ACCESS_TOKEN = st.secrets["INTERCOM_TOKEN"]
-except:
-    INTERCOM_ACCESS_TOKEN = st.sidebar.text_input("Intercom Token", type="password", key="token_v2")
+# Um ou vários workspaces (cada um com seu token, pool de conexões e orçamento de chamadas)
+WORKSPACES = escolher_workspaces("v2")
+IDS_WORKSPACES = tuple(ws.id for ws in WORKSPACES)
 
-if not INTERCOM_ACCESS_TOKEN:
+if not WORKSPACES:
     st.warning("⚠️ Configure o Token.")
     st.stop()
 
-HEADERS = {"Authorization": f"Bearer {INTERCOM_ACCESS_TOKEN}", "Accept": "application/json"}
-
 # --- FUNÇÕES ---
 
-def format_sla_string(seconds):
-    if not seconds or pd.isna(seconds) or seconds == 0: return "-"
-    seconds = int(seconds)
-    days = seconds // 86400
-    rem = seconds % 86400
-    hours = rem // 3600
-    rem %= 3600
-    minutes = rem // 60
-    secs = rem % 60
-    parts = []
-    if days > 0: parts.append(f"{days}d")
-    if hours > 0: parts.append(f"{hours}h")
-    if minutes > 0: parts.append(f"{minutes}m")
-    if days == 0 and hours == 0: parts.append(f"{secs}s")
-    return " ".join(parts) if parts else "< 1s"
-
 @st.cache_data(ttl=3600)
-def get_attribute_definitions():
-    url = "https://api.intercom.io/data_attributes"
-    params = {"model": "conversation"}
-    try:
-        r = requests.get(url, headers=HEADERS, params=params)
-        return {item['name']: item['label'] for item in r.json().get('data', [])}
-    except:
-        return {}
+def get_attribute_definitions(ids_workspaces):
+    mapa = {}
+    for ws_id in ids_workspaces:
+        mapa.update(buscar_definicoes_atributos(cliente_intercom(workspace=workspace_por_id(ws_id))))
+    return mapa
 
 @st.cache_data(ttl=3600)
-def get_all_admins():
-    url = "https://api.intercom.io/admins"
-    try:
-        r = requests.get(url, headers=HEADERS)
-        return {str(a['id']): a['name'] for a in r.json().get('admins', [])}
-    except:
-        return {}
-
-@st.cache_data(ttl=300, show_spinner=False)
-def fetch_conversations(start_date, end_date, team_ids=None):
-    url = "https://api.intercom.io/conversations/search"
-    ts_start = int(datetime.combine(start_date, datetime.min.time()).timestamp())
-    ts_end = int(datetime.combine(end_date, datetime.max.time()).timestamp())
-    
-    query_rules = [
-        {"field": "created_at", "operator": ">", "value": ts_start},
-        {"field": "created_at", "operator": "<", "value": ts_end}
-    ]
-    if team_ids:
-        query_rules.append({"field": "team_assignee_id", "operator": "IN", "value": team_ids})
-
-    payload = {"query": {"operator": "AND", "value": query_rules}, "pagination": {"per_page": 150}}
-    
-    conversas = []
-    has_more = True
-    status_text = st.empty()
-    
-    while has_more:
-        try:
-            resp = requests.post(url, headers=HEADERS, json=payload)
-            data = resp.json()
-            batch = data.get('conversations', [])
-            conversas.extend(batch)
-            status_text.caption(f"📥 Baixando... {len(conversas)} conversas.")
-            
-            if data.get('pages', {}).get('next'):
-                payload['pagination']['starting_after'] = data['pages']['next']['starting_after']
-                time.sleep(0.1)
-            else:
-                has_more = False
-        except Exception as e:
-            st.error(f"Erro: {e}")
-            break
-    status_text.empty()
+def get_all_admins(ids_workspaces):
+    admins = {}
+    for ws_id in ids_workspaces:
+        admins.update(buscar_admins(cliente_intercom(workspace=workspace_por_id(ws_id))))
+    return admins
+
+def fetch_conversations(start_date, end_date, team_ids=None, ids_workspaces=()):
+    """
+    Com vários workspaces, baixa todos em paralelo e junta (cada um no seu pool e no seu orçamento).
+    Sem st.cache_data: a faixa parcial é tela e não voltaria num acerto do cache. Quem guarda o
+    resultado é o carregar_uma_vez (repositório do servidor + single-flight).
+    """
+    # Os KPIs vão aparecendo (marcados como parciais) conforme as páginas chegam
+    resumo = ResumoParcial(get_attribute_definitions(ids_workspaces), campo_ranking="Categoria do sistema")
+    parcial = PainelParcial(resumo, rotulo_top="Principal Categoria", rotulo_classificados="Com Categoria")
+    conversas = buscar_conversas_workspaces(
+        {ws_id: cliente_intercom(workspace=workspace_por_id(ws_id)) for ws_id in ids_workspaces},
+        start_date, end_date, team_ids,
+        ao_progresso=parcial.atualizar,
+        ao_erro=st.error,
+        acervo=acervo_paginas(), # Se o acervo estiver ligado, cada página também vai pro disco
+        ao_pagina=resumo.adicionar,
+    )
+    parcial.limpar()
     return conversas
 
-def process_data(conversas, mapping, admin_map):
-    rows = []
-    for c in conversas:
-        link = f"https://app.intercom.com/a/inbox/{WORKSPACE_ID}/inbox/conversation/{c['id']}"
-        admin_id = c.get('admin_assignee_id')
-        assignee_name = admin_map.get(str(admin_id), f"ID {admin_id}") if admin_id else "Não atribuído"
-
-        # SLA
-        stats = c.get('statistics') or {}
-        time_reply_sec = stats.get('time_to_admin_reply') or stats.get('response_time')
-        time_close_sec = stats.get('time_to_close')
-        if not time_close_sec:
-            if stats.get('last_close_at') and c.get('created_at'):
-                time_close_sec = stats.get('last_close_at') - c.get('created_at')
-
-        row = {
-            "ID": c['id'],
-            "timestamp_real": c['created_at'], 
-            "Data": datetime.fromtimestamp(c['created_at']).strftime("%d/%m/%Y %H:%M"),
-            "Atendente": assignee_name,
-            "Link": link,
-            "Tempo Resolução (seg)": time_close_sec,
-            "Tempo Resolução": format_sla_string(time_close_sec),
-            "CSAT Nota": (c.get('conversation_rating') or {}).get('rating')
-        }
-        
-        attrs = c.get('custom_attributes', {})
-        for key, value in attrs.items():
-            nome_bonito = mapping.get(key)
-            if nome_bonito: row[nome_bonito] = value
-            else: row[key] = value
-        rows.append(row)
-    
-    df = pd.DataFrame(rows)
-    if not df.empty:
-        df = df.sort_values(by="timestamp_real", ascending=True)
-    return df
-
-def gerar_excel_v2(df, colunas_selecionadas):
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        # Aba Base Completa
-        cols_fixas = ["Data", "Atendente", "Tempo Resolução", "Link"]
-        cols_finais = cols_fixas + colunas_selecionadas
-        cols_existentes = [c for c in cols_finais if c in df.columns]
-        df[cols_existentes].to_excel(writer, index=False, sheet_name='Base V2')
-        writer.sheets['Base V2'].set_column('A:A', 18)
-        
-        # Abas Individuais
-        for col in colunas_selecionadas:
-            if col in df.columns:
-                try:
-                    resumo = df[col].value_counts().reset_index()
-                    resumo.columns = [col, 'Qtd']
-                    nome_aba = col[:30].replace("/", "-")
-                    resumo.to_excel(writer, index=False, sheet_name=nome_aba)
-                except: pass
-    return output.getvalue()
+# --- SEÇÕES (FRAGMENTOS) ---
+# Cada aba roda isolada: um widget dentro dela só recalcula a própria aba.
+
+@fragmento_medido("v2")
+def secao_distribuicao(df, cols_usuario):
+    """Distribuição do atributo escolhido + ranking."""
+    import plotly.express as px # Só carrega quando uma aba com gráfico abre (deixa o login mais rápido)
+    c1, c2 = st.columns([2, 1])
+    with c1:
+        if cols_usuario:
+            graf_sel = st.selectbox("Visualizar por:", cols_usuario)
+
+            def montar_distribuicao():
+                df_clean = df[df[graf_sel].notna()]
+                contagem = df_clean[graf_sel].value_counts().reset_index()
+                contagem.columns = ["Opção", "Qtd"]
+                total = contagem["Qtd"].sum()
+                contagem["Label"] = contagem["Qtd"].apply(lambda x: f"{x} ({(x/total*100):.1f}%)")
+
+                fig = px.bar(contagem, x="Qtd", y="Opção", text="Label", orientation='h', title=f"Distribuição: {graf_sel}")
+                fig.update_layout(yaxis={'categoryorder':'total ascending'})
+                return fig
+            st.plotly_chart(grafico_em_cache(df, "v2_distribuicao", (graf_sel,), montar_distribuicao), use_container_width=True, key="fig_v2_distribuicao")
+    with c2:
+        st.write("Ranking:")
+        if cols_usuario:
+            st.dataframe(df[graf_sel].value_counts(), use_container_width=True)
+
+@fragmento_medido("v2")
+def secao_categoria_cadastros(df, cols_usuario):
+    """Cadastros dentro de cada Categoria."""
+    import plotly.express as px
+    st.subheader("Relacionamento: Categoria vs Cadastros")
+    col_cat = "Categoria do sistema"
+    col_cad = "Cadastros"
+
+    if col_cat in df.columns and col_cad in df.columns:
+        def montar_cruzamento():
+            df_cross = df.dropna(subset=[col_cat, col_cad])
+            grouped = df_cross.groupby([col_cat, col_cad]).size().reset_index(name='Qtd')
+            grouped['Total'] = grouped.groupby(col_cat)['Qtd'].transform('sum')
+            grouped['Pct'] = grouped.apply(lambda x: f"{(x['Qtd']/x['Total']*100):.0f}%", axis=1)
+
+            fig_cross = px.bar(grouped, y=col_cat, x="Qtd", color=col_cad, text="Pct", orientation='h', title="Cadastros dentro de cada Categoria")
+            fig_cross.update_layout(yaxis={'categoryorder':'total ascending'})
+            return fig_cross
+        st.plotly_chart(grafico_em_cache(df, "v2_cruzamento", (), montar_cruzamento), use_container_width=True, key="fig_v2_cruzamento")
+    else:
+        st.info(f"Os atributos '{col_cat}' e '{col_cad}' precisam existir nos dados para este gráfico.")
+
+@fragmento_medido("v2")
+def secao_equipe(df, cols_usuario):
+    """Volume e tempo de resolução por Equipe."""
+    import plotly.express as px
+    st.subheader("Análise do atributo 'Equipe'")
+    if "Equipe" in df.columns:
+        def montar_pizza_equipe():
+            vol_eq = df["Equipe"].dropna().value_counts().reset_index()
+            vol_eq.columns = ["Equipe", "Volume"]
+            return px.pie(vol_eq, names="Equipe", values="Volume", title="Distribuição por Equipe")
+        st.plotly_chart(grafico_em_cache(df, "v2_pizza_equipe", (), montar_pizza_equipe), use_container_width=True, key="fig_v2_pizza_equipe")
+
+        st.subheader("Tempo de Resolução por Equipe")
+        if "Tempo Resolução (seg)" in df.columns:
+            def montar_tempo_equipe():
+                df_eq = df.dropna(subset=["Equipe"])
+                tempo_eq = df_eq.groupby("Equipe")["Tempo Resolução (seg)"].mean().reset_index().sort_values("Tempo Resolução (seg)")
+                tempo_eq["Label"] = tempo_eq["Tempo Resolução (seg)"].apply(format_sla_string)
+                return px.bar(tempo_eq, x="Tempo Resolução (seg)", y="Equipe", text="Label", orientation='h')
+            st.plotly_chart(grafico_em_cache(df, "v2_tempo_equipe", (), montar_tempo_equipe), use_container_width=True, key="fig_v2_tempo_equipe")
+    else:
+        st.warning("Atributo 'Equipe' não encontrado.")
+
+@fragmento_medido("v2")
+def secao_tabela(df, cols_usuario):
+    """Exportação e tabela paginada."""
+    c1, c2 = st.columns([3,1])
+    with c1:
+        formato = st.selectbox("Formato do arquivo:", list(FORMATOS_EXPORTACAO), key="sel_formato_v2")
+    with c2:
+        extensao, mime = FORMATOS_EXPORTACAO[formato]
+        if extensao == "xlsx" and len(df) > LIMITE_LINHAS_EXCEL:
+            st.warning("Muitas linhas para o Excel. Use Parquet ou CSV.")
+        else:
+            exportacao_sob_demanda(df, "export_v2", extensao, mime, cols_usuario, "v2", "relatorio_v2", type="primary")
+
+    # Filtros Rápidos na Tabela
+    col_filtro = st.selectbox("Filtrar tabela por:", ["(Todos)"] + cols_usuario)
+    df_view = df # O filtro abaixo já devolve um DataFrame novo; a tabela não mexe no original
+
+    if col_filtro != "(Todos)":
+        vals = df_view[col_filtro].unique()
+        sel_vals = st.multiselect(f"Valores em {col_filtro}:", vals)
+        if sel_vals:
+            df_view = df_view[df_view[col_filtro].isin(sel_vals)]
+
+    tabela_paginada(
+        df_view,
+        "tabela_v2",
+        colunas=["Data", "Atendente", "Tempo Resolução"] + cols_usuario,
+        column_config={"Link": st.column_config.LinkColumn("Link")},
+        chaves_ordenacao={"Data": "timestamp_real", "Tempo Resolução": "Tempo Resolução (seg)"}
+    )
 
 # --- INTERFACE ---
 
@@ -182,7 +185,8 @@ with st.sidebar:
 
     data_hoje = datetime.now()
     periodo = st.date_input("Período", (data_hoje - timedelta(days=7), data_hoje), format="DD/MM/YYYY")
-    team_input = st.text_input("IDs dos Times:", value="2975006")
+    team_input = st.text_input("IDs dos Times:", value=",".join(str(t) for ws in WORKSPACES for t in ws.times))
+    do_acervo = acervo_paginas() is not None and st.toggle("🗄️ Reprocessar do acervo (sem API)", help="Refaz o relatório com as páginas já baixadas, sem gastar chamadas do Intercom.")
     btn_run = st.button("🚀 Gerar Relatório V2", type="primary")
     logout_button()
 
@@ -190,42 +194,53 @@ if btn_run:
     start, end = periodo
     ids_times = [int(x.strip()) for x in team_input.split(",") if x.strip().isdigit()] if team_input else None
     
-    with st.spinner("Buscando dados V2..."):
-        mapa = get_attribute_definitions()
-        admins_map = get_all_admins()
-        raw = fetch_conversations(start, end, ids_times)
+    chave = chave_consulta("v2", start, end, ids_times, extra="acervo" if do_acervo else None, ids_workspaces=IDS_WORKSPACES)
+    # Já tem cópia da consulta (de outra sessão ou de antes)? Mostra na hora e, se venceu, atualiza em segundo plano.
+    # Do acervo sempre refaz (a graça é rodar o process_data atual de novo)
+    if do_acervo or not reaproveitar_ou_revalidar('chave_df_v2', chave, recarregador_relatorio("v2", start, end, ids_times, IDS_WORKSPACES)):
+        def carregar():
+            if do_acervo:
+                raw, mapa, admins_map = conversas_do_acervo(IDS_WORKSPACES, start, end, ids_times)
+            else:
+                mapa = get_attribute_definitions(IDS_WORKSPACES)
+                admins_map = get_all_admins(IDS_WORKSPACES)
+                with medir("fetch_conversations"):
+                    raw = fetch_conversations(start, end, ids_times, IDS_WORKSPACES)
+            if not raw:
+                return None
+            with medir("process_data", conversas=len(raw)):
+                return process_data(raw, mapa, admins_map, modelo="v2", workspace_id=IDS_WORKSPACES[0], atributos_longos=True)
         
-        if raw:
-            df = process_data(raw, mapa, admins_map)
-            st.session_state['df_v2'] = df
+        # Mesma consulta já baixando em outra sessão? Espera a dela
+        df = carregar_uma_vez(chave, carregar, texto_spinner="Buscando dados V2...")
+        if df is not None:
+            st.session_state['chave_df_v2'] = chave
             st.toast(f"✅ {len(df)} conversas.")
         else:
             st.warning("Sem dados.")
 
-if 'df_v2' in st.session_state:
-    df = st.session_state['df_v2']
+df = dataset_da_sessao('chave_df_v2')
+if df is not None:
+    mostrar_uso_memoria('chave_df_v2')
+elif 'chave_df_v2' in st.session_state:
+    st.warning("Os dados saíram da memória do servidor. Clique em 🚀 Gerar Relatório V2 novamente.")
+
+if df is not None:
     st.divider()
+    selo_atualizacao('chave_df_v2')
     
     # --- CONFIGURAÇÃO DOS NOVOS ATRIBUTOS ---
-    todas_colunas = list(df.columns)
-    
-    # Lista de prioridade V2
-    sugestao_v2 = [
-        "Tipo de Atendimento", 
-        "Categoria do sistema", 
-        "Cadastros", 
-        "Equipe", 
-        "Status do atendimento"
-    ]
+    todas_colunas = nomes_atributos(df) # Colunas + atributos ainda no formato longo
     
-    # Filtra apenas os que existem no DataFrame atual
-    padrao_existente = [c for c in sugestao_v2 if c in todas_colunas]
+    # Lista de prioridade V2 (só os que existem no DataFrame atual)
+    padrao_existente = colunas_sugeridas(df, "v2")
     
     cols_usuario = st.multiselect(
         "Atributos para Análise V2:",
         options=[c for c in todas_colunas if c not in ["ID", "Link", "Data", "Atendente", "Tempo Resolução"]],
         default=padrao_existente
     )
+    df = vista_atributos(df, ATRIBUTOS_DA_TELA["v2"] + cols_usuario) # Só o que vai ser usado vira coluna
 
     # --- KPIs V2 ---
     st.markdown("### 📌 Resumo V2")
@@ -265,78 +280,15 @@ if 'df_v2' in st.session_state:
     st.divider()
 
     # --- ABAS ADAPTADAS PARA V2 ---
-    tab_graf, tab_cross, tab_detalhe, tab_dados = st.tabs(["📊 Distribuição", "🔀 Categoria x Cadastros", "👥 Por Equipe", "📋 Tabela V2"])
-
-    with tab_graf:
-        c1, c2 = st.columns([2, 1])
-        with c1:
-            if cols_usuario:
-                graf_sel = st.selectbox("Visualizar por:", cols_usuario)
-                df_clean = df[df[graf_sel].notna()]
-                contagem = df_clean[graf_sel].value_counts().reset_index()
-                contagem.columns = ["Opção", "Qtd"]
-                total = contagem["Qtd"].sum()
-                contagem["Label"] = contagem["Qtd"].apply(lambda x: f"{x} ({(x/total*100):.1f}%)")
-                
-                fig = px.bar(contagem, x="Qtd", y="Opção", text="Label", orientation='h', title=f"Distribuição: {graf_sel}")
-                fig.update_layout(yaxis={'categoryorder':'total ascending'})
-                st.plotly_chart(fig, use_container_width=True)
-        with c2:
-            st.write("Ranking:")
-            if cols_usuario:
-                st.dataframe(df[graf_sel].value_counts(), use_container_width=True)
-
-    with tab_cross:
-        st.subheader("Relacionamento: Categoria vs Cadastros")
-        col_cat = "Categoria do sistema"
-        col_cad = "Cadastros"
-        
-        if col_cat in df.columns and col_cad in df.columns:
-            df_cross = df.dropna(subset=[col_cat, col_cad])
-            grouped = df_cross.groupby([col_cat, col_cad]).size().reset_index(name='Qtd')
-            grouped['Total'] = grouped.groupby(col_cat)['Qtd'].transform('sum')
-            grouped['Pct'] = grouped.apply(lambda x: f"{(x['Qtd']/x['Total']*100):.0f}%", axis=1)
-            
-            fig_cross = px.bar(grouped, y=col_cat, x="Qtd", color=col_cad, text="Pct", orientation='h', title="Cadastros dentro de cada Categoria")
-            fig_cross.update_layout(yaxis={'categoryorder':'total ascending'})
-            st.plotly_chart(fig_cross, use_container_width=True)
-        else:
-            st.info(f"Os atributos '{col_cat}' e '{col_cad}' precisam existir nos dados para este gráfico.")
-
-    with tab_detalhe:
-        st.subheader("Análise do atributo 'Equipe'")
-        if "Equipe" in df.columns:
-            df_eq = df.dropna(subset=["Equipe"])
-            vol_eq = df_eq["Equipe"].value_counts().reset_index()
-            vol_eq.columns = ["Equipe", "Volume"]
-            st.plotly_chart(px.pie(vol_eq, names="Equipe", values="Volume", title="Distribuição por Equipe"), use_container_width=True)
-            
-            st.subheader("Tempo de Resolução por Equipe")
-            if "Tempo Resolução (seg)" in df.columns:
-                tempo_eq = df_eq.groupby("Equipe")["Tempo Resolução (seg)"].mean().reset_index().sort_values("Tempo Resolução (seg)")
-                tempo_eq["Label"] = tempo_eq["Tempo Resolução (seg)"].apply(format_sla_string)
-                st.plotly_chart(px.bar(tempo_eq, x="Tempo Resolução (seg)", y="Equipe", text="Label", orientation='h'), use_container_width=True)
-        else:
-            st.warning("Atributo 'Equipe' não encontrado.")
-
-    with tab_dados:
-        c1, c2 = st.columns([3,1])
-        with c2:
-            excel = gerar_excel_v2(df, cols_usuario)
-            st.download_button("📥 Baixar Relatório V2", data=excel, file_name="relatorio_v2.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", type="primary")
-        
-        # Filtros Rápidos na Tabela
-        col_filtro = st.selectbox("Filtrar tabela por:", ["(Todos)"] + cols_usuario)
-        df_view = df.copy()
-        
-        if col_filtro != "(Todos)":
-            vals = df_view[col_filtro].unique()
-            sel_vals = st.multiselect(f"Valores em {col_filtro}:", vals)
-            if sel_vals:
-                df_view = df_view[df_view[col_filtro].isin(sel_vals)]
-        
-        st.dataframe(
-            df_view[["Data", "Atendente", "Tempo Resolução"] + cols_usuario],
-            use_container_width=True,
-            column_config={"Link": st.column_config.LinkColumn("Link")}
-        )
+    # Navegação por rádio (igual ao Relatório Gerencial): só a aba aberta é calculada.
+    secoes = {
+        "📊 Distribuição": secao_distribuicao,
+        "🔀 Categoria x Cadastros": secao_categoria_cadastros,
+        "👥 Por Equipe": secao_equipe,
+        "📋 Tabela V2": secao_tabela,
+    }
+    aba_selecionada = st.radio("Navegação V2", list(secoes), horizontal=True, label_visibility="collapsed")
+    with medir("aba", nome=aba_selecionada):
+        secoes[aba_selecionada](df, cols_usuario)
+
+painel_performance("v2")
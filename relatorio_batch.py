@@ -0,0 +1,147 @@
+"""
+Gera o Relatório Gerencial e o Relatório V2 sem abrir o Streamlit (para rodar no cron).
+Baixa as conversas uma vez só e grava os arquivos (xlsx, parquet, csv.gz, zip) numa pasta.
+
+Exemplos:
+  python relatorio_batch.py --semana-passada --saida relatorios/
+  python relatorio_batch.py --inicio 2024-05-01 --fim 2024-05-31 --modelo gerencial --formatos xlsx
+
+O token vem de --token, da variável de ambiente INTERCOM_TOKEN ou do .streamlit/secrets.toml.
+Com vários workspaces no secrets ([workspaces.<id>]), --workspaces escolhe quais (padrão: todos, baixados em paralelo).
+Com PASTA_ACERVO no secrets, as páginas baixadas ficam guardadas e --reprocessar refaz os relatórios só com elas (sem token e sem API).
+"""
+import argparse
+import os
+import sys
+import tomllib
+from datetime import date, datetime, timedelta
+
+from acervo import AcervoPaginas
+from desempenho import iniciar_coleta, registros_atuais, gravar_log
+from nucleo import (
+    FORMATOS_EXPORTACAO, LIMITE_LINHAS_EXCEL, WORKSPACE_ID, Workspace, workspaces_da_config,
+    buscar_definicoes_atributos, buscar_admins, buscar_conversas_workspaces, process_data, colunas_sugeridas, gerar_arquivo,
+    intervalo_ts,
+)
+
+MODELOS = ["gerencial", "v2"]
+EXTENSOES = [ext for ext, _ in FORMATOS_EXPORTACAO.values()]
+
+def ler_secrets(caminho=".streamlit/secrets.toml"):
+    """Lê o mesmo secrets.toml do Streamlit (se existir)."""
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, "rb") as f:
+        return tomllib.load(f)
+
+def semana_passada(hoje=None):
+    """Segunda a domingo da semana anterior."""
+    hoje = hoje or date.today()
+    segunda = hoje - timedelta(days=hoje.weekday() + 7)
+    return segunda, segunda + timedelta(days=6)
+
+def _data(texto):
+    return datetime.strptime(texto, "%Y-%m-%d").date()
+
+def _lista(texto):
+    return [x.strip() for x in texto.split(",") if x.strip()]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Relatórios do Intercom sem interface (para agendar no cron)")
+    parser.add_argument("--modelo", choices=MODELOS + ["ambos"], default="ambos")
+    parser.add_argument("--inicio", type=_data, help="AAAA-MM-DD (padrão: 7 dias atrás)")
+    parser.add_argument("--fim", type=_data, help="AAAA-MM-DD (padrão: hoje)")
+    parser.add_argument("--semana-passada", action="store_true", help="Segunda a domingo da semana anterior")
+    parser.add_argument("--times", help="IDs dos times separados por vírgula (padrão: os do workspace; vazio = todos)")
+    parser.add_argument("--workspaces", help="IDs dos workspaces separados por vírgula (padrão: todos do secrets)")
+    parser.add_argument("--formatos", default="xlsx,parquet", help=f"Separados por vírgula: {', '.join(EXTENSOES)}")
+    parser.add_argument("--colunas", help="Atributos das abas de resumo (padrão: os sugeridos de cada relatório)")
+    parser.add_argument("--saida", default="relatorios", help="Pasta dos arquivos gerados")
+    parser.add_argument("--token", help="Token do Intercom (padrão: INTERCOM_TOKEN ou secrets.toml)")
+    parser.add_argument("--secrets", default=".streamlit/secrets.toml")
+    parser.add_argument("--reprocessar", action="store_true", help="Usa só o acervo local (PASTA_ACERVO), sem chamar a API")
+    args = parser.parse_args(argv)
+
+    secrets = ler_secrets(args.secrets)
+    if os.environ.get("INTERCOM_API_URL"):
+        secrets["INTERCOM_API_URL"] = os.environ["INTERCOM_API_URL"]
+    acervo = AcervoPaginas(secrets["PASTA_ACERVO"], compressao=secrets.get("COMPRESSAO_ACERVO")) if secrets.get("PASTA_ACERVO") else None
+    if args.reprocessar and acervo is None:
+        parser.error("--reprocessar precisa do PASTA_ACERVO no secrets.toml.")
+    workspaces = workspaces_da_config(secrets, token=args.token or os.environ.get("INTERCOM_TOKEN"))
+    if not workspaces and args.reprocessar:
+        workspaces = {WORKSPACE_ID: Workspace(WORKSPACE_ID, None)} # Reprocessar não chama a API, então não precisa de token
+    if not workspaces:
+        parser.error("Token do Intercom não configurado (--token, INTERCOM_TOKEN ou secrets.toml).")
+    if args.workspaces:
+        desconhecidos = [w for w in _lista(args.workspaces) if w not in workspaces]
+        if desconhecidos:
+            parser.error(f"Workspace desconhecido: {', '.join(desconhecidos)}")
+        workspaces = {w: workspaces[w] for w in _lista(args.workspaces)}
+
+    formatos = _lista(args.formatos)
+    invalidos = [f for f in formatos if f not in EXTENSOES]
+    if invalidos:
+        parser.error(f"Formato desconhecido: {', '.join(invalidos)}")
+
+    if args.semana_passada:
+        inicio, fim = semana_passada()
+    else:
+        fim = args.fim or date.today()
+        inicio = args.inicio or fim - timedelta(days=7)
+    if args.times is None:
+        ids_times = [t for ws in workspaces.values() for t in ws.times] or None
+    else:
+        ids_times = [int(x) for x in _lista(args.times) if x.isdigit()] or None
+    modelos = MODELOS if args.modelo == "ambos" else [args.modelo]
+
+    iniciar_coleta()
+    print(f"Período {inicio:%d/%m/%Y} a {fim:%d/%m/%Y} | times: {ids_times or 'todos'} | workspaces: {', '.join(workspaces)}", file=sys.stderr)
+    if args.reprocessar:
+        ts_inicio, ts_fim = intervalo_ts(inicio, fim)
+        raw, mapa, admins_map, faltando = acervo.reprocessar(list(workspaces), ts_inicio, ts_fim, ids_times)
+        if faltando:
+            print(f"⚠️ O acervo não tem uma busca completa desse período/times para: {', '.join(faltando)}.", file=sys.stderr)
+    else:
+        clientes = {
+            ws_id: ws.cliente(ao_esperar=lambda segundos, ws_id=ws_id: print(f"⏳ [{ws_id}] Rate limit: aguardando {segundos}s...", file=sys.stderr))
+            for ws_id, ws in workspaces.items()
+        }
+        falhou = []
+        mapa, admins_map = {}, {}
+        for cliente in clientes.values():
+            mapa.update(buscar_definicoes_atributos(cliente))
+            admins_map.update(buscar_admins(cliente))
+        raw = buscar_conversas_workspaces(
+            clientes, inicio, fim, ids_times,
+            ao_progresso=lambda qtd: print(f"\r📥 Baixando... {qtd} conversas.", end="", file=sys.stderr),
+            ao_erro=lambda msg: falhou.append(msg),
+            acervo=acervo,
+        )
+        print(file=sys.stderr)
+        if falhou:
+            print(f"❌ {falhou[0]} Nada foi gravado.", file=sys.stderr)
+            return 1
+    if not raw:
+        print("Nenhum dado encontrado.", file=sys.stderr)
+        return 1
+
+    os.makedirs(args.saida, exist_ok=True)
+    for modelo in modelos:
+        df = process_data(raw, mapa, admins_map, modelo=modelo, workspace_id=next(iter(workspaces)))
+        colunas = _lista(args.colunas) if args.colunas else colunas_sugeridas(df, modelo)
+        for extensao in formatos:
+            if extensao == "xlsx" and len(df) > LIMITE_LINHAS_EXCEL:
+                print(f"⚠️ {modelo}: muitas linhas para o Excel, pulando o xlsx.", file=sys.stderr)
+                continue
+            caminho = os.path.join(args.saida, f"{modelo}_{inicio:%Y-%m-%d}_{fim:%Y-%m-%d}.{extensao}")
+            with open(caminho, "wb") as f:
+                f.write(gerar_arquivo(df, extensao, colunas, modelo=modelo))
+            print(f"✅ {caminho} ({len(df)} conversas)", file=sys.stderr)
+
+    if secrets.get("ARQUIVO_LOG_DESEMPENHO"):
+        gravar_log(registros_atuais(), secrets["ARQUIVO_LOG_DESEMPENHO"], pagina="batch")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
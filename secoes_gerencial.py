@@ -0,0 +1,488 @@
+"""
+Seções do Relatório Gerencial. Ficam fora da página para que a tela de login não pague por elas:
+o Streamlit passa o script inteiro da página pelo "magic" (AST) a cada carga, e a página só importa
+este módulo depois do login.
+"""
+import pandas as pd
+import streamlit as st
+
+from utils import fragmento_medido, tabela_paginada, exportacao_sob_demanda, grafico_em_cache, arvore_motivos, navegar_arvore, modo_render, salvar_lote_conversas_mongo, df_para_conversas
+from nucleo import format_sla_string, FORMATOS_EXPORTACAO, LIMITE_LINHAS_EXCEL
+
+# Seções do relatório
+# Cada seção é um fragmento: mexer num slider ou selectbox da seção só roda a própria seção de novo.
+
+COLUNAS_MOTIVO = ("Motivo de Contato", "Motivo 2 (Se houver)") # Caminhos "A > B > C": dá para descer nível por nível
+
+@fragmento_medido("gerencial")
+def secao_distribuicao(df, cols_usuario):
+    """Distribuição de um atributo (Top N)."""
+    import plotly.express as px # Só carrega quando uma aba com gráfico abre (deixa o login mais rápido)
+    c_filt1, c_filt2 = st.columns([3, 1])
+    with c_filt1:
+        graf_sel = st.selectbox("Selecione o Atributo:", cols_usuario, key="sel_graf_dist")
+    with c_filt2:
+        qtd_dist = st.slider("Qtd. Itens:", 5, 50, 10, key="slider_dist_qtd")
+
+    if cols_usuario:
+        por_nivel = graf_sel in COLUNAS_MOTIVO and st.toggle("🌳 Navegar por nível", key="drill_dist")
+        caminho = navegar_arvore(arvore_motivos(df, (graf_sel,)), "drill_dist_nivel") if por_nivel else None
+        c1, c2 = st.columns([2, 1])
+
+        def montar_distribuicao():
+            if por_nivel:
+                # Lê da árvore já somada (nada de agrupar texto de novo)
+                contagem = arvore_motivos(df, (graf_sel,)).nivel(caminho)[["Motivo", "Qtd"]]
+            else:
+                df_clean = df[df[graf_sel].notna()]
+                contagem = df_clean[graf_sel].value_counts().reset_index()
+            contagem.columns = ["Opção", "Qtd"]
+            contagem = contagem.head(qtd_dist) 
+
+            total_registros = contagem["Qtd"].sum()
+            contagem["Label"] = contagem.apply(lambda x: f"{x['Qtd']} ({(x['Qtd']/total_registros*100):.1f}%)", axis=1)
+            contagem = contagem.sort_values("Qtd", ascending=False).reset_index(drop=True)
+
+            altura_graf = max(600, len(contagem) * 50) 
+            titulo = f" {graf_sel} > {' > '.join(caminho)}" if caminho else f" {graf_sel}"
+            fig = px.bar(contagem, x="Qtd", y="Opção", text="Label", orientation='h', title=f"Distribuição:{titulo} (Top {qtd_dist})", height=altura_graf)
+            fig.update_layout(yaxis={'categoryorder':'total ascending'})
+            return fig, contagem
+
+        fig, contagem = grafico_em_cache(df, "distribuicao", (graf_sel, qtd_dist, caminho), montar_distribuicao)
+
+        with c1:
+            st.plotly_chart(fig, use_container_width=True, key="fig_distribuicao")
+
+        with c2:
+            st.write(f"**Ranking (Top {qtd_dist}):**")
+            st.dataframe(contagem[["Opção", "Qtd"]], use_container_width=True, hide_index=True)
+    else:
+        st.warning("Selecione atributos no topo da página.")
+
+@fragmento_medido("gerencial")
+def secao_equipe(df, cols_usuario):
+    """Taxa de classificação, volume e matriz de eficiência por analista."""
+    import plotly.express as px
+    # --- NOVA SEÇÃO: TAXA DE CLASSIFICAÇÃO ---
+    st.subheader("🎯 Taxa de Classificação (Conversas Fechadas)")
+
+    # Filtra apenas os chamados com o Estado nativo "Fechada" (closed)
+    if "Estado" in df.columns:
+        df_calc = df[df["Estado"] == "Fechada"].copy()
+    else:
+        df_calc = df.copy()
+
+    if "Motivo de Contato" in df_calc.columns and not df_calc.empty:
+        total_geral = len(df_calc)
+        classificados_geral = df_calc["Motivo de Contato"].notna().sum()
+        taxa_geral = (classificados_geral / total_geral * 100) if total_geral > 0 else 0
+
+        # Métrica geral e Barra de progresso
+        st.metric(
+            "Taxa Geral da Equipe", 
+            f"{taxa_geral:.1f}%", 
+            f"{classificados_geral} de {total_geral} conversas fechadas classificadas", 
+            delta_color="off"
+        )
+        st.progress(min(taxa_geral / 100, 1.0))
+
+        # Tabela individual por Analista
+        resumo_analistas = df_calc.groupby("Atendente").agg(
+            Total=('ID', 'count'),
+            Classificados=('Motivo de Contato', lambda x: x.notna().sum())
+        ).reset_index()
+
+        resumo_analistas['Pendentes'] = resumo_analistas['Total'] - resumo_analistas['Classificados']
+        resumo_analistas['Taxa (%)'] = (resumo_analistas['Classificados'] / resumo_analistas['Total'] * 100).round(1)
+
+        # Ordenar pelos que têm a maior taxa no topo
+        resumo_analistas = resumo_analistas.sort_values(by="Taxa (%)", ascending=False)
+
+        # Adicionar o símbolo de % para apresentar na tabela
+        resumo_analistas_view = resumo_analistas.copy()
+        resumo_analistas_view['Taxa (%)'] = resumo_analistas_view['Taxa (%)'].apply(lambda x: f"{x}%")
+
+        st.write("**Desempenho Individual (Apenas Fechadas):**")
+        st.dataframe(resumo_analistas_view, use_container_width=True, hide_index=True)
+    else:
+        st.warning("Sem dados de conversas fechadas para calcular a taxa ou o atributo 'Motivo de Contato' não existe.")
+
+    st.divider()
+
+    st.subheader("Volume de Conversas")
+    def montar_volume():
+        vol = df['Atendente'].value_counts().reset_index()
+        vol.columns = ['Agente', 'Volume']
+        return px.bar(vol, x='Agente', y='Volume', text='Volume', height=500)
+    st.plotly_chart(grafico_em_cache(df, "volume_agente", (), montar_volume), use_container_width=True, key="fig_volume_agente")
+
+    st.divider()
+
+    st.subheader("🚀 Matriz de Eficiência: Volume x Tempo")
+    st.info("💡 **Como ler:** O canto inferior direito mostra quem atendeu mais chamados em menos tempo. O canto superior esquerdo mostra quem atendeu um volume menor, mas levou mais tempo. Isso é muito comum para quem assume os casos mais complexos.")
+
+    if "Tempo Resolução (seg)" in df.columns:
+        def montar_eficiencia():
+            df_perf = df.groupby("Atendente").agg(Volume=('ID', 'count'), Tempo_Medio_Seg=('Tempo Resolução (seg)', 'mean')).reset_index()
+            df_perf = df_perf[df_perf['Tempo_Medio_Seg'] > 0]
+            df_perf['Tempo Médio'] = df_perf['Tempo_Medio_Seg'].apply(format_sla_string)
+
+            fig_scatter = px.scatter(df_perf, x="Volume", y="Tempo_Medio_Seg", text="Atendente", size="Volume", color="Tempo_Medio_Seg", color_continuous_scale="RdYlGn_r", hover_data=["Tempo Médio"], title="Relação: Quem atende mais vs Quem demora mais", height=700, render_mode=modo_render(len(df_perf)))
+            media_vol = df_perf["Volume"].mean()
+            media_tempo = df_perf["Tempo_Medio_Seg"].mean()
+            fig_scatter.add_vline(x=media_vol, line_dash="dash", line_color="gray", annotation_text="Média Vol.")
+            fig_scatter.add_hline(y=media_tempo, line_dash="dash", line_color="gray", annotation_text="Média Tempo")
+            return fig_scatter
+        st.plotly_chart(grafico_em_cache(df, "eficiencia", (), montar_eficiencia), use_container_width=True, key="fig_eficiencia")
+    else:
+        st.warning("Dados de tempo não disponíveis.")
+
+@fragmento_medido("gerencial")
+def secao_cruzamentos(df, cols_usuario):
+    """Gráficos empilhados cruzando dois atributos."""
+    import plotly.express as px
+    qtd_cross = st.slider("Quantidade de itens no Ranking:", 5, 50, 10, key="slider_cross")
+
+    def plot_stack(df_in, x_col, color_col, title, limit=10):
+        top_n = df_in[x_col].value_counts().head(limit).index.tolist()
+        df_filtered = df_in[df_in[x_col].isin(top_n)]
+        g = df_filtered.groupby([x_col, color_col]).size().reset_index(name='Qtd')
+        g['Total'] = g.groupby(x_col)['Qtd'].transform('sum')
+        g['Pct'] = g.apply(lambda x: f"{(x['Qtd']/x['Total']*100):.0f}%", axis=1)
+        h_dyn = max(600, len(top_n) * 50) 
+        f = px.bar(g, y=x_col, x='Qtd', color=color_col, text='Pct', orientation='h', title=title, height=h_dyn)
+        f.update_layout(yaxis={'categoryorder':'total ascending'})
+        return f
+
+    def mostrar_cruzamento(id_grafico, x_col, color_col, title):
+        fig = grafico_em_cache(df, id_grafico, (qtd_cross,), lambda: plot_stack(df.dropna(subset=[x_col, color_col]), x_col, color_col, title, qtd_cross))
+        st.plotly_chart(fig, use_container_width=True, key=f"fig_{id_grafico}")
+
+    if "Motivo de Contato" in df.columns and "Status do atendimento" in df.columns:
+        mostrar_cruzamento("cruz_status_motivo", "Motivo de Contato", "Status do atendimento", "1. Status por Motivo")
+
+    st.divider()
+
+    if "Motivo de Contato" in df.columns and "Tipo de Atendimento" in df.columns:
+        mostrar_cruzamento("cruz_tipo_motivo", "Motivo de Contato", "Tipo de Atendimento", "2. Tipo por Motivo")
+
+    st.divider()
+
+    if "Tipo de Atendimento" in df.columns and "Status do atendimento" in df.columns:
+        mostrar_cruzamento("cruz_status_tipo", "Tipo de Atendimento", "Status do atendimento", "3. Status por Tipo de atendimento")
+
+@fragmento_medido("gerencial")
+def secao_top_motivos(df, cols_usuario):
+    """Ranking juntando Motivo 1 e Motivo 2."""
+    import plotly.express as px
+    col_m1, col_m2 = "Motivo de Contato", "Motivo 2 (Se houver)"
+    if col_m1 in df.columns and col_m2 in df.columns:
+        qtd_top = st.slider("Quantidade de Motivos no Ranking:", 5, 50, 10)
+        # Top N dos caminhos inteiros fica grosso com centenas de folhas: por nível, soma tudo que está embaixo
+        por_nivel = st.toggle("🌳 Navegar por nível", key="drill_top")
+        caminho = navegar_arvore(arvore_motivos(df, COLUNAS_MOTIVO), "drill_top_nivel") if por_nivel else None
+
+        def montar_top_motivos():
+            if por_nivel:
+                rank = arvore_motivos(df, COLUNAS_MOTIVO).nivel(caminho)[["Motivo", "Qtd", "Subníveis"]]
+                rank = rank.rename(columns={"Qtd": "Total"})
+            else:
+                rank = pd.concat([df[col_m1], df[col_m2]]).value_counts().reset_index()
+                rank.columns = ["Motivo", "Total"]
+            rank_cut = rank.head(qtd_top).copy()
+            total_abs = rank["Total"].sum()
+            rank_cut["Label"] = rank_cut["Total"].apply(lambda x: f"{x} ({(x/total_abs*100):.1f}%)")
+            h_mot = max(600, qtd_top*50)
+
+            titulo = f"Top {qtd_top} Motivos de Contato" + (f" em {' > '.join(caminho)}" if caminho else "")
+            fig_glob = px.bar(rank_cut, x="Total", y="Motivo", orientation='h', text="Label", title=titulo, height=h_mot)
+            fig_glob.update_layout(yaxis={'categoryorder':'total ascending'})
+            return fig_glob, rank
+
+        fig_glob, rank = grafico_em_cache(df, "top_motivos", (qtd_top, caminho), montar_top_motivos)
+        st.plotly_chart(fig_glob, use_container_width=True, key="fig_top_motivos")
+
+        with st.expander("Ver lista completa"):
+            st.dataframe(rank, use_container_width=True)
+
+@fragmento_medido("gerencial")
+def secao_csat(df, cols_usuario):
+    """Notas médias e volume de avaliações por motivo."""
+    import plotly.express as px
+    if "CSAT Nota" not in df.columns:
+         st.warning("Sem dados.")
+    else:
+        df_csat = df.dropna(subset=["CSAT Nota"])
+        if df_csat.empty:
+            st.info("Sem avaliações.")
+        else:
+            k1, k2 = st.columns(2)
+            k1.metric("Média Geral CSAT", f"{df_csat['CSAT Nota'].mean():.2f}/5.0")
+            k2.metric("Total de Avaliações", len(df_csat))
+
+            st.divider()
+
+            c_conf1, c_conf2 = st.columns([2, 1])
+            with c_conf1:
+                ordem_csat = st.selectbox(
+                    "Ordenar Gráfico de Média por:", 
+                    ["Melhores Notas Primeiro (Ranking)", "Piores Notas Primeiro (Foco DSat)"], 
+                    key="sel_ordem_csat_final" 
+                )
+            with c_conf2:
+                qtd_csat = st.slider("Qtd. Motivos:", 5, 50, 10, key="slider_csat_qtd")
+
+            eh_dsat = "Piores" in ordem_csat
+
+            if "Motivo de Contato" in df.columns:
+                por_nivel = st.toggle("🌳 Navegar por nível", key="drill_csat")
+                caminho = navegar_arvore(arvore_motivos(df), "drill_csat_nivel") if por_nivel else None
+
+                def montar_csat():
+                    if por_nivel:
+                        # Média de cada nível já vem somada na árvore (pesa pelo nº de avaliações de tudo que está embaixo)
+                        nivel = arvore_motivos(df).nivel(caminho)
+                        csat_summary = nivel.loc[nivel["Avaliações"] > 0, ["Motivo", "CSAT Média", "Avaliações"]]
+                    else:
+                        csat_summary = df_csat.groupby("Motivo de Contato")["CSAT Nota"].agg(['mean', 'count']).reset_index()
+                    csat_summary.columns = ["Motivo de Contato", "Média", "Qtd"]
+                    if csat_summary.empty:
+                        return None, None # Nível sem nenhuma avaliação embaixo dele
+
+                    if eh_dsat:
+                        df_chart1 = csat_summary.sort_values("Média", ascending=True).head(qtd_csat)
+                        df_chart1 = df_chart1.sort_values("Média", ascending=False)
+                    else:
+                        df_chart1 = csat_summary.sort_values("Média", ascending=False).head(qtd_csat)
+                        df_chart1 = df_chart1.sort_values("Média", ascending=True)
+
+                    df_chart1["Label"] = df_chart1.apply(lambda x: f"{x['Média']:.2f} ({int(x['Qtd'])} av.)", axis=1)
+
+                    h_c1 = max(400, len(df_chart1) * 50)
+
+                    fig1 = px.bar(
+                        df_chart1, 
+                        x="Média", 
+                        y="Motivo de Contato", 
+                        orientation='h', 
+                        text="Label", 
+                        color="Média", 
+                        color_continuous_scale="RdYlGn", 
+                        range_color=[1, 5], 
+                        height=h_c1,
+                        title=f"Média CSAT (Top {qtd_csat})" + (f" em {' > '.join(caminho)}" if caminho else "")
+                    )
+                    fig1.update_layout(coloraxis_showscale=False)
+
+                    df_chart2 = csat_summary.sort_values("Qtd", ascending=False).head(qtd_csat)
+                    df_chart2 = df_chart2.sort_values("Qtd", ascending=True)
+
+                    df_chart2["Label"] = df_chart2["Qtd"].astype(int).astype(str)
+
+                    h_c2 = max(400, len(df_chart2) * 50)
+
+                    fig2 = px.bar(
+                        df_chart2,
+                        x="Qtd",
+                        y="Motivo de Contato",
+                        orientation='h',
+                        text="Label",
+                        height=h_c2,
+                        title=f"Volume de Avaliações (Top {qtd_csat})" + (f" em {' > '.join(caminho)}" if caminho else "")
+                    )
+                    fig2.update_xaxes(title="Quantidade")
+                    return fig1, fig2
+
+                fig1, fig2 = grafico_em_cache(df, "csat", (eh_dsat, qtd_csat, caminho), montar_csat)
+                if fig1 is None:
+                    st.info("Sem avaliações neste nível.")
+                    return
+
+                st.subheader("1. Média de CSAT")
+                st.plotly_chart(fig1, use_container_width=True, key="fig_csat_media")
+
+                st.divider()
+
+                st.subheader("2. Total de Avaliações (Volume)")
+                st.plotly_chart(fig2, use_container_width=True, key="fig_csat_volume")
+
+@fragmento_medido("gerencial")
+def secao_sla(df, cols_usuario):
+    """Tempo médio de resolução por agente e por motivo."""
+    import plotly.express as px
+    st.header("Análise de Tempo")
+    col_res = "Tempo Resolução (seg)"
+    if col_res in df.columns:
+        df_t = df.dropna(subset=[col_res])
+        if not df_t.empty:
+            st.subheader("⚡ Velocidade por Agente")
+            def montar_sla_agente():
+                tag = df_t.groupby("Atendente")[col_res].mean().reset_index().sort_values(col_res)
+                tag["Label"] = tag[col_res].apply(format_sla_string)
+                f_tag = px.bar(tag, x=col_res, y="Atendente", text="Label", orientation='h', title="Média de Tempo (Menor é melhor)", height=max(500, len(tag)*50))
+                f_tag.update_xaxes(showticklabels=False)
+                return f_tag
+            st.plotly_chart(grafico_em_cache(df, "sla_agente", (), montar_sla_agente), use_container_width=True, key="fig_sla_agente")
+
+            st.divider()
+
+            st.subheader("🐢 Motivos mais demorados (Média de Resolução)")
+            qtd_sla = st.slider("Qtd. Motivos:", 5, 50, 10, key="slider_sla")
+
+            if "Motivo de Contato" in df.columns:
+                por_nivel = st.toggle("🌳 Navegar por nível", key="drill_sla")
+                caminho = navegar_arvore(arvore_motivos(df), "drill_sla_nivel") if por_nivel else None
+
+                def montar_sla_motivo():
+                    if por_nivel:
+                        nivel = arvore_motivos(df).nivel(caminho).dropna(subset=["Tempo Médio (seg)"])
+                        t_motivo = nivel[["Motivo", "Tempo Médio (seg)"]]
+                        t_motivo.columns = ["Motivo de Contato", col_res]
+                    else:
+                        t_motivo = df_t.groupby("Motivo de Contato")[col_res].mean().reset_index()
+                    t_motivo = t_motivo.sort_values(col_res, ascending=False).head(qtd_sla)
+                    t_motivo = t_motivo.sort_values(col_res, ascending=True)
+                    t_motivo["Label"] = t_motivo[col_res].apply(format_sla_string)
+                    h_dyn = max(600, len(t_motivo) * 50)
+
+                    fig_tm = px.bar(t_motivo, x=col_res, y="Motivo de Contato", text="Label", orientation='h', height=h_dyn, title=f"Top {qtd_sla} Motivos mais demorados" + (f" em {' > '.join(caminho)}" if caminho else ""))
+                    fig_tm.update_xaxes(showticklabels=False)
+                    return fig_tm
+                st.plotly_chart(grafico_em_cache(df, "sla_motivo", (qtd_sla, caminho), montar_sla_motivo), use_container_width=True, key="fig_sla_motivo")
+        else: st.warning("Sem dados de tempo.")
+
+@fragmento_medido("gerencial")
+def secao_dados(df, cols_usuario):
+    """Filtros, exportação e a tabela paginada."""
+    with st.form("form_filtros_tabela"):
+        st.write("🔍 Filtros da Pesquisa")
+        c1, c2, c3, c4 = st.columns(4)
+
+        with c1:
+            agentes_unicos = sorted(df["Atendente"].astype(str).unique())
+            sel_agentes = st.multiselect("👤 Analista:", agentes_unicos)
+
+        with c2:
+            if "Tipo de Atendimento" in df.columns:
+                tipos_unicos = sorted(df["Tipo de Atendimento"].dropna().astype(str).unique())
+                sel_tipos = st.multiselect("💬 Tipo:", tipos_unicos)
+            else:
+                sel_tipos = []
+
+        with c3:
+            if "Motivo de Contato" in df.columns:
+                motivos_unicos = sorted(df["Motivo de Contato"].dropna().astype(str).unique())
+                sel_motivos = st.multiselect("🎯 Motivo:", motivos_unicos)
+            else:
+                sel_motivos = []
+
+        with c4:
+            if "Status do atendimento" in df.columns:
+                status_unicos = sorted(df["Status do atendimento"].dropna().astype(str).unique())
+                sel_status = st.multiselect("🚦 Status:", status_unicos)
+            else:
+                sel_status = []
+
+        aplicar = st.form_submit_button("Aplicar Filtros")
+
+    df_view = df # Os filtros abaixo já devolvem um DataFrame novo; a tabela não mexe no original
+
+    if sel_agentes:
+        df_view = df_view[df_view["Atendente"].isin(sel_agentes)]
+
+    if sel_tipos:
+        df_view = df_view[df_view["Tipo de Atendimento"].isin(sel_tipos)]
+
+    if sel_motivos:
+        df_view = df_view[df_view["Motivo de Contato"].isin(sel_motivos)]
+
+    if sel_status:
+        df_view = df_view[df_view["Status do atendimento"].isin(sel_status)]
+
+    c_resumo, c_formato, c_botao = st.columns([3, 1, 1])
+
+    with c_resumo:
+        st.caption(f"Exibindo **{len(df_view)}** conversas após os filtros.")
+        # Alimenta o modo MongoDB (manda a base inteira, não só a filtrada)
+        if st.button("🍃 Enviar base para o MongoDB"):
+            with st.spinner("Salvando no MongoDB..."):
+                resumo_mongo = salvar_lote_conversas_mongo(df_para_conversas(df))
+            st.success(f"MongoDB: {resumo_mongo['gravados']} gravadas, {resumo_mongo['ignorados']} sem mudança, {resumo_mongo['falhas']} falhas.")
+
+    with c_formato:
+        formato = st.selectbox("Formato:", list(FORMATOS_EXPORTACAO), key="sel_formato_export", label_visibility="collapsed")
+
+    with c_botao:
+        # Só gera o arquivo do formato escolhido, e só quando pedirem (paginar/ordenar/buscar não refaz)
+        extensao, mime = FORMATOS_EXPORTACAO[formato]
+        if extensao == "xlsx" and len(df_view) > LIMITE_LINHAS_EXCEL:
+            st.warning("Muitas linhas para o Excel. Use Parquet ou CSV.")
+        else:
+            exportacao_sob_demanda(df_view, "export_gerencial", extensao, mime, cols_usuario, "gerencial", "relatorio_filtrado", type="primary", use_container_width=True)
+
+    cols_display = ["Data", "Estado", "Atendente", "Link", "Tempo Resolução"] + cols_usuario
+    cols_existentes = [c for c in cols_display if c in df_view.columns]
+
+    tabela_paginada(
+        df_view,
+        "tabela_dados",
+        colunas=cols_existentes,
+        column_config={
+            "Link": st.column_config.LinkColumn("Link", display_text="🔗 Abrir Conversa")
+        },
+        chaves_ordenacao={"Data": "timestamp_real", "Tempo Resolução": "Tempo Resolução (seg)"}
+    )
+
+def mostrar_resumo_mongo(resumo):
+    """Relatório do modo MongoDB: tudo já vem agregado do banco."""
+    import plotly.express as px
+    kpis = resumo["kpis"]
+    st.divider()
+    st.markdown("### 📌 Resumo (MongoDB)")
+    k1, k2, k3, k4, k5 = st.columns(5)
+    top_motivo = kpis["top_motivo"].split(">")[-1].strip() if kpis["top_motivo"] else "N/A"
+    k1.metric("Total Conversas", kpis["total"])
+    k2.metric("Classificados", kpis["classificados"])
+    k3.metric("Resolvidos", kpis["resolvidos"])
+    k4.metric("Tempo Médio", format_sla_string(kpis["tempo_medio"]))
+    k5.metric("Top Motivo", top_motivo)
+
+    st.divider()
+    st.subheader("🎯 Taxa de Classificação (Conversas Fechadas)")
+    taxa = resumo["taxa"]
+    if not taxa.empty:
+        taxa_view = taxa[["Atendente", "Total", "Classificados", "Pendentes", "Taxa (%)"]].copy()
+        taxa_view['Taxa (%)'] = taxa_view['Taxa (%)'].apply(lambda x: f"{x}%")
+        st.dataframe(taxa_view, use_container_width=True, hide_index=True)
+    else:
+        st.info("Sem conversas fechadas no período.")
+
+    st.divider()
+    ranking = resumo["ranking"]
+    if not ranking.empty:
+        qtd_top = st.slider("Quantidade de Motivos no Ranking:", 5, 50, 10, key="slider_mongo_top")
+        rank_cut = ranking.head(qtd_top).copy()
+        total_abs = ranking["Total"].sum()
+        rank_cut["Label"] = rank_cut["Total"].apply(lambda x: f"{x} ({(x/total_abs*100):.1f}%)")
+        fig_glob = px.bar(rank_cut, x="Total", y="Motivo", orientation='h', text="Label", title=f"Top {qtd_top} Motivos de Contato", height=max(600, qtd_top*50))
+        fig_glob.update_layout(yaxis={'categoryorder':'total ascending'})
+        st.plotly_chart(fig_glob, use_container_width=True)
+
+    csat = resumo["csat"]
+    if not csat.empty:
+        st.subheader("⭐ Média de CSAT por Motivo")
+        csat = csat.sort_values("Média", ascending=True)
+        csat["Label"] = csat.apply(lambda x: f"{x['Média']:.2f} ({int(x['Qtd'])} av.)", axis=1)
+        fig_csat = px.bar(csat, x="Média", y="Motivo de Contato", orientation='h', text="Label", color="Média", color_continuous_scale="RdYlGn", range_color=[1, 5], height=max(400, len(csat) * 50))
+        fig_csat.update_layout(coloraxis_showscale=False)
+        st.plotly_chart(fig_csat, use_container_width=True)
+
+    sla = resumo["sla"]
+    if not sla.empty:
+        st.subheader("⚡ Velocidade por Agente")
+        col_res = "Tempo Resolução (seg)"
+        sla["Label"] = sla[col_res].apply(format_sla_string)
+        f_tag = px.bar(sla, x=col_res, y="Atendente", text="Label", orientation='h', title="Média de Tempo (Menor é melhor)", height=max(500, len(sla)*50))
+        f_tag.update_xaxes(showticklabels=False)
+        st.plotly_chart(f_tag, use_container_width=True)
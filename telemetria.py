@@ -0,0 +1,138 @@
+"""
+Telemetria das chamadas ao Intercom: quantas, quanto demoraram, status, tamanho da resposta,
+quanto sobrou do rate limit e quanto tempo a gente dormiu esperando (429 / backoff).
+Não depende do Streamlit. O make_api_request registra cada chamada no coletor do processo
+(e no da sessão, quando existe) e o coletor do processo pode virar um arquivo no formato Prometheus.
+"""
+import os
+import re
+import threading
+import time
+from urllib.parse import urlparse
+
+# Pedaços de URL que são IDs (números ou hashes) viram {id} pra não explodir a quantidade de séries
+_REGEX_ID = re.compile(r"^(\d+|[0-9a-f]{24})$")
+
+def normalizar_endpoint(url):
+    """https://api.intercom.io/conversations/123 -> /conversations/{id}"""
+    partes = [p for p in urlparse(url).path.split("/") if p]
+    return "/" + "/".join("{id}" if _REGEX_ID.match(p) else p for p in partes)
+
+class ColetorTelemetria:
+    """Acumula as métricas por (método, endpoint). Seguro para várias threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.series = {}
+        self.caminho_prometheus = None
+        self.intervalo_exportacao = 15
+        self.ultima_exportacao = 0
+
+    def _serie(self, metodo, endpoint):
+        chave = (metodo.upper(), endpoint)
+        if chave not in self.series:
+            self.series[chave] = {
+                "requisicoes": 0,
+                "por_status": {},
+                "latencia_seg": 0.0,
+                "latencia_max_seg": 0.0,
+                "bytes": 0,
+                "espera_seg": 0.0,
+                "rate_limit_restante": None,
+            }
+        return self.series[chave]
+
+    def registrar(self, metodo, url, status, latencia_seg, bytes_resposta=0, rate_limit_restante=None):
+        """Registra uma chamada (status 0 = erro de conexão)."""
+        with self.lock:
+            serie = self._serie(metodo, normalizar_endpoint(url))
+            serie["requisicoes"] += 1
+            serie["por_status"][str(status)] = serie["por_status"].get(str(status), 0) + 1
+            serie["latencia_seg"] += latencia_seg
+            serie["latencia_max_seg"] = max(serie["latencia_max_seg"], latencia_seg)
+            serie["bytes"] += bytes_resposta
+            if rate_limit_restante is not None:
+                try:
+                    serie["rate_limit_restante"] = int(rate_limit_restante)
+                except (TypeError, ValueError):
+                    pass
+        self._exportar_se_preciso()
+
+    def registrar_espera(self, metodo, url, segundos):
+        """Soma o tempo dormido esperando o rate limit liberar."""
+        with self.lock:
+            self._serie(metodo, normalizar_endpoint(url))["espera_seg"] += segundos
+
+    def resumo(self):
+        """Uma linha por (método, endpoint), pronta pra virar DataFrame."""
+        with self.lock:
+            linhas = []
+            for (metodo, endpoint), s in sorted(self.series.items()):
+                linhas.append({
+                    "Método": metodo,
+                    "Endpoint": endpoint,
+                    "Chamadas": s["requisicoes"],
+                    "Status": ", ".join(f"{k}: {v}" for k, v in sorted(s["por_status"].items())),
+                    "Latência média (ms)": round(s["latencia_seg"] / s["requisicoes"] * 1000, 1) if s["requisicoes"] else 0,
+                    "Latência máx. (ms)": round(s["latencia_max_seg"] * 1000, 1),
+                    "KB recebidos": round(s["bytes"] / 1024, 1),
+                    "Espera 429 (s)": round(s["espera_seg"], 1),
+                    "Rate limit restante": s["rate_limit_restante"],
+                })
+            return linhas
+
+    def texto_prometheus(self):
+        """Métricas no formato texto do Prometheus."""
+        def rotulos(metodo, endpoint, **extra):
+            pares = {"method": metodo, "endpoint": endpoint, **extra}
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pares.items()) + "}"
+
+        linhas = [
+            "# HELP intercom_requests_total Chamadas feitas à API do Intercom.",
+            "# TYPE intercom_requests_total counter",
+        ]
+        with self.lock:
+            series = sorted(self.series.items())
+            for (metodo, endpoint), s in series:
+                for status, qtd in sorted(s["por_status"].items()):
+                    linhas.append(f"intercom_requests_total{rotulos(metodo, endpoint, status=status)} {qtd}")
+
+            linhas += ["# HELP intercom_request_duration_seconds Latência das chamadas.", "# TYPE intercom_request_duration_seconds summary"]
+            for (metodo, endpoint), s in series:
+                linhas.append(f"intercom_request_duration_seconds_sum{rotulos(metodo, endpoint)} {s['latencia_seg']:.6f}")
+                linhas.append(f"intercom_request_duration_seconds_count{rotulos(metodo, endpoint)} {s['requisicoes']}")
+
+            linhas += ["# HELP intercom_response_bytes_total Bytes recebidos nas respostas.", "# TYPE intercom_response_bytes_total counter"]
+            for (metodo, endpoint), s in series:
+                linhas.append(f"intercom_response_bytes_total{rotulos(metodo, endpoint)} {s['bytes']}")
+
+            linhas += ["# HELP intercom_backoff_sleep_seconds_total Tempo dormido em 429/backoff.", "# TYPE intercom_backoff_sleep_seconds_total counter"]
+            for (metodo, endpoint), s in series:
+                linhas.append(f"intercom_backoff_sleep_seconds_total{rotulos(metodo, endpoint)} {s['espera_seg']:.3f}")
+
+            linhas += ["# HELP intercom_ratelimit_remaining Último X-RateLimit-Remaining recebido.", "# TYPE intercom_ratelimit_remaining gauge"]
+            for (metodo, endpoint), s in series:
+                if s["rate_limit_restante"] is not None:
+                    linhas.append(f"intercom_ratelimit_remaining{rotulos(metodo, endpoint)} {s['rate_limit_restante']}")
+        return "\n".join(linhas) + "\n"
+
+    def exportar_prometheus(self, caminho=None):
+        """Grava o arquivo .prom (escreve num temporário e troca, pra nunca ler arquivo pela metade)."""
+        caminho = caminho or self.caminho_prometheus
+        if not caminho:
+            return
+        temporario = f"{caminho}.tmp"
+        try:
+            with open(temporario, "w", encoding="utf-8") as f:
+                f.write(self.texto_prometheus())
+            os.replace(temporario, caminho)
+        except OSError as e:
+            print(f"Erro ao exportar métricas Prometheus: {e}")
+
+    def _exportar_se_preciso(self):
+        if self.caminho_prometheus and time.time() - self.ultima_exportacao >= self.intervalo_exportacao:
+            self.ultima_exportacao = time.time()
+            self.exportar_prometheus()
+
+# Coletor do processo inteiro (todas as sessões juntas)
+TELEMETRIA_PROCESSO = ColetorTelemetria()
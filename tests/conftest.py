@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Os módulos ficam na raiz do repositório (não é um pacote); os stubs do benchmark servem aos testes também
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, "benchmark"))
+sys.path.insert(0, RAIZ)
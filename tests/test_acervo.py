@@ -0,0 +1,86 @@
+"""
+Acervo das páginas: baixar de novo não cresce o disco, a versão nova substitui a velha e a troca de time
+tira a conversa do arquivo do time antigo.
+"""
+import os
+from datetime import datetime
+
+from acervo import AcervoPaginas
+
+CRIADA = int(datetime(2026, 3, 10, 12).timestamp())
+INICIO, FIM = int(datetime(2026, 3, 10).timestamp()), int(datetime(2026, 3, 11).timestamp())
+
+
+def _conversa(cid, time_id=1, updated_at=100, motivo="Financeiro"):
+    return {"id": cid, "created_at": CRIADA + cid, "updated_at": updated_at, "team_assignee_id": time_id,
+            "custom_attributes": {"motivo_contato": motivo}}
+
+
+def _linhas(acervo, time_id):
+    caminho = os.path.join(acervo.pasta, "ws", "2026-03-10", f"time_{time_id}{acervo.extensao}")
+    return len(acervo._ler_arquivo(caminho)) if os.path.exists(caminho) else 0
+
+
+def test_baixar_de_novo_nao_grava_repetida(tmp_path):
+    acervo = AcervoPaginas(str(tmp_path), compressao="gzip")
+    pagina = [_conversa(i) for i in range(5)]
+    acervo.guardar_pagina("ws", pagina)
+    tamanho = acervo.tamanho_bytes("ws")
+
+    for _ in range(3):
+        acervo.guardar_pagina("ws", pagina)
+    assert acervo.tamanho_bytes("ws") == tamanho
+    assert _linhas(acervo, 1) == 5
+    assert acervo.compactar("ws") == 0 # Nada pra limpar
+    assert len(acervo.carregar("ws", INICIO, FIM)) == 5
+
+
+def test_versao_nova_substitui_a_velha_ao_compactar(tmp_path):
+    acervo = AcervoPaginas(str(tmp_path), compressao="gzip")
+    acervo.guardar_pagina("ws", [_conversa(i) for i in range(3)])
+    acervo.guardar_pagina("ws", [_conversa(1, updated_at=200, motivo="Sistema")])
+    assert _linhas(acervo, 1) == 4 # A nova foi pro fim do arquivo...
+    assert [c["custom_attributes"]["motivo_contato"] for c in acervo.carregar("ws", INICIO, FIM)] == ["Financeiro", "Sistema", "Financeiro"]
+
+    assert acervo.compactar("ws") == 1
+    assert _linhas(acervo, 1) == 3 # ...e a velha saiu na compactação
+    assert acervo.carregar("ws", INICIO, FIM)[1]["updated_at"] == 200
+
+    # Versão mais velha chegando depois (página atrasada) não volta pro acervo
+    acervo.guardar_pagina("ws", [_conversa(1, updated_at=150)])
+    assert _linhas(acervo, 1) == 3 and acervo.compactar() == 0
+
+
+def test_troca_de_time_sai_do_arquivo_antigo(tmp_path):
+    acervo = AcervoPaginas(str(tmp_path), compressao="gzip")
+    acervo.guardar_pagina("ws", [_conversa(1, time_id=1), _conversa(2, time_id=1)])
+    acervo.guardar_pagina("ws", [_conversa(1, time_id=2, updated_at=200)])
+
+    # Antes de compactar, o índice já diz qual é o time atual
+    assert [c["id"] for c in acervo.carregar("ws", INICIO, FIM, team_ids=[1])] == [2]
+    assert [c["id"] for c in acervo.carregar("ws", INICIO, FIM, team_ids=[2])] == [1]
+
+    acervo.compactar("ws")
+    assert (_linhas(acervo, 1), _linhas(acervo, 2)) == (1, 1)
+
+    # O time antigo ficou sem conversa nesse dia: o arquivo some
+    acervo.guardar_pagina("ws", [_conversa(2, time_id=2, updated_at=300)])
+    acervo.compactar("ws")
+    assert (_linhas(acervo, 1), _linhas(acervo, 2)) == (0, 2)
+    assert len(acervo.carregar("ws", INICIO, FIM)) == 2
+
+
+def test_acervo_antigo_sem_indice_e_compactado(tmp_path):
+    acervo = AcervoPaginas(str(tmp_path), compressao="gzip")
+    pagina = [_conversa(i) for i in range(3)]
+    acervo.guardar_pagina("ws", pagina)
+    pasta = os.path.join(acervo.pasta, "ws", "2026-03-10")
+    # Simula o acervo de antes do índice: mesma página gravada duas vezes e sem o _indice.json
+    with open(os.path.join(pasta, f"time_1{acervo.extensao}"), "ab") as f:
+        f.write(acervo._comprimir([b'{"id": 0, "created_at": %d, "updated_at": 100, "team_assignee_id": 1}' % (CRIADA,)]))
+    os.remove(os.path.join(pasta, "_indice.json"))
+
+    acervo.guardar_pagina("ws", pagina) # Monta o índice lendo os arquivos e percebe a repetida
+    assert _linhas(acervo, 1) == 4
+    assert acervo.compactar("ws") == 1
+    assert _linhas(acervo, 1) == 3
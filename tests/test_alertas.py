@@ -0,0 +1,86 @@
+"""
+Despachante do Slack contra o webhook falso do benchmark (stub_slack): agrupamento, novas tentativas e envio na saída.
+"""
+import logging
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+
+import pytest
+
+import alertas
+from alertas import DespachanteSlack
+from stub_slack import criar_servidor
+
+
+@pytest.fixture
+def slack():
+    """Sobe o webhook falso numa porta livre. Devolve (criar, recebidas): criar(prob_erro=...) -> url."""
+    recebidas = []
+    servidores = []
+
+    def criar(prob_erro=0.0):
+        servidor = criar_servidor(porta=0, prob_erro=prob_erro, ao_receber=recebidas.append)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        servidores.append(servidor)
+        return f"http://127.0.0.1:{servidor.server_address[1]}/webhook"
+
+    yield criar, recebidas
+    for servidor in servidores:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+def test_alertas_da_janela_viram_uma_mensagem(slack):
+    criar, recebidas = slack
+    despachante = DespachanteSlack(criar(), intervalo_seg=60)
+    for mensagem in ["SLA estourado: Boleto", "Meta abaixo: Ana", "SLA estourado: Boleto"]:
+        despachante.enviar(mensagem)
+    assert despachante.flush(timeout=5)
+    despachante.parar()
+
+    assert len(recebidas) == 1
+    assert recebidas[0].startswith("🔔 *3 alertas")
+    assert "• SLA estourado: Boleto (x2)\n• Meta abaixo: Ana" in recebidas[0] # Na ordem de chegada
+    assert despachante.estatisticas == {"recebidos": 3, "repetidos": 1, "mensagens_enviadas": 1, "falhas": 0}
+
+
+def test_tenta_de_novo_quando_o_slack_falha(slack, caplog):
+    criar, recebidas = slack
+    # O sorteio do stub é fixo: com 30% de erro, a primeira chamada leva 503 (Retry-After: 1) e a segunda passa
+    despachante = DespachanteSlack(criar(prob_erro=0.3), intervalo_seg=60)
+    despachante.enviar("SLA estourado: Boleto")
+    assert despachante.flush(timeout=10)
+    assert recebidas == ["SLA estourado: Boleto"]
+    assert despachante.estatisticas["falhas"] == 0
+
+    # Sem webhook que responda, desiste depois de max_tentativas e conta a falha no log
+    sem_resposta = DespachanteSlack(criar(prob_erro=1.0), intervalo_seg=60, max_tentativas=1)
+    with caplog.at_level(logging.WARNING, logger="alertas"):
+        sem_resposta.enviar("Meta abaixo: Ana")
+        assert sem_resposta.flush(timeout=5)
+    assert sem_resposta.estatisticas["falhas"] == 1 and "descartado depois de 1 tentativas" in caplog.text
+    despachante.parar()
+    sem_resposta.parar()
+
+
+def test_pendentes_saem_quando_o_processo_termina(slack):
+    criar, recebidas = slack
+    url = criar()
+    # Janela de 1 hora: o alerta só sai pelo flush registrado no atexit
+    codigo = textwrap.dedent(f"""
+        from alertas import criar_despachante
+        criar_despachante({url!r}, intervalo_seg=3600).enviar("Meta abaixo: Ana")
+    """)
+    subprocess.run([sys.executable, "-c", codigo], check=True, timeout=30, cwd=os.path.dirname(alertas.__file__))
+    assert recebidas == ["Meta abaixo: Ana"]
+
+
+def test_sem_webhook_avisa_no_log(monkeypatch, caplog):
+    utils = pytest.importorskip("utils")
+    monkeypatch.setattr(utils, "despachante_slack", lambda: None)
+    with caplog.at_level(logging.WARNING, logger="utils"):
+        utils.send_slack_alert("SLA estourado: Boleto")
+    assert "Webhook do Slack não encontrado" in caplog.text
@@ -0,0 +1,70 @@
+"""
+Árvore dos Motivos: soma por nível, escolha de uma folha e caminhos com nível vazio.
+"""
+import numpy as np
+import pandas as pd
+
+from nucleo import ArvoreMotivos
+
+
+def _base():
+    return pd.DataFrame({
+        "Motivo de Contato": [
+            "Financeiro > Boleto > 2ª via", "Financeiro > Boleto > Vencido", "Financeiro > Boleto",
+            "Financeiro > Nota fiscal", "Sistema > Login", None,
+        ],
+        "Motivo 2 (Se houver)": [None, None, "Sistema > Login", None, None, "Financeiro > Boleto > 2ª via"],
+        "CSAT Nota": [5.0, 3.0, None, 4.0, 1.0, 2.0],
+        "Tempo Resolução (seg)": [600, 1200, 300, None, 60, 90],
+    })
+
+
+def test_soma_por_nivel():
+    arvore = ArvoreMotivos(_base())
+    assert arvore.total == 5 # A linha sem Motivo não conta
+    assert arvore.filhos()[["Motivo", "Qtd", "Subníveis"]].values.tolist() == [["Financeiro", 4, 2], ["Sistema", 1, 1]]
+
+    # "Financeiro > Boleto" soma quem parou nele e quem desceu até o 3º nível
+    boleto = arvore.no(("Financeiro", "Boleto"))
+    assert (boleto["Qtd"], boleto["Nível"], boleto["Avaliações"]) == (3, 2, 2)
+    assert boleto["CSAT Média"] == 4.0 and boleto["Tempo Médio (seg)"] == 700.0
+    assert arvore.filhos(("Financeiro",))["Motivo"].tolist() == ["Boleto", "Nota fiscal"]
+    assert np.isnan(arvore.no(("Financeiro", "Nota fiscal"))["Tempo Médio (seg)"])
+    assert arvore.no(("Cadastro",)) is None
+
+
+def test_duas_colunas_contam_cada_mencao():
+    arvore = ArvoreMotivos(_base(), colunas=("Motivo de Contato", "Motivo 2 (Se houver)", "Não existe"))
+    assert arvore.colunas == ("Motivo de Contato", "Motivo 2 (Se houver)")
+    assert arvore.total == 7
+    assert arvore.no(("Sistema", "Login"))["Qtd"] == 2
+    assert arvore.no(("Financeiro", "Boleto", "2ª via"))["Avaliações"] == 2
+
+
+def test_escolher_folha_mostra_o_proprio_no():
+    arvore = ArvoreMotivos(_base())
+    folha = arvore.nivel(("Financeiro", "Boleto", "Vencido"))
+    assert folha[["Caminho", "Qtd", "CSAT Média"]].values.tolist() == [["Financeiro > Boleto > Vencido", 1, 3.0]]
+    assert arvore.nivel(("Financeiro", "Boleto"))["Motivo"].tolist() == ["2ª via", "Vencido"]
+    assert arvore.nivel(("Não", "existe")).empty
+    assert sorted(arvore.folhas()["Caminho"]) == [
+        "Financeiro > Boleto > 2ª via", "Financeiro > Boleto > Vencido", "Financeiro > Nota fiscal", "Sistema > Login",
+    ]
+
+
+def test_niveis_vazios_e_nan():
+    df = pd.DataFrame({
+        "Motivo de Contato": ["Financeiro >  > Boleto", "Financeiro > ", " > Sistema", "", "   ", np.nan, None],
+        "CSAT Nota": [5.0, 4.0, 3.0, 2.0, 1.0, 1.0, 1.0],
+    })
+    arvore = ArvoreMotivos(df) # Sem a coluna de tempo
+    # Nível vazio no meio some do caminho; motivo só com espaços ou NaN não entra na árvore
+    assert sorted(arvore.nos["Caminho"]) == ["Financeiro", "Financeiro > Boleto", "Sistema"]
+    assert arvore.total == 3
+    assert arvore.no(("Financeiro",))["Qtd"] == 2 and arvore.no(("Financeiro",))["CSAT Média"] == 4.5
+    assert arvore.nos["Tempo Médio (seg)"].isna().all()
+
+
+def test_sem_motivo_nenhum():
+    arvore = ArvoreMotivos(pd.DataFrame({"Atendente": ["Ana"]}))
+    assert arvore.total == 0 and arvore.nos.empty and arvore.filhos().empty and arvore.folhas().empty
@@ -0,0 +1,57 @@
+"""
+Atributos no formato longo: materializados como coluna, voltam iguais ao process_data no formato largo.
+"""
+import pandas as pd
+import pytest
+
+from gerador_conversas import ADMINS, ATRIBUTOS, GeradorConversas
+from nucleo import com_atributos, nomes_atributos, process_data
+
+ADMIN_MAP = {str(a["id"]): a["name"] for a in ADMINS}
+
+
+def _conversa(cid, atributos, nota=None):
+    return {
+        "id": str(cid), "created_at": 1767268800 + cid, "updated_at": 1767268800 + cid + 60, "state": "closed",
+        "admin_assignee_id": 100, "custom_attributes": atributos,
+        "statistics": {"time_to_admin_reply": 30, "time_to_close": 600},
+        "conversation_rating": {"rating": nota} if nota else None,
+    }
+
+
+def _na_mao():
+    return [
+        _conversa(3, {"motivo_contato": "Financeiro > Boleto", "Campo antigo": True}, nota=5),
+        _conversa(1, {"motivo_contato": None, "Campo antigo": "x", "equipe": "N1"}),
+        _conversa(2, {"Campo antigo": 7, "status_atendimento": "Resolvido"}, nota=3), # Mistura bool, texto e número
+        _conversa(4, {}),
+    ]
+
+
+def _comparar(conversas, modelo):
+    largo = process_data(conversas, ATRIBUTOS, ADMIN_MAP, modelo=modelo)
+    longo = process_data(conversas, ATRIBUTOS, ADMIN_MAP, modelo=modelo, atributos_longos=True)
+    vista = com_atributos(longo, nomes_atributos(longo))
+
+    assert sorted(vista.columns) == sorted(largo.columns)
+    for col in largo.columns:
+        pd.testing.assert_series_equal(vista[col], largo[col], obj=col)
+    return largo
+
+
+@pytest.mark.parametrize("modelo", ["gerencial", "v2"])
+def test_longo_igual_ao_largo_na_mao(modelo):
+    largo = _comparar(_na_mao(), modelo)
+    assert largo["Campo antigo"].tolist()[:3] == ["x", 7, True] and largo["Campo antigo"].isna().tolist()[3]
+    assert ("Motivo 2 (Se houver)" in largo.columns) == (modelo == "gerencial") # Ninguém preencheu
+
+
+@pytest.mark.parametrize("modelo", ["gerencial", "v2"])
+def test_longo_igual_ao_largo_no_gerador(modelo):
+    gerador = GeradorConversas(300, seed=4)
+    largo = _comparar([gerador.conversa(i) for i in range(gerador.total)], modelo)
+    assert any(col.startswith("Campo antigo") for col in largo.columns) # Atributos esparsos também
+
+
+def test_sem_conversas():
+    assert _comparar([], "gerencial").empty
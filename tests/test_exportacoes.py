@@ -0,0 +1,72 @@
+"""
+Exportações do relatório: cada formato de FORMATOS_EXPORTACAO volta a ser lido igual ao que saiu.
+"""
+import zipfile
+from io import BytesIO
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from nucleo import FORMATOS_EXPORTACAO, gerar_arquivo
+
+LONGO_A = "Qual foi o motivo principal do contato do cliente nesta conversa - parte A"
+LONGO_B = "Qual foi o motivo principal do contato do cliente nesta conversa - parte B"
+
+
+def _base():
+    return pd.DataFrame({
+        "Data": ["01/01/2026 10:00", "01/01/2026 11:00", "02/01/2026 09:00", "02/01/2026 10:00"],
+        "Atendente": ["Ana", "Ana", "Bruno", "Carla"],
+        "Link": ["l1", "l2", "l3", "l4"],
+        "CSAT Nota": [5.0, None, 3.0, 4.0],
+        "Motivo de Contato": ["Financeiro > Boleto", "Financeiro > Boleto", None, "Sistema > Login"],
+        "Misto": ["sim", 3, True, None], # Tipos misturados (atributo personalizado)
+        LONGO_A: ["x", "y", "x", None],
+        LONGO_B: ["z", "z", None, None],
+    })
+
+
+def test_todos_os_formatos_tem_teste():
+    assert {ext for ext, _ in FORMATOS_EXPORTACAO.values()} == {"xlsx", "parquet", "csv.gz", "zip"}
+
+
+def test_parquet_ida_e_volta():
+    df = _base()
+    lido = pq.read_table(BytesIO(gerar_arquivo(df, "parquet", []))).to_pandas()
+    assert list(lido.columns) == list(df.columns)
+    pd.testing.assert_series_equal(lido["CSAT Nota"], df["CSAT Nota"])
+    assert lido["Motivo de Contato"].tolist()[:2] == ["Financeiro > Boleto"] * 2
+    assert lido["Misto"].tolist()[:3] == ["sim", "3", "True"] # A coluna mista vira texto
+
+
+def test_csv_gz_ida_e_volta():
+    df = _base()
+    lido = pd.read_csv(BytesIO(gerar_arquivo(df, "csv.gz", [])), compression="gzip")
+    assert list(lido.columns) == list(df.columns)
+    assert lido["Atendente"].tolist() == df["Atendente"].tolist()
+    assert lido["CSAT Nota"].isna().tolist() == df["CSAT Nota"].isna().tolist()
+
+
+def test_xlsx_ida_e_volta():
+    pytest.importorskip("openpyxl")
+    df = _base()
+    abas = pd.read_excel(BytesIO(gerar_arquivo(df, "xlsx", ["Atendente", LONGO_A, LONGO_B])), sheet_name=None)
+    assert len(abas) == 4 # Base Completa + uma por atributo, mesmo com os nomes longos iguais no começo
+    assert abas["Base Completa"]["Atendente"].tolist() == df["Atendente"].tolist()
+    assert abas["Atendente"].values.tolist() == [["Ana", 2], ["Bruno", 1], ["Carla", 1]]
+
+
+def test_zip_ida_e_volta_sem_sobrescrever_nomes_longos():
+    df = _base()
+    colunas = ["Atendente", "Motivo de Contato", "Misto", LONGO_A, LONGO_B]
+    with zipfile.ZipFile(BytesIO(gerar_arquivo(df, "zip", colunas))) as zf:
+        nomes = zf.namelist()
+        resumos = [pd.read_csv(zf.open(nome)) for nome in nomes]
+
+    assert len(nomes) == len(set(nomes)) == len(colunas)
+    for col, resumo in zip(colunas, resumos):
+        esperado = df[col].astype("string").value_counts()
+        assert list(resumo.columns) == [col, "Quantidade"]
+        assert dict(zip(resumo[col].astype("string"), resumo["Quantidade"])) == esperado.to_dict()
+    assert resumos[0]["Atendente"].tolist() == ["Ana", "Bruno", "Carla"] # Do mais para o menos frequente
@@ -0,0 +1,66 @@
+"""
+Envio da base do relatório para o MongoDB (modo MongoDB), com o mongomock no lugar do banco.
+pip install -r requirements-dev.txt
+"""
+import pandas as pd
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+import utils
+
+
+@pytest.fixture
+def banco(monkeypatch):
+    client = mongomock.MongoClient()
+    monkeypatch.setattr(utils, "init_mongo_connection", lambda: client)
+    utils._estado_indices_mongo.clear()
+    yield client["suporte_db"]
+    utils._estado_indices_mongo.clear()
+
+
+def _relatorio():
+    return pd.DataFrame({
+        "ID": ["1", "2", "3"],
+        "timestamp_real": [100, 200, 300],
+        "Atendente": ["Ana", "Ana", "Bruno"],
+        "Motivo de Contato": ["Financeiro > Boleto", None, "Sistema > Login"],
+        "Status do atendimento": ["Resolvido", "Resolvido", None],
+        "CSAT Nota": [5.0, float("nan"), 3.0],
+        "Tempo Resolução (seg)": [60.0, 120.0, float("nan")],
+    })
+
+
+def test_bulk_upsert_e_pula_quem_nao_mudou(banco):
+    conversas = utils.df_para_conversas(_relatorio())
+    assert utils.salvar_lote_conversas_mongo(conversas, tamanho_lote=2) == {"gravados": 3, "ignorados": 0, "falhas": 0}
+    assert banco["conversas"].count_documents({}) == 3
+    assert banco["conversas"].find_one({"id": "2"})["csat_nota"] is None # NaN vira null
+
+    # Mandar de novo a mesma base: nada é reescrito
+    assert utils.salvar_lote_conversas_mongo(conversas, tamanho_lote=2) == {"gravados": 0, "ignorados": 3, "falhas": 0}
+
+    # Só a conversa que mudou vai pro banco
+    df = _relatorio()
+    df.loc[1, "Motivo de Contato"] = "Dúvida > Uso"
+    assert utils.salvar_lote_conversas_mongo(utils.df_para_conversas(df)) == {"gravados": 1, "ignorados": 2, "falhas": 0}
+    assert banco["conversas"].find_one({"id": "2"})["motivo_contato"] == "Dúvida > Uso"
+    assert banco["conversas"].count_documents({}) == 3
+
+
+def test_conversa_nao_sobrescreve_ticket_de_mesmo_id(banco):
+    utils.salvar_lote_tickets_mongo([{"id": "1", "cliente": "Energisa", "updated_at": 10}])
+    utils.salvar_lote_conversas_mongo(utils.df_para_conversas(_relatorio()))
+
+    ticket = banco["tickets"].find_one({"id": "1"}, {"_id": 0, "hash_conteudo": 0})
+    assert ticket == {"id": "1", "cliente": "Energisa", "updated_at": 10}
+    assert banco["tickets"].count_documents({}) == 1
+    assert banco["conversas"].find_one({"id": "1"})["motivo_contato"] == "Financeiro > Boleto"
+
+
+def test_agregacoes_leem_a_colecao_de_conversas(banco):
+    utils.salvar_lote_tickets_mongo([{"id": "9", "created_at": 150, "motivo_contato": "Não é conversa"}])
+    utils.salvar_lote_conversas_mongo(utils.df_para_conversas(_relatorio()))
+
+    ranking = utils.ranking_motivos_mongo(0, 1000)
+    assert "Não é conversa" not in ranking.to_string()
+    assert set(utils._colecao_conversas().index_information()) >= {"id_unico", "created_at", "team_assignee_id"}
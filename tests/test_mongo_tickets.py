@@ -0,0 +1,93 @@
+"""
+Leitura colunar dos tickets (Mongo -> Arrow -> pandas): com o PyMongoArrow e no caminho em lotes sem ele.
+pip install -r requirements-dev.txt
+"""
+import sys
+import types
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+import utils
+
+
+@pytest.fixture
+def banco(monkeypatch):
+    client = mongomock.MongoClient()
+    monkeypatch.setattr(utils, "init_mongo_connection", lambda: client)
+    utils._estado_indices_mongo.clear()
+    yield client["suporte_db"]
+    utils._estado_indices_mongo.clear()
+
+
+@pytest.fixture
+def sem_indice_texto(monkeypatch):
+    monkeypatch.setattr(utils, "indice_texto_mongo", lambda: False) # O mongomock não tem $text
+
+
+@pytest.fixture
+def sem_pymongoarrow(monkeypatch):
+    monkeypatch.setitem(sys.modules, "pymongoarrow", None) # import dá ImportError
+
+
+def _tickets():
+    return [
+        {"id": "1", "id_interno": 101, "cliente": "Energisa", "autor_email": "ana@energisa.com", "updated_at": 10},
+        {"id": "2", "id_interno": 102, "cliente": "Equatorial", "autor_email": "bia@eq.com", "updated_at": 30},
+        {"id": "3", "id_interno": "X-7", "cliente": "Energisa Sul", "autor_email": "caio@energisa.com", "updated_at": 20},
+        {"id": "4", "cliente": "Neoenergia", "updated_at": 40}, # Sem id_interno
+    ]
+
+
+def test_salvar_lote_devolve_o_resumo(banco):
+    assert utils.salvar_lote_tickets_mongo(_tickets(), tamanho_lote=3) == {"gravados": 4, "ignorados": 0, "falhas": 0}
+    assert utils.salvar_lote_tickets_mongo(_tickets()) == {"gravados": 0, "ignorados": 4, "falhas": 0}
+    assert utils._salvar_lote_mongo(None, _tickets(), 3) == {"gravados": 0, "ignorados": 0, "falhas": 4}
+
+
+def test_leitura_em_lotes_sem_pymongoarrow(banco, sem_pymongoarrow, sem_indice_texto):
+    utils.salvar_lote_tickets_mongo(_tickets())
+
+    # Lote de 2: o id_interno vem int no primeiro lote e misturado no segundo, então a coluna vira texto
+    df = utils.carregar_tickets_mongo(tamanho_lote=2)
+    assert list(df.columns) == utils.CAMPOS_TICKET_EXIBIDOS
+    assert df["id"].tolist() == ["4", "2", "3", "1"] # Do mais recente para o mais antigo
+    assert df["id_interno"].isna().tolist() == [True, False, False, False]
+    assert df["id_interno"].tolist()[1:] == ["102", "X-7", "101"]
+    assert all(isinstance(t, pd.ArrowDtype) for t in df.dtypes)
+
+    assert utils.carregar_tickets_mongo(limite=2, tamanho_lote=1)["id"].tolist() == ["4", "2"]
+    assert utils.carregar_tickets_mongo("energ")["id"].tolist() == ["3", "1"] # Começo do nome, sem maiúsculas
+    assert utils.carregar_tickets_mongo("caio@", campos=["id", "autor_email"]).values.tolist() == [["3", "caio@energisa.com"]]
+
+
+def test_leitura_sem_resultado_devolve_colunas(banco, sem_pymongoarrow, sem_indice_texto):
+    df = utils.carregar_tickets_mongo("ninguém")
+    assert df.empty and list(df.columns) == utils.CAMPOS_TICKET_EXIBIDOS
+
+
+def test_leitura_pelo_pymongoarrow(banco, monkeypatch):
+    chamadas = []
+
+    def find_arrow_all(collection, filtro, **opcoes):
+        chamadas.append((collection.name, filtro, opcoes))
+        return pa.table({"id": ["2", "1"], "updated_at": [30, 10]})
+
+    api = types.ModuleType("pymongoarrow.api")
+    api.find_arrow_all = find_arrow_all
+    monkeypatch.setitem(sys.modules, "pymongoarrow", types.ModuleType("pymongoarrow"))
+    monkeypatch.setitem(sys.modules, "pymongoarrow.api", api)
+
+    df = utils.carregar_tickets_mongo("2", campos=["id", "updated_at"], limite=5, tamanho_lote=100)
+
+    assert df["id"].tolist() == ["2", "1"] and isinstance(df.dtypes["id"], pd.ArrowDtype)
+    nome, filtro, opcoes = chamadas[0]
+    assert nome == "tickets" and {"id": "2"} in filtro["$or"]
+    assert opcoes == {
+        "projection": {"id": 1, "updated_at": 1, "_id": 0},
+        "sort": [("updated_at", -1)],
+        "limit": 5,
+        "batch_size": 100,
+    }
@@ -0,0 +1,100 @@
+"""
+Vigilância de meta/SLA: só avisa quem mudou de estado, não avança o cursor com download pela metade
+e retoma o estado salvo sem alertar de novo.
+"""
+import json
+import time
+
+import vigilancia
+from vigilancia import DetectorViolacoes, Vigia
+
+
+def _conversa(cid, admin="7", motivo=None, updated_at=None, segundos=3600):
+    return {
+        "id": cid, "state": "closed", "created_at": vigilancia.inicio_do_mes(), "updated_at": updated_at or int(time.time()),
+        "admin_assignee_id": admin, "team_assignee_id": None,
+        "custom_attributes": {"motivo_contato": motivo} if motivo else {},
+        "statistics": {"time_to_close": segundos},
+    }
+
+
+def _detector():
+    return DetectorViolacoes(minimo_analista=4, minimo_motivo=2, limite_padrao_seg=2 * 3600, times=None)
+
+
+def test_so_alerta_quando_muda_de_estado():
+    detector = _detector()
+    nomes = {"7": "Ana"}
+    # Primeira rodada só monta a base: Ana já está abaixo da meta, mas isso não é novidade
+    base = [_conversa(i, motivo="Financeiro" if i < 2 else None) for i in range(4)]
+    assert detector.processar(base, nomes) == []
+    assert detector.resumo()["violacoes"] == ["analista:7"]
+
+    # Continua abaixo da meta: nada de repetir o alerta
+    assert detector.processar([_conversa(4)], nomes) == []
+
+    # As pendentes foram classificadas: um alerta de volta à meta
+    corrigidas = [_conversa(i, motivo="Financeiro") for i in range(2, 5)]
+    alertas = detector.processar(corrigidas, nomes)
+    assert len(alertas) == 1 and alertas[0].startswith("✅ Ana voltou para 100.0%")
+
+    # Motivo passou do limite de 2h: entra em violação uma vez só
+    lentas = [_conversa(i, motivo="Financeiro", segundos=6 * 3600) for i in range(5)]
+    assert [a[0] for a in detector.processar(lentas, nomes)] == ["🐢"]
+    assert detector.processar(lentas, nomes) == []
+    assert detector.resumo()["violacoes"] == ["motivo:Financeiro"]
+
+
+def test_download_pela_metade_nao_avanca_cursor(monkeypatch):
+    inicio = vigilancia.inicio_do_mes()
+    respostas = [
+        ([_conversa(i, updated_at=inicio + 10 + i) for i in range(4)], False), # Faltou página
+        ([_conversa(i, updated_at=inicio + 10 + i) for i in range(6)], True),
+    ]
+    pedidos = []
+
+    def buscar_alteradas(cliente, desde_ts, team_ids=None):
+        pedidos.append(desde_ts)
+        return respostas.pop(0)
+
+    monkeypatch.setattr(vigilancia, "buscar_alteradas", buscar_alteradas)
+    monkeypatch.setattr(vigilancia, "buscar_admins", lambda cliente: {"7": "Ana"})
+    monkeypatch.setattr(vigilancia, "buscar_definicoes_atributos", lambda cliente: {"motivo_contato": "Motivo de Contato"})
+
+    alertas = []
+    vigia = Vigia(_detector(), cliente=None, alertar=alertas.append)
+    cursor_inicial = vigia.detector.cursor
+
+    vigia.rodar_uma_vez()
+    assert vigia.detector.cursor == cursor_inicial # A próxima rodada busca de novo a partir daqui
+    assert not vigia.detector.base_pronta # Com a base incompleta, a violação da Ana ainda não é "nova"
+
+    vigia.rodar_uma_vez()
+    assert pedidos == [cursor_inicial - 1, cursor_inicial - 1]
+    assert alertas == [] # Ana já estava sem classificar nada antes: não é transição
+    assert vigia.detector.base_pronta
+    assert vigia.detector.cursor == inicio + 15
+    assert vigia.ultima_rodada["completo"] is True
+
+
+def test_estado_salvo_volta_sem_repetir_alerta(tmp_path):
+    caminho = tmp_path / "vigilancia.json"
+    detector = _detector()
+    detector.processar([_conversa(i) for i in range(4)], {"7": "Ana"})
+    detector.salvar(caminho)
+
+    retomado = _detector()
+    assert retomado.carregar(caminho)
+    assert retomado.resumo() == detector.resumo()
+    assert retomado.base_pronta and retomado.analistas == {"7": [4, 0]}
+
+    # Reaplicar as mesmas conversas não alerta; classificar tudo gera o alerta de volta à meta
+    assert retomado.processar([_conversa(i) for i in range(4)], {"7": "Ana"}) == []
+    alertas = retomado.processar([_conversa(i, motivo="Financeiro") for i in range(4)], {"7": "Ana"})
+    assert len(alertas) == 1 and alertas[0].startswith("✅ Ana")
+
+    # Estado de outro mês não vale
+    dados = json.loads(caminho.read_text(encoding="utf-8"))
+    dados["periodo"] -= 40 * 24 * 3600
+    caminho.write_text(json.dumps(dados), encoding="utf-8")
+    assert not _detector().carregar(caminho)
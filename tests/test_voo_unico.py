@@ -0,0 +1,83 @@
+"""
+Single-flight das consultas: o que a líder repassa (ou não) para as seguidoras.
+"""
+import threading
+import time
+
+import pytest
+
+from voo_unico import VooUnico
+
+
+class Interrompida(BaseException):
+    """Faz o papel do RerunException/StopException do Streamlit (controle de fluxo, não erro)."""
+
+
+def _rodar(voo, chave, funcao, saida):
+    try:
+        saida.append(voo.executar(chave, funcao))
+    except BaseException as e:
+        saida.append(e)
+
+
+def _esperar_lider(voo, chave):
+    # Só segue quando a líder já está no meio da chamada
+    while not voo.em_andamento(chave):
+        time.sleep(0.01)
+
+
+def test_erro_da_lider_vai_para_as_seguidoras():
+    voo = VooUnico()
+    liberar = threading.Event()
+
+    def falha():
+        liberar.wait()
+        raise ValueError("API fora")
+
+    saida = []
+    lider = threading.Thread(target=_rodar, args=(voo, "k", falha, saida))
+    lider.start()
+    _esperar_lider(voo, "k")
+    seguidora = threading.Thread(target=_rodar, args=(voo, "k", lambda: "nunca", saida))
+    seguidora.start()
+    time.sleep(0.05)
+    liberar.set()
+    lider.join()
+    seguidora.join()
+
+    assert len(saida) == 2 and all(isinstance(r, ValueError) for r in saida)
+
+
+def test_interrupcao_da_lider_nao_vaza_e_seguidora_assume():
+    voo = VooUnico()
+    liberar = threading.Event()
+
+    def interrompida():
+        liberar.wait()
+        raise Interrompida()
+
+    saida_lider, saida_seguidora = [], []
+    lider = threading.Thread(target=_rodar, args=(voo, "k", interrompida, saida_lider))
+    lider.start()
+    _esperar_lider(voo, "k")
+    seguidora = threading.Thread(target=_rodar, args=(voo, "k", lambda: "dados", saida_seguidora))
+    seguidora.start()
+    time.sleep(0.05)
+    liberar.set()
+    lider.join()
+    seguidora.join()
+
+    assert isinstance(saida_lider[0], Interrompida)
+    assert saida_seguidora == [("dados", "lider")]
+    assert not voo.em_andamento("k")
+
+
+def test_controle_de_fluxo_chega_na_propria_sessao():
+    voo = VooUnico()
+
+    def interrompida():
+        raise Interrompida()
+
+    with pytest.raises(Interrompida):
+        voo.executar("k", interrompida)
+    assert voo.executar("k", lambda: 1) == (1, "lider")
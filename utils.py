@@ -1,135 +1,201 @@
 import streamlit as st # O arquiteto. Eu preciso dele pra acessar os 'secrets' (o cofre de senhas).
-import requests # O motoboy. É ele que leva e traz as mensagens pra API.
 import time # O relógio. Essencial pra gente saber quanto tempo esperar quando a API cansa.
-import pymongo
-
-import streamlit as st
-import requests
-import time
-
-def check_password():
-    """
-    Verifica a senha e retorna o NÍVEL DE ACESSO:
-    - Retorna "gestor" se usar a senha de admin.
-    - Retorna "analista" se usar a senha do time.
-    - Retorna False se não estiver logado.
-    """
-    
-    # 1. Verifica se já está logado na sessão
-    if st.session_state.get("password_correct", False):
-        return st.session_state.get("user_role", None)
-
-    # 2. Função de validação ao digitar
-    def password_entered():
-        senha_digitada = st.session_state["password_input"]
-        
-        if senha_digitada == st.secrets["SENHA_GESTOR"]:
-            st.session_state["password_correct"] = True
-            st.session_state["user_role"] = "gestor" # <--- Crachá de Chefe
-            del st.session_state["password_input"]
-            
-        elif senha_digitada == st.secrets["SENHA_TIME"]:
-            st.session_state["password_correct"] = True
-            st.session_state["user_role"] = "analista" # <--- Crachá de Analista
-            del st.session_state["password_input"]
-            
-        else:
-            st.session_state["password_correct"] = False
-
-    # 3. Caixa de Login
-    st.markdown("### 🔒 Acesso Restrito")
-    st.text_input(
-        "Digite sua senha de acesso:", 
-        type="password", 
-        on_change=password_entered, 
-        key="password_input"
+
+import hashlib
+import json
+import logging
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa # O formato colunar. É o "idioma nativo" do pandas por baixo dos panos.
+
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from acesso import check_password, logout_button # Ficam num módulo leve pra tela de login abrir rápido
+from alertas import criar_despachante
+from desempenho import iniciar_coleta, registros_atuais, medir, gravar_log
+from telemetria import ColetorTelemetria, TELEMETRIA_PROCESSO
+from nucleo import (
+    ClienteIntercom, INTERCOM_API_URL, WORKSPACE_ID, Workspace, workspaces_da_config, intervalo_ts, tabela_arrow,
+    buscar_definicoes_atributos, buscar_admins, buscar_conversas_workspaces, process_data, format_sla_string,
+    tabela_atributos, com_atributos, ArvoreMotivos, gerar_arquivo,
+)
+from acervo import AcervoPaginas
+from voo_unico import VooUnico
+from vigilancia import DetectorViolacoes, Vigia, SLA_RESOLUCAO_PADRAO_SEG, INTERVALO_VIGILANCIA_SEG
+
+logger = logging.getLogger(__name__)
+
+# --- TELEMETRIA DO INTERCOM ---
+ARQUIVO_METRICAS_PROMETHEUS = "intercom_metrics.prom" # Pode ser trocado pelo secret ARQUIVO_METRICAS_PROMETHEUS
+
+@st.cache_resource
+def _configurar_telemetria():
+    """Liga a exportação periódica do arquivo Prometheus (uma vez por processo)."""
+    TELEMETRIA_PROCESSO.caminho_prometheus = st.secrets.get("ARQUIVO_METRICAS_PROMETHEUS", ARQUIVO_METRICAS_PROMETHEUS)
+    return TELEMETRIA_PROCESSO
+
+def telemetria_sessao():
+    """Coletor da sessão atual (None quando a chamada vem de uma thread sem sessão)."""
+    if get_script_run_ctx() is None:
+        return None
+    if "_telemetria" not in st.session_state:
+        st.session_state["_telemetria"] = ColetorTelemetria()
+    return st.session_state["_telemetria"]
+
+# --- WORKSPACES ---
+TODOS_WORKSPACES = "🌐 Todos os workspaces"
+
+@st.cache_resource
+def workspaces():
+    """
+    Workspaces do secrets ([workspaces.<id>] ou o INTERCOM_TOKEN de sempre), criados uma vez por processo:
+    o pool HTTP e o orçamento de chamadas de cada um são divididos entre todas as sessões.
+    """
+    return workspaces_da_config(st.secrets.to_dict())
+
+def workspace_por_id(ws_id):
+    """Acha o workspace pelo id (inclusive o do token digitado na tela)."""
+    manual = st.session_state.get("_workspace_manual")
+    if manual is not None and manual.id == ws_id:
+        return manual
+    return workspaces()[ws_id]
+
+def escolher_workspaces(chave, permitir_todos=True):
+    """
+    Seletor de workspace na barra lateral (só aparece com mais de um configurado).
+    Sem token no secrets, pede o token na tela, como antes.
+    Devolve a lista de Workspace escolhidos (vazia = sem token).
+    """
+    configurados = workspaces()
+    if not configurados:
+        token = st.sidebar.text_input("Intercom Token", type="password", key=f"token_{chave}")
+        if not token:
+            return []
+        manual = st.session_state.get("_workspace_manual")
+        if manual is None or manual.token != token:
+            manual = Workspace(WORKSPACE_ID, token, base_url=st.secrets.get("INTERCOM_API_URL", INTERCOM_API_URL))
+            st.session_state["_workspace_manual"] = manual
+        return [manual]
+    if len(configurados) == 1:
+        return list(configurados.values())
+    opcoes = list(configurados) + ([TODOS_WORKSPACES] if permitir_todos else [])
+    escolha = st.sidebar.selectbox(
+        "Workspace:", opcoes, key=f"workspace_{chave}",
+        format_func=lambda ws_id: configurados[ws_id].nome if ws_id in configurados else ws_id,
     )
-    
-    # Mensagem de erro
-    if "password_correct" in st.session_state and not st.session_state["password_correct"]:
-        st.error("😕 Senha incorreta.")
+    return list(configurados.values()) if escolha == TODOS_WORKSPACES else [configurados[escolha]]
+
+def cliente_intercom(token=None, workspace=None):
+    """
+    Cliente do núcleo já com o jeito da tela: avisa a espera do rate limit num toast,
+    mostra erro quando desiste e anota a telemetria no processo e na sessão.
+    Com workspace, usa o token, o pool de conexões e o orçamento dele (sem nada, vai o primeiro workspace configurado).
+    """
+    _configurar_telemetria()
+    opcoes = dict(
+        coletores=(TELEMETRIA_PROCESSO, telemetria_sessao()),
+        # Aviso na tela (Toast) pro usuário não achar que travou. "Tô esperando, calma!"
+        ao_esperar=lambda segundos: st.toast(f"⏳ API cheia. Aguardando {segundos}s para o reset...", icon="🛑"),
+        ao_desistir=lambda: st.error("Falha na conexão com a API após várias tentativas."),
+    )
+    if workspace is None and token is None:
+        workspace = next(iter(workspaces().values()), None)
+    if workspace is not None:
+        return workspace.cliente(**opcoes)
+    return ClienteIntercom(token or "", base_url=st.secrets.get("INTERCOM_API_URL", INTERCOM_API_URL), **opcoes)
+
+# --- ACERVO DAS PÁGINAS CRUAS ---
+# Desligado por padrão (os dados ficam no disco do servidor): liga com o secret PASTA_ACERVO.
+
+@st.cache_resource
+def acervo_paginas():
+    """Acervo local das páginas baixadas (None se PASTA_ACERVO não estiver no secrets)."""
+    pasta = st.secrets.get("PASTA_ACERVO")
+    if not pasta:
+        return None
+    return AcervoPaginas(pasta, compressao=st.secrets.get("COMPRESSAO_ACERVO"))
 
-    return False
+def conversas_do_acervo(ids_workspaces, start, end, team_ids=None):
+    """Reprocessamento: (conversas, atributos, admins) lidos só do acervo, sem nenhuma chamada na API."""
+    ts_inicio, ts_fim = intervalo_ts(start, end)
+    with medir("ler_acervo"):
+        conversas, atributos, admins, faltando = acervo_paginas().reprocessar(ids_workspaces, ts_inicio, ts_fim, team_ids)
+    if faltando:
+        st.warning(f"⚠️ O acervo não tem uma busca completa desse período/times para: {', '.join(faltando)}. O resultado pode vir incompleto.")
+    return conversas, atributos, admins
 
 # O Motoboy Inteligente (make_api_request)
 #Essa é a função mais importante! Ela protege a gente de ser banida pelo Intercom.
-def make_api_request(method, url, json=None, params=None, max_retries=3):
+def make_api_request(method, url, json=None, params=None, max_retries=3, token=None, workspace=None):
     """
-    Faz chamadas API seguras respeitando o Rate Limit do Intercom.
-    Usa o header 'X-RateLimit-Reset' para espera inteligente.
+    Faz chamadas API seguras respeitando o Rate Limit do Intercom (a lógica mora no ClienteIntercom do nucleo.py).
     Se o Intercom disser "PARE" (Erro 429), eu espero o tempo certo em vez de insistir.
     """
-    token = st.secrets.get("INTERCOM_TOKEN", "") # Pego o meu crachá (Token) lá no cofre. Se não tiver, uso vazio "".
-    headers = { # Coloco o uniforme oficial pra API me respeitar
-        "Authorization": f"Bearer {token}",
-        "Accept": "application/json",
-        "Content-Type": "application/json"
-    }
-# Eu tento 3 vezes (max_retries). Se a internet piscar, eu tento de novo.
-    for attempt in range(max_retries):
-        try:
-            if method.upper() == "POST": # Se for pra enviar dados (POST)..
-                response = requests.post(url, json=json, params=params, headers=headers)
-            else: # Se for só pra ler dados (GET)..
-                response = requests.get(url, params=params, headers=headers)
-            
-            if response.status_code == 200: # Se deu tudo certo (Código 200), eu devolvo o presente (os dados em JSON).
-                return response.json()
-            # 🛑 AQUI É O PULO DO GATO! Se deu Erro 429 (Rate Limit)...
-            elif response.status_code == 429: # Rate Limit
-                # Lógica Inteligente baseada na documentação do Intercom
-                reset_time = response.headers.get("X-RateLimit-Reset")
-                
-                if reset_time:
-                    try:
-                        wait_seconds = int(reset_time) - int(time.time()) + 1 # Calculo: Hora de liberar - Hora de agora + 1 segundinho de margem.
-                    except ValueError:
-                        wait_seconds = (2 ** attempt) + 1 # Se o cálculo der ruim, espero um pouquinho exponencialmente (2s, 4s, 8s...).
-                else:
-                    # Se eles não disserem o tempo, eu chuto um tempo seguro.
-                    wait_seconds = (2 ** attempt) + 1
-                
-                # Garanto que nunca vou esperar tempo negativo (o que seria viagem no tempo rs).
-                wait_seconds = max(1, wait_seconds)
-                # Aviso na tela (Toast) pro usuário não achar que travou. "Tô esperando, calma!"
-                st.toast(f"⏳ API cheia. Aguardando {wait_seconds}s para o reset...", icon="🛑")
-                time.sleep(wait_seconds) # O código dorme. Zzz...
-                continue # Acordou? Tenta de novo (volta pro começo do loop).
-            
-            else:
-                # Se for outro erro bizarro (tipo 500 ou 404), eu anoto no console pra investigar depois.
-                print(f"Erro API {response.status_code}: {response.text}")
-                return None
-                
-        except Exception as e:
-            print(f"Erro de Conexão: {e}") # Se a internet cair ou o computador explodir...
-            return None
-            
-    st.error("Falha na conexão com a API após várias tentativas.") # Se eu tentei 3 vezes e falhei em todas... desisto.
-    return None
+    return cliente_intercom(token, workspace).chamar(method, url, json=json, params=params, max_retries=max_retries)
+
 #A Fofoqueira (send_slack_alert)
-#Essa função leva as notícias pro Slack.
-def send_slack_alert(message):
-    """Envia notificação para o Slack se o webhook estiver configurado."""
-    # Tento pegar o endereço do Slack no cofre.
-    webhook = st.secrets.get("SLACK_WEBHOOK")
-    
+#Essa função leva as notícias pro Slack. Quem envia de verdade é o despachante (alertas.py), numa thread separada.
+SLACK_INTERVALO_SEG = 10 # Alertas que chegam nessa janela viram uma mensagem só
+
+@st.cache_resource
+def despachante_slack():
+    """Um despachante por processo (None se o webhook não estiver configurado)."""
+    webhook = st.secrets.get("SLACK_WEBHOOK") # Tento pegar o endereço do Slack no cofre.
     if not webhook:
-        # Se eu esqueci de colocar o endereço, eu aviso no console e não faço nada.
-        print("❌ ERRO: Webhook do Slack não encontrado nos secrets.") 
+        return None
+    return criar_despachante(webhook, intervalo_seg=st.secrets.get("SLACK_INTERVALO_SEG", SLACK_INTERVALO_SEG))
+
+def send_slack_alert(message):
+    """Coloca a notificação na fila do Slack (não espera o envio) se o webhook estiver configurado."""
+    despachante = despachante_slack()
+    if despachante is None:
+        # Se eu esqueci de colocar o endereço, aviso no log e não faço nada.
+        logger.warning("Webhook do Slack não encontrado nos secrets; alerta descartado: %s", message)
         return
+    despachante.enviar(message)
 
-    payload = {"text": message} # Embrulho a mensagem num pacote que o Slack entende (JSON).
-    
-    try: # Envio o pacote! 🚀
-        requests.post(webhook, json=payload)
-    except Exception as e: # Se o Slack estiver fora do ar, eu anoto o erro.
-        print(f"Erro ao enviar alerta Slack: {e}")
+# --- VIGILÂNCIA (meta de classificação e SLA de resolução, em segundo plano) ---
+ARQUIVO_VIGILANCIA = "vigilancia_estado.json" # Pode ser trocado pelo secret ARQUIVO_VIGILANCIA
+
+@st.cache_resource
+def iniciar_vigilancia():
+    """
+    Liga a thread que olha só as conversas alteradas e avisa no Slack quando alguém entra ou sai da meta/SLA.
+    Uma por processo, e só se VIGILANCIA_ATIVA = true no secrets.
+    """
+    if not st.secrets.get("VIGILANCIA_ATIVA"):
+        return None
+    _configurar_telemetria()
+    despachante_slack() # Já deixa o despachante criado antes da thread começar a mandar alerta
+    workspace = next(iter(workspaces().values()), None) # Vigia o primeiro workspace do secrets
+    if workspace is None:
+        return None
+    detector = DetectorViolacoes(
+        limites_motivo=st.secrets.get("SLA_RESOLUCAO_MOTIVOS_SEG"),
+        limite_padrao_seg=st.secrets.get("SLA_RESOLUCAO_PADRAO_SEG", SLA_RESOLUCAO_PADRAO_SEG),
+        times=workspace.times_suporte,
+    )
+    # Sem os callbacks de tela: a thread não tem sessão pra mostrar toast
+    cliente = workspace.cliente()
+    vigia = Vigia(
+        detector, cliente, alertar=send_slack_alert,
+        intervalo_seg=st.secrets.get("VIGILANCIA_INTERVALO_SEG", INTERVALO_VIGILANCIA_SEG),
+        arquivo_estado=st.secrets.get("ARQUIVO_VIGILANCIA", ARQUIVO_VIGILANCIA),
+    )
+    return vigia.iniciar()
 
 # Variável global para manter a conexão aberta (cache de conexão)
 @st.cache_resource
 def init_mongo_connection():
     """Conecta ao MongoDB Atlas usando a URI dos secrets."""
+    import pymongo # Só carrega quando alguém usa o MongoDB (deixa o login mais rápido)
     try:
         uri = st.secrets["MONGO_URI"]
         client = pymongo.MongoClient(uri)
@@ -140,72 +206,910 @@ def init_mongo_connection():
         st.error(f"Erro ao conectar no MongoDB: {e}")
         return None
 
-def salvar_lote_tickets_mongo(lista_tickets):
-    """Salva/Atualiza uma lista de tickets no MongoDB."""
-    client = init_mongo_connection()
-    if not client: return 0
-    
-    db = client["suporte_db"] # Nome do seu banco
-    collection = db["tickets"] # Nome da 'tabela'
-    
-    operacoes = []
-    for ticket in lista_tickets:
-        # UpdateOne com upsert=True: Se existe, atualiza. Se não, cria.
-        # Usamos o 'id' do Intercom como chave única
-        op = pymongo.UpdateOne(
-            {"id": ticket["id"]}, 
-            {"$set": ticket}, 
-            upsert=True
-        )
-        operacoes.append(op)
-    
-    if operacoes:
-        resultado = collection.bulk_write(operacoes)
-        return resultado.upserted_count + resultado.modified_count
-    return 0
+# Campos que a tela de tickets mostra. A busca só traz isso do banco (projeção).
+CAMPOS_TICKET_EXIBIDOS = ["id", "id_interno", "cliente", "autor_nome", "autor_email", "team_assignee_id", "created_at", "updated_at"]
+
+INTERVALO_RETENTAR_INDICES_SEG = 300 # Se a criação dos índices falhar, tenta de novo depois disso
+
+@st.cache_resource
+def _estado_indices_mongo():
+    """Se os índices já estão criados e se o de texto existe (um por processo)."""
+    return {"ok": False, "texto": False, "tentativa": 0.0, "lock": threading.Lock()}
 
-def carregar_tickets_mongo(termo_busca=None):
+def garantir_indices_mongo():
     """
-    Traz tickets. Se termo_busca for None, traz TODOS (limite de 1000).
-    Se tiver termo, busca por ID, ID Interno ou Nome.
+    Cria os índices da coleção de tickets (na primeira conexão do processo).
+    create_index não faz nada se o índice já existir, então é seguro chamar sempre.
+    Só o sucesso fica guardado: se falhar (banco fora do ar, 'id' duplicado), tenta de novo mais tarde.
     """
+    import pymongo
+    estado = _estado_indices_mongo()
+    with estado["lock"]:
+        if estado["ok"] or time.time() - estado["tentativa"] < INTERVALO_RETENTAR_INDICES_SEG:
+            return estado["ok"]
+        estado["tentativa"] = time.time()
+
+        client = init_mongo_connection()
+        if not client: return False
+
+        collection = client["suporte_db"]["tickets"]
+        indices = [
+            pymongo.IndexModel([("id", pymongo.ASCENDING)], unique=True, name="id_unico"),
+            pymongo.IndexModel([("updated_at", pymongo.DESCENDING)], name="updated_at"),
+            pymongo.IndexModel([("id_interno", pymongo.ASCENDING)], name="id_interno"),
+            pymongo.IndexModel([("created_at", pymongo.DESCENDING)], name="created_at"),
+            pymongo.IndexModel([("team_assignee_id", pymongo.ASCENDING)], name="team_assignee_id"),
+            # Busca por palavra (nome da empresa, nome do usuário, email)
+            pymongo.IndexModel(
+                [("cliente", pymongo.TEXT), ("autor_nome", pymongo.TEXT), ("autor_email", pymongo.TEXT)],
+                name="busca_texto", default_language="portuguese"
+            ),
+            # Busca pelo começo do texto (^termo) usa esses índices
+            pymongo.IndexModel([("cliente", pymongo.ASCENDING)], name="cliente_prefixo"),
+            pymongo.IndexModel([("autor_nome", pymongo.ASCENDING)], name="autor_nome_prefixo"),
+            pymongo.IndexModel([("autor_email", pymongo.ASCENDING)], name="autor_email_prefixo"),
+        ]
+        # Conversas do relatório (modo MongoDB): coleção própria, o id de conversa pode bater com o de ticket
+        indices_conversas = [
+            pymongo.IndexModel([("id", pymongo.ASCENDING)], unique=True, name="id_unico"),
+            pymongo.IndexModel([("created_at", pymongo.DESCENDING)], name="created_at"),
+            pymongo.IndexModel([("team_assignee_id", pymongo.ASCENDING)], name="team_assignee_id"),
+        ]
+        ok = True
+        # Um por um: se um índice falhar (ex: 'id' duplicado impede o unique), os outros ainda são criados.
+        for colecao, lista in [(collection, indices), (client["suporte_db"]["conversas"], indices_conversas)]:
+            for indice in lista:
+                try:
+                    colecao.create_indexes([indice])
+                except pymongo.errors.PyMongoError as e:
+                    print(f"Erro ao criar índice {colecao.name}.{indice.document['name']}: {e}")
+                    ok = False
+        try:
+            estado["texto"] = "busca_texto" in collection.index_information()
+        except pymongo.errors.PyMongoError:
+            estado["texto"] = False
+        estado["ok"] = ok
+        return ok
+
+def indice_texto_mongo():
+    """True se a coleção tem o índice de texto (sem ele, o $text dá erro e a busca fica só no ^prefixo)."""
+    return _estado_indices_mongo()["texto"]
+
+def _colecao_tickets():
+    """Devolve a coleção de tickets (com os índices garantidos) ou None se o banco não estiver disponível."""
+    client = init_mongo_connection()
+    if not client: return None
+    garantir_indices_mongo()
+    return client["suporte_db"]["tickets"]
+
+def _colecao_conversas():
+    """Coleção das conversas do relatório (alimenta o modo MongoDB) ou None se o banco não estiver disponível."""
     client = init_mongo_connection()
-    if not client: return []
-    
-    db = client["suporte_db"]
-    collection = db["tickets"]
-    
-    filtro = {}
-    
-    # Só aplica filtro se o usuário digitou algo
-    if termo_busca and str(termo_busca).strip() != "":
-        termo_str = str(termo_busca).strip()
-        regex_busca = {"$regex": termo_str, "$options": "i"}
-        
-        filtro = {
-            "$or": [
-                {"id_interno": termo_str},          # ID exato da empresa
-                {"cliente": regex_busca},           # Nome da empresa (Energisa...)
-                {"autor_nome": regex_busca},        # Nome do usuário
-                {"autor_email": regex_busca},       # Email
-                {"id": termo_str}                   # ID do Ticket
-            ]
+    if not client: return None
+    garantir_indices_mongo()
+    return client["suporte_db"]["conversas"]
+
+TAMANHO_LOTE_MONGO = 1000 # Quantos tickets vão em cada bulk_write
+
+def hash_ticket(ticket):
+    """Impressão digital do conteúdo do ticket (muda se qualquer campo mudar)."""
+    conteudo = json.dumps(ticket, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha1(conteudo.encode("utf-8")).hexdigest()
+
+def salvar_lote_tickets_mongo(lista_tickets, tamanho_lote=TAMANHO_LOTE_MONGO):
+    """
+    Salva/Atualiza uma lista de tickets no MongoDB, em lotes.
+    Cada documento guarda o hash do seu conteúdo: se o ticket não mudou, nem é enviado.
+    Retorna {"gravados": ..., "ignorados": ..., "falhas": ...}.
+    """
+    return _salvar_lote_mongo(_colecao_tickets(), lista_tickets, tamanho_lote)
+
+def salvar_lote_conversas_mongo(lista_conversas, tamanho_lote=TAMANHO_LOTE_MONGO):
+    """Mesmo esquema dos tickets, na coleção de conversas (a que o modo MongoDB agrega)."""
+    return _salvar_lote_mongo(_colecao_conversas(), lista_conversas, tamanho_lote)
+
+def _salvar_lote_mongo(collection, lista_tickets, tamanho_lote):
+    """Upsert em lotes pelo 'id', pulando quem tem o mesmo hash_conteudo no banco."""
+    import pymongo
+    resumo = {"gravados": 0, "ignorados": 0, "falhas": 0}
+    if collection is None:
+        resumo["falhas"] = len(lista_tickets)
+        return resumo
+
+    for inicio in range(0, len(lista_tickets), tamanho_lote):
+        lote = lista_tickets[inicio:inicio + tamanho_lote]
+        hashes = {ticket["id"]: hash_ticket(ticket) for ticket in lote}
+
+        # Pergunta pro banco (pelo índice de 'id') qual hash ele já tem de cada ticket
+        existentes = {
+            doc["id"]: doc.get("hash_conteudo")
+            for doc in collection.find({"id": {"$in": list(hashes)}}, {"_id": 0, "id": 1, "hash_conteudo": 1})
         }
-    
-    # Traz os últimos 1000 tickets para não travar a tela
-    cursor = collection.find(filtro, {"_id": 0}).sort("updated_at", -1).limit(1000)
-    
-    return list(cursor)
-
-def logout_button():
-    """Desenha um botão de sair na barra lateral"""
-    # Linha divisória para separar dos filtros
-    st.sidebar.markdown("---") 
-    
-    if st.sidebar.button("🚪 Sair do Sistema"):
-        # Limpa as chaves de autenticação
-        st.session_state["password_correct"] = False
-        st.session_state["user_role"] = None
-        
-        # Força o recarregamento da página para voltar ao Login
-        st.rerun()
+
+        operacoes = []
+        for ticket in lote:
+            novo_hash = hashes[ticket["id"]]
+            if existentes.get(ticket["id"]) == novo_hash:
+                resumo["ignorados"] += 1 # Nada mudou, não precisa reescrever
+                continue
+            # UpdateOne com upsert=True: Se existe, atualiza. Se não, cria.
+            # Usamos o 'id' do Intercom como chave única
+            operacoes.append(pymongo.UpdateOne(
+                {"id": ticket["id"]},
+                {"$set": {**ticket, "hash_conteudo": novo_hash}},
+                upsert=True
+            ))
+
+        if not operacoes:
+            continue
+
+        # ordered=False: um erro não para o resto do lote e o servidor pode paralelizar
+        try:
+            collection.bulk_write(operacoes, ordered=False)
+            resumo["gravados"] += len(operacoes)
+        except pymongo.errors.BulkWriteError as e:
+            falhas = len(e.details.get("writeErrors", []))
+            resumo["falhas"] += falhas
+            resumo["gravados"] += len(operacoes) - falhas
+            print(f"Erro ao salvar {falhas} tickets no MongoDB: {e.details.get('writeErrors', [])[:3]}")
+        except pymongo.errors.PyMongoError as e:
+            resumo["falhas"] += len(operacoes)
+            print(f"Erro ao salvar lote no MongoDB: {e}")
+    return resumo
+
+def filtro_busca_tickets(termo_busca, com_texto=True):
+    """
+    Monta o filtro da busca de tickets. Todos os ramos do $or usam índice:
+    ID e ID Interno exatos, palavras em cliente/nome/email (índice de texto, só com com_texto=True)
+    e começo do nome da empresa, do nome do usuário ou do email (regex ancorada com ^, sem diferenciar maiúsculas).
+    """
+    if not termo_busca or str(termo_busca).strip() == "":
+        return {}
+
+    termo_str = str(termo_busca).strip()
+    prefixo = {"$regex": "^" + re.escape(termo_str), "$options": "i"}
+    ramos = [
+        {"id": termo_str},                      # ID do Ticket
+        {"id_interno": termo_str},              # ID exato da empresa
+        {"cliente": prefixo},                   # Começo do nome da empresa (energ -> Energisa)
+        {"autor_nome": prefixo},                # Começo do nome do usuário
+        {"autor_email": prefixo},               # Começo do email
+    ]
+    if com_texto:
+        ramos.append({"$text": {"$search": termo_str}}) # Palavras em cliente / autor_nome / autor_email
+    return {"$or": ramos}
+
+# --- LEITURA COLUNAR (MONGO -> ARROW -> PANDAS) ---
+# Em vez de montar uma lista gigante de dicts, o cursor é lido em lotes e cada lote
+# vira colunas Arrow tipadas. Assim dá pra trazer tudo, sem limite de linhas.
+TAMANHO_LOTE_LEITURA = 5000
+
+def _unificar_colunas(pedacos):
+    """Junta os pedaços de uma coluna. Se os lotes vieram com tipos diferentes, a coluna vira texto."""
+    tipos = {p.type for p in pedacos if not pa.types.is_null(p.type)}
+    if not tipos:
+        return pa.chunked_array(pedacos, type=pa.null())
+    tipo_final = tipos.pop() if len(tipos) == 1 else pa.string()
+    convertidos = []
+    for p in pedacos:
+        if p.type != tipo_final:
+            try:
+                p = p.cast(tipo_final)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                p = pa.array([None if v is None else str(v) for v in p.to_pylist()], type=pa.string())
+        convertidos.append(p)
+    return pa.chunked_array(convertidos, type=tipo_final)
+
+def _lote_para_colunas(docs, campos, colunas):
+    """Transforma um lote de documentos em arrays Arrow (um por campo)."""
+    for campo in campos:
+        valores = [doc.get(campo) for doc in docs]
+        try:
+            colunas[campo].append(pa.array(valores))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            colunas[campo].append(pa.array([None if v is None else str(v) for v in valores], type=pa.string()))
+
+def carregar_tickets_mongo(termo_busca=None, campos=None, limite=None, tamanho_lote=TAMANHO_LOTE_LEITURA):
+    """
+    Traz tickets do MongoDB direto para um DataFrame com colunas Arrow, dos mais recentes para os mais antigos.
+    Se termo_busca for None, traz todos (ou os `limite` mais recentes); com termo, busca por ID, ID Interno,
+    Nome ou Email (sempre por índice). Só os campos exibidos (CAMPOS_TICKET_EXIBIDOS) saem do banco.
+    Usa o PyMongoArrow se estiver instalado; se não, lê o cursor em lotes e monta as colunas na mão.
+    """
+    import pymongo
+    campos = list(campos or CAMPOS_TICKET_EXIBIDOS)
+    collection = _colecao_tickets()
+    if collection is None: return pd.DataFrame(columns=campos)
+
+    filtro = filtro_busca_tickets(termo_busca, com_texto=indice_texto_mongo())
+    projecao = {campo: 1 for campo in campos}
+    projecao["_id"] = 0
+    ordem = [("updated_at", pymongo.DESCENDING)]
+
+    try:
+        from pymongoarrow.api import find_arrow_all # Opcional: conversão feita em C
+    except ImportError:
+        find_arrow_all = None
+
+    if find_arrow_all is not None:
+        tabela = find_arrow_all(collection, filtro, projection=projecao, sort=ordem, limit=limite or 0, batch_size=tamanho_lote)
+    else:
+        cursor = collection.find(filtro, projecao, batch_size=tamanho_lote).sort(ordem)
+        if limite:
+            cursor = cursor.limit(limite)
+
+        colunas = {campo: [] for campo in campos}
+        lote = []
+        for doc in cursor:
+            lote.append(doc)
+            if len(lote) >= tamanho_lote:
+                _lote_para_colunas(lote, campos, colunas)
+                lote = [] # Solta os dicts do lote: só as colunas Arrow ficam na memória
+        if lote:
+            _lote_para_colunas(lote, campos, colunas)
+
+        if not colunas[campos[0]]:
+            return pd.DataFrame(columns=campos)
+        tabela = pa.table({campo: _unificar_colunas(pedacos) for campo, pedacos in colunas.items()})
+
+    return tabela.to_pandas(types_mapper=pd.ArrowDtype)
+
+# --- AGREGAÇÕES NO MONGODB ---
+# Em vez de baixar tudo e contar no pandas, o próprio banco agrupa e devolve só o resumo.
+
+# Coluna do relatório -> campo do documento no Mongo
+CAMPOS_MONGO_CONVERSA = {
+    "ID": "id",
+    "timestamp_real": "created_at",
+    "timestamp_atualizacao": "updated_at",
+    "team_assignee_id": "team_assignee_id",
+    "Estado": "estado",
+    "Atendente": "atendente",
+    "Motivo de Contato": "motivo_contato",
+    "Motivo 2 (Se houver)": "motivo_2",
+    "Status do atendimento": "status_atendimento",
+    "CSAT Nota": "csat_nota",
+    "Tempo Resolução (seg)": "tempo_resolucao_seg",
+}
+
+def df_para_conversas(df):
+    """Converte as linhas do relatório em documentos pro Mongo (só os campos usados nas agregações)."""
+    colunas = [c for c in CAMPOS_MONGO_CONVERSA if c in df.columns]
+    base = df[colunas].rename(columns=CAMPOS_MONGO_CONVERSA)
+    base = base.astype(object).where(base.notna(), None) # NaN vira null no banco
+    return base.to_dict("records")
+
+def _match_periodo(ts_inicio, ts_fim, team_ids=None, extra=None):
+    """Primeiro estágio de todo pipeline: período (e times). Usa os índices de created_at/team_assignee_id."""
+    filtro = {"created_at": {"$gt": ts_inicio, "$lt": ts_fim}}
+    if team_ids:
+        filtro["team_assignee_id"] = {"$in": list(team_ids)}
+    if extra:
+        filtro.update(extra)
+    return {"$match": filtro}
+
+def _agregar(pipeline):
+    """Roda o pipeline e devolve um DataFrame (vazio se o banco não estiver disponível)."""
+    collection = _colecao_conversas()
+    if collection is None: return pd.DataFrame()
+    return pd.DataFrame(list(collection.aggregate(pipeline)))
+
+# Conta 1 quando o campo tem valor (equivalente ao notna() do pandas)
+def _conta_preenchido(campo):
+    return {"$sum": {"$cond": [{"$ifNull": [campo, False]}, 1, 0]}}
+
+def kpis_mongo(ts_inicio, ts_fim, team_ids=None):
+    """KPIs do topo do relatório: Total, Classificados, Resolvidos, Tempo Médio e Top Motivo."""
+    pipeline = [
+        _match_periodo(ts_inicio, ts_fim, team_ids),
+        {"$facet": {
+            "totais": [{"$group": {
+                "_id": None,
+                "total": {"$sum": 1},
+                "classificados": _conta_preenchido("$motivo_contato"),
+                "resolvidos": {"$sum": {"$cond": [{"$eq": ["$status_atendimento", "Resolvido"]}, 1, 0]}},
+                "tempo_medio": {"$avg": "$tempo_resolucao_seg"},
+            }}],
+            "top_motivo": [
+                {"$match": {"motivo_contato": {"$ne": None}}},
+                {"$group": {"_id": "$motivo_contato", "qtd": {"$sum": 1}}},
+                {"$sort": {"qtd": -1}},
+                {"$limit": 1},
+            ],
+        }},
+    ]
+    collection = _colecao_conversas()
+    if collection is None: return None
+    resultado = next(collection.aggregate(pipeline), {})
+
+    totais = (resultado.get("totais") or [{}])[0]
+    top = (resultado.get("top_motivo") or [{}])[0]
+    return {
+        "total": totais.get("total", 0),
+        "classificados": totais.get("classificados", 0),
+        "resolvidos": totais.get("resolvidos", 0),
+        "tempo_medio": totais.get("tempo_medio") or 0,
+        "top_motivo": top.get("_id"),
+    }
+
+def taxa_classificacao_mongo(ts_inicio, ts_fim, team_ids=None):
+    """Taxa de classificação por Atendente (apenas conversas fechadas)."""
+    pipeline = [
+        _match_periodo(ts_inicio, ts_fim, team_ids, extra={"estado": "Fechada"}),
+        {"$group": {"_id": "$atendente", "Total": {"$sum": 1}, "Classificados": _conta_preenchido("$motivo_contato")}},
+        {"$project": {
+            "_id": 0,
+            "Atendente": "$_id",
+            "Total": 1,
+            "Classificados": 1,
+            "Pendentes": {"$subtract": ["$Total", "$Classificados"]},
+            "Taxa (%)": {"$multiply": [{"$divide": ["$Classificados", "$Total"]}, 100]},
+        }},
+        {"$sort": {"Taxa (%)": -1}},
+    ]
+    resumo = _agregar(pipeline)
+    if not resumo.empty:
+        resumo["Taxa (%)"] = resumo["Taxa (%)"].round(1)
+    return resumo
+
+def ranking_motivos_mongo(ts_inicio, ts_fim, team_ids=None, limite=None):
+    """Ranking de motivos somando Motivo de Contato e Motivo 2 (igual à aba Top Motivos)."""
+    pipeline = [
+        _match_periodo(ts_inicio, ts_fim, team_ids),
+        {"$project": {"_id": 0, "motivos": ["$motivo_contato", "$motivo_2"]}},
+        {"$unwind": "$motivos"},
+        {"$match": {"motivos": {"$ne": None}}},
+        {"$group": {"_id": "$motivos", "Total": {"$sum": 1}}},
+        {"$sort": {"Total": -1}},
+    ]
+    if limite:
+        pipeline.append({"$limit": limite})
+    pipeline.append({"$project": {"_id": 0, "Motivo": "$_id", "Total": 1}})
+    return _agregar(pipeline)
+
+def csat_por_motivo_mongo(ts_inicio, ts_fim, team_ids=None):
+    """Média e quantidade de avaliações CSAT por Motivo de Contato."""
+    pipeline = [
+        _match_periodo(ts_inicio, ts_fim, team_ids, extra={"csat_nota": {"$ne": None}, "motivo_contato": {"$ne": None}}),
+        {"$group": {"_id": "$motivo_contato", "Média": {"$avg": "$csat_nota"}, "Qtd": {"$sum": 1}}},
+        {"$project": {"_id": 0, "Motivo de Contato": "$_id", "Média": 1, "Qtd": 1}},
+    ]
+    return _agregar(pipeline)
+
+def sla_por_atendente_mongo(ts_inicio, ts_fim, team_ids=None):
+    """Tempo médio de resolução (segundos) por Atendente."""
+    pipeline = [
+        _match_periodo(ts_inicio, ts_fim, team_ids, extra={"tempo_resolucao_seg": {"$ne": None}}),
+        {"$group": {"_id": "$atendente", "Tempo Resolução (seg)": {"$avg": "$tempo_resolucao_seg"}}},
+        {"$project": {"_id": 0, "Atendente": "$_id", "Tempo Resolução (seg)": 1}},
+        {"$sort": {"Tempo Resolução (seg)": 1}},
+    ]
+    return _agregar(pipeline)
+
+# --- REPOSITÓRIO COMPARTILHADO DE DATASETS ---
+# Antes cada gestor guardava a sua própria cópia da base na sessão. Agora a base fica uma vez só
+# no processo (chaveada pela consulta) e a sessão guarda apenas a chave.
+MEMORIA_DATASETS_MB = 1024 # Pode ser trocado pelo secret MEMORIA_DATASETS_MB
+VALIDADE_DATASET_SEG = 300 # Depois disso a cópia é atualizada em segundo plano
+IDADE_MAXIMA_OBSOLETO_SEG = 24 * 3600 # Mais velho que isso não vale mostrar enquanto atualiza: baixa na frente do usuário
+
+class RepositorioDatasets:
+    """Guarda DataFrames por chave, com limite de memória e descarte do menos usado (LRU)."""
+
+    def __init__(self, limite_bytes):
+        self.limite_bytes = limite_bytes
+        self.itens = OrderedDict() # chave -> {"df", "bytes", "criado_em"}
+        self.lock = threading.RLock()
+
+    def guardar(self, chave, df):
+        """Guarda (ou substitui) o dataset. Descarta os mais antigos se passar do limite."""
+        marcar_versao(df)
+        longos = tabela_atributos(df) # Atributos no formato longo também contam
+        tamanho = int(df.memory_usage(deep=True).sum()) + (longos.nbytes() if longos is not None else 0)
+        with self.lock:
+            self.itens.pop(chave, None)
+            self.itens[chave] = {"df": df, "bytes": tamanho, "criado_em": time.time()}
+            # O recém-chegado nunca é descartado, mesmo que sozinho passe do limite
+            while self.uso_total() > self.limite_bytes and len(self.itens) > 1:
+                chave_velha, _ = self.itens.popitem(last=False)
+                print(f"Repositório: descartando {chave_velha} (limite de memória)")
+        return df
+
+    def obter(self, chave, validade_seg=None):
+        """Devolve o DataFrame (ou None se não existe / foi descartado / está velho demais)."""
+        with self.lock:
+            item = self.itens.get(chave)
+            if item is None:
+                return None
+            if validade_seg is not None and time.time() - item["criado_em"] > validade_seg:
+                return None
+            self.itens.move_to_end(chave)
+            return item["df"]
+
+    def info(self, chave):
+        """Tamanho (bytes) e horário de criação do dataset."""
+        with self.lock:
+            item = self.itens.get(chave)
+            return None if item is None else {"bytes": item["bytes"], "criado_em": item["criado_em"], "versao": item["df"].attrs.get("versao")}
+
+    def uso_total(self):
+        """Soma (bytes) de todos os datasets guardados."""
+        with self.lock:
+            return sum(item["bytes"] for item in self.itens.values())
+
+@st.cache_resource
+def repositorio_datasets():
+    """Um repositório por processo, compartilhado por todas as sessões."""
+    limite_mb = float(st.secrets.get("MEMORIA_DATASETS_MB", MEMORIA_DATASETS_MB))
+    return RepositorioDatasets(int(limite_mb * 1024 * 1024))
+
+def chave_consulta(origem, start, end, team_ids=None, extra=None, ids_workspaces=None):
+    """Chave normalizada da consulta (workspaces e times em ordem, datas no formato ISO)."""
+    times = ",".join(str(t) for t in sorted(team_ids)) if team_ids else "todos"
+    chave = f"{origem}|{start.isoformat()}|{end.isoformat()}|{times}"
+    if ids_workspaces:
+        chave = "+".join(sorted(ids_workspaces)) + "|" + chave # Cada workspace no seu espaço de cache
+    if extra is not None:
+        chave += f"|{extra}"
+    return chave
+
+def dataset_da_sessao(nome):
+    """Busca no repositório o dataset cuja chave a sessão guardou em st.session_state[nome]."""
+    chave = st.session_state.get(nome)
+    if chave is None:
+        return None
+    return repositorio_datasets().obter(chave)
+
+# --- STALE-WHILE-REVALIDATE ---
+# Se a consulta já tem uma cópia (mesmo passada da validade), ela aparece na hora com o selo "atualizado há X min"
+# e uma thread baixa a versão nova. Quando chega, o repositório troca e a tela se atualiza sozinha.
+
+class AtualizadorDatasets:
+    """Refaz datasets vencidos em segundo plano (uma atualização por chave de cada vez)."""
+
+    def __init__(self, repo, max_threads=2):
+        self.repo = repo
+        self.executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="atualizador")
+        self.em_andamento = set()
+        self.erros = {} # chave -> mensagem da última falha
+        self.lock = threading.Lock()
+
+    def agendar(self, chave, carregar):
+        """carregar() devolve o DataFrame novo (ou None). False se essa chave já está sendo atualizada."""
+        with self.lock:
+            if chave in self.em_andamento:
+                return False
+            self.em_andamento.add(chave)
+        self.executor.submit(self._rodar, chave, carregar)
+        return True
+
+    def _rodar(self, chave, carregar):
+        try:
+            df = carregar()
+            if df is not None:
+                self.repo.guardar(chave, df)
+            self.erros.pop(chave, None)
+        except Exception as e: # A cópia velha continua valendo; o selo mostra o erro
+            self.erros[chave] = str(e)
+        finally:
+            with self.lock:
+                self.em_andamento.discard(chave)
+
+    def atualizando(self, chave):
+        with self.lock:
+            return chave in self.em_andamento
+
+@st.cache_resource
+def atualizador_datasets():
+    """Um atualizador por processo (as threads são divididas por todas as sessões)."""
+    return AtualizadorDatasets(repositorio_datasets())
+
+def reaproveitar_ou_revalidar(nome, chave, carregar):
+    """
+    Aponta a sessão pra cópia que já existe da consulta e devolve True (aí não precisa baixar na frente do usuário).
+    Se a cópia passou da validade, agenda carregar() em segundo plano. Sem cópia (ou velha demais), devolve False.
+    """
+    repo = repositorio_datasets()
+    if repo.obter(chave, validade_seg=IDADE_MAXIMA_OBSOLETO_SEG) is None:
+        return False
+    st.session_state[nome] = chave
+    if repo.obter(chave, validade_seg=VALIDADE_DATASET_SEG) is None:
+        atualizador_datasets().agendar(chave, carregar)
+    else:
+        st.toast("✅ Dados reaproveitados da memória do servidor.")
+    return True
+
+def recarregador_relatorio(modelo, start, end, team_ids, ids_workspaces):
+    """Função sem tela (roda na thread) que baixa e processa o relatório de novo, sem passar pelo cache."""
+    # Tudo que depende da sessão é lido aqui, antes de ir pra thread
+    lista = [workspace_por_id(w) for w in ids_workspaces]
+    acervo = acervo_paginas()
+
+    def carregar():
+        clientes = {ws.id: ws.cliente() for ws in lista}
+        mapa, admins = {}, {}
+        for cliente in clientes.values():
+            mapa.update(buscar_definicoes_atributos(cliente))
+            admins.update(buscar_admins(cliente))
+        falhas = []
+        raw = buscar_conversas_workspaces(clientes, start, end, team_ids, ao_erro=falhas.append, acervo=acervo)
+        if falhas:
+            raise RuntimeError(falhas[0]) # Download pela metade não substitui a cópia inteira
+        return process_data(raw, mapa, admins, modelo=modelo, workspace_id=ids_workspaces[0], atributos_longos=True) if raw else None
+    return carregar
+
+# --- SINGLE-FLIGHT ---
+# Duas sessões pedindo a mesma consulta ao mesmo tempo: só uma baixa, a outra espera e usa o resultado.
+# Com o secret PASTA_VOO_UNICO, vale também entre os processos do servidor (o resultado passa por essa pasta).
+
+@st.cache_resource
+def voo_unico():
+    """Um coordenador por processo."""
+    return VooUnico(st.secrets.get("PASTA_VOO_UNICO"), validade_resultado_seg=VALIDADE_DATASET_SEG)
+
+def carregar_uma_vez(chave, carregar, texto_spinner="Analisando dados..."):
+    """
+    Roda carregar() (que devolve o DataFrame ou None) com single-flight pela chave da consulta
+    e devolve o DataFrame já guardado no repositório do servidor.
+    """
+    repo = repositorio_datasets()
+    voo = voo_unico()
+
+    def carregar_e_guardar():
+        df = carregar()
+        return None if df is None else repo.guardar(chave, df) # Guarda antes de soltar as seguidoras
+
+    if voo.em_andamento(chave):
+        texto_spinner = "⏳ Outra sessão já está baixando essa mesma consulta. Aguardando o resultado dela..."
+    with st.spinner(texto_spinner):
+        df, papel = voo.executar(chave, carregar_e_guardar)
+    if papel == "outro_processo" and df is not None:
+        repo.guardar(chave, df)
+    if papel != "lider" and df is not None:
+        st.toast("🤝 Aproveitei o download que outra sessão estava fazendo.")
+    return df
+
+INTERVALO_SELO_SEG = 3 # De quanto em quanto tempo o selo confere se a versão nova chegou
+
+def selo_atualizacao(nome):
+    """Selo "atualizado há X min" do dataset da sessão; enquanto a versão nova não chega, confere a cada poucos segundos."""
+    chave = st.session_state.get(nome)
+    info = repositorio_datasets().info(chave)
+    if not info:
+        return
+    atualizador = atualizador_datasets()
+    rodando = atualizador.atualizando(chave)
+
+    def selo():
+        if rodando and not atualizador.atualizando(chave):
+            st.rerun() # Terminou (com a versão nova ou com erro): a página toda roda de novo e o selo para de conferir
+        minutos = int((time.time() - info["criado_em"]) // 60)
+        texto = "🕒 Atualizado agora há pouco" if minutos < 1 else f"🕒 Atualizado há {minutos} min"
+        if atualizador.atualizando(chave):
+            texto += " · 🔄 buscando a versão nova em segundo plano..."
+        elif chave in atualizador.erros:
+            texto += f" · ⚠️ não deu para atualizar ({atualizador.erros[chave]})"
+        st.caption(texto)
+
+    # Só fica conferindo enquanto tem atualização rodando (fora isso, o selo só muda no próximo rerun)
+    st.fragment(selo, run_every=INTERVALO_SELO_SEG if rodando else None)()
+
+def mostrar_uso_memoria(nome):
+    """Indicador na barra lateral: quanto o dataset da sessão ocupa e o uso total do servidor."""
+    repo = repositorio_datasets()
+    info = repo.info(st.session_state.get(nome))
+    if info:
+        st.sidebar.caption(
+            f"💾 Dados em memória: **{info['bytes'] / 1024**2:.1f} MB** · "
+            f"servidor: {repo.uso_total() / 1024**2:.1f} de {repo.limite_bytes / 1024**2:.0f} MB"
+        )
+
+# --- KPIs PARCIAIS DURANTE O DOWNLOAD ---
+INTERVALO_PARCIAL_SEG = 1 # Redesenha a faixa parcial no máximo uma vez por segundo (o download não pode pagar pela tela)
+
+class PainelParcial:
+    """Faixa de KPIs + ranking que vai se atualizando com o ResumoParcial enquanto as páginas chegam."""
+
+    def __init__(self, resumo, rotulo_top="Top Motivo", rotulo_classificados="Classificados"):
+        self.resumo = resumo
+        self.rotulo_top = rotulo_top
+        self.rotulo_classificados = rotulo_classificados
+        self.espaco = st.empty()
+        self.ultimo = 0
+
+    def atualizar(self, qtd):
+        """Serve de ao_progresso: roda na thread da tela."""
+        agora = time.monotonic()
+        if agora - self.ultimo < INTERVALO_PARCIAL_SEG:
+            return
+        self.ultimo = agora
+        foto = self.resumo.fotografia()
+        with self.espaco.container():
+            st.caption(f"⏳ **Parcial:** {qtd} conversas baixadas até agora. Os números ainda vão mudar até o download terminar.")
+            k1, k2, k3, k4, k5 = st.columns(5)
+            k1.metric("Total Conversas", foto["total"])
+            k2.metric(self.rotulo_classificados, foto["classificados"])
+            k3.metric("Resolvidos", foto["resolvidos"])
+            k4.metric("Tempo Médio", format_sla_string(foto["tempo_medio"]))
+            k5.metric(self.rotulo_top, str(foto["ranking"][0][0]).split(">")[-1].strip()[:20] if foto["ranking"] else "N/A")
+            if foto["ranking"]:
+                ranking = pd.DataFrame(foto["ranking"], columns=[self.resumo.campo_ranking, "Qtd"]).set_index(self.resumo.campo_ranking)
+                st.bar_chart(ranking, horizontal=True, height=300)
+
+    def limpar(self):
+        self.espaco.empty()
+
+# --- TABELA PAGINADA ---
+# O st.dataframe manda a base INTEIRA pro navegador a cada clique. Aqui a gente filtra,
+# ordena e fatia no servidor e só manda a página que está na tela.
+
+def marcar_versao(df):
+    """Carimba o DataFrame com uma versão nova (usada como chave dos caches de tela)."""
+    df.attrs["versao"] = time.time_ns()
+    return df
+
+def versao_dataset(df):
+    """Identifica o conteúdo do DataFrame: versão carimbada + quais linhas sobraram depois dos filtros."""
+    linhas = int(pd.util.hash_pandas_object(df.index, index=False).sum()) if len(df) else 0
+    return (df.attrs.get("versao"), len(df), linhas)
+
+def _cache_sessao(nome, limite=20):
+    """Dicionário LRU guardado na sessão (cada usuário tem o seu)."""
+    if nome not in st.session_state:
+        st.session_state[nome] = OrderedDict()
+    cache = st.session_state[nome]
+    while len(cache) > limite:
+        cache.popitem(last=False)
+    return cache
+
+def vista_atributos(df, nomes):
+    """
+    DataFrame com os atributos escolhidos materializados como coluna (o resto fica no formato longo).
+    Guarda a última vista da sessão: rerun sem mudar a seleção não materializa de novo.
+    """
+    cache = _cache_sessao("_cache_vista_atributos", limite=2)
+    chave = (df.attrs.get("versao"), tuple(nomes))
+    if chave not in cache:
+        cache[chave] = com_atributos(df, nomes)
+    cache.move_to_end(chave)
+    return cache[chave]
+
+def _posicoes_filtradas(df, colunas, busca, coluna_ordem, crescente):
+    """Aplica a busca e a ordenação e devolve as posições das linhas (sem copiar a base)."""
+    posicoes = np.arange(len(df))
+    if busca:
+        mascara = np.zeros(len(df), dtype=bool)
+        for col in colunas:
+            mascara |= df[col].astype(str).str.contains(busca, case=False, regex=False, na=False).to_numpy()
+        posicoes = posicoes[mascara]
+
+    if coluna_ordem and len(posicoes):
+        valores = df[coluna_ordem].iloc[posicoes].reset_index(drop=True)
+        try:
+            ordem = valores.sort_values(ascending=crescente, na_position="last", kind="stable").index.to_numpy()
+        except TypeError:
+            # Coluna com tipos misturados: ordena pelo texto
+            ordem = valores.astype(str).sort_values(ascending=crescente, kind="stable").index.to_numpy()
+        posicoes = posicoes[ordem]
+    return posicoes
+
+def exportacao_sob_demanda(df, chave, extensao, mime, colunas_selecionadas, modelo, nome_arquivo, **opcoes_botao):
+    """
+    Botão de download que só gera o arquivo quando alguém pede (a tabela e os filtros não pagam por ele).
+    O arquivo fica guardado na sessão por (versão da base, formato, colunas): baixar de novo não refaz.
+    """
+    cache = _cache_sessao("_cache_exportacao", limite=2) # Arquivos grandes: só os últimos
+    chave_arquivo = (chave, versao_dataset(df), extensao, tuple(colunas_selecionadas))
+    if chave_arquivo not in cache:
+        if not st.button("⚙️ Preparar arquivo", key=f"{chave}_preparar", use_container_width=True):
+            return
+        with medir("exportacao", formato=extensao, linhas=len(df)):
+            cache[chave_arquivo] = gerar_arquivo(df, extensao, colunas_selecionadas, modelo=modelo)
+    cache.move_to_end(chave_arquivo)
+    st.download_button("📥 Baixar", data=cache[chave_arquivo], file_name=f"{nome_arquivo}.{extensao}", mime=mime, key=f"{chave}_baixar", **opcoes_botao)
+
+def tabela_paginada(df, chave, colunas=None, column_config=None, chaves_ordenacao=None, tamanho_padrao=50):
+    """
+    Desenha uma tabela paginada com busca e ordenação feitas no servidor.
+    - chave: prefixo único dos widgets (uma tabela por chave).
+    - chaves_ordenacao: coluna exibida -> coluna usada pra ordenar (ex: "Data" -> "timestamp_real").
+    """
+    colunas = [c for c in (colunas or list(df.columns)) if c in df.columns]
+    chaves_ordenacao = chaves_ordenacao or {}
+
+    c_busca, c_ordem, c_direcao, c_tamanho = st.columns([3, 2, 1, 1])
+    with c_busca:
+        busca = st.text_input("🔍 Buscar na tabela:", key=f"{chave}_busca").strip()
+    with c_ordem:
+        ordenar_por = st.selectbox("Ordenar por:", ["(Padrão)"] + colunas, key=f"{chave}_ordem")
+    with c_direcao:
+        direcao = st.selectbox("Direção:", ["⬆️ Crescente", "⬇️ Decrescente"], key=f"{chave}_direcao")
+    with c_tamanho:
+        tamanho = st.selectbox("Linhas:", [25, 50, 100, 250], index=[25, 50, 100, 250].index(tamanho_padrao), key=f"{chave}_tamanho")
+
+    coluna_ordem = None
+    if ordenar_por != "(Padrão)":
+        coluna_ordem = chaves_ordenacao.get(ordenar_por, ordenar_por)
+        if coluna_ordem not in df.columns:
+            coluna_ordem = ordenar_por
+    crescente = direcao.startswith("⬆️")
+
+    # 1. Filtro + ordenação (só recalcula se a base, a busca ou a ordem mudarem)
+    versao = versao_dataset(df)
+    chave_consulta = (chave, versao, tuple(colunas), busca, coluna_ordem, crescente)
+    cache_posicoes = _cache_sessao("_cache_tabela_posicoes", limite=10)
+    if chave_consulta not in cache_posicoes:
+        cache_posicoes[chave_consulta] = _posicoes_filtradas(df, colunas, busca, coluna_ordem, crescente)
+    cache_posicoes.move_to_end(chave_consulta)
+    posicoes = cache_posicoes[chave_consulta]
+
+    # 2. Paginação
+    total = len(posicoes)
+    total_paginas = max(1, -(-total // tamanho))
+    chave_pagina = f"{chave}_pagina"
+    if st.session_state.get(chave_pagina, 1) > total_paginas:
+        st.session_state[chave_pagina] = 1 # A busca encolheu a lista: volta pra primeira página
+
+    c_info, c_pagina = st.columns([4, 1])
+    with c_pagina:
+        pagina = st.number_input("Página:", min_value=1, max_value=total_paginas, step=1, key=chave_pagina)
+    inicio = (pagina - 1) * tamanho
+    fim = min(inicio + tamanho, total)
+    with c_info:
+        st.caption(f"Linhas **{inicio + 1 if total else 0}–{fim}** de **{total}** (página {pagina} de {total_paginas}).")
+
+    # 3. Só a página visível vira Arrow (e fica guardada pra quando o usuário voltar nela)
+    chave_pagina_cache = chave_consulta + (tamanho, pagina)
+    cache_paginas = _cache_sessao("_cache_tabela_paginas", limite=20)
+    if chave_pagina_cache not in cache_paginas:
+        cache_paginas[chave_pagina_cache] = tabela_arrow(df[colunas].iloc[posicoes[inicio:fim]])
+    cache_paginas.move_to_end(chave_pagina_cache)
+
+    st.dataframe(
+        cache_paginas[chave_pagina_cache],
+        use_container_width=True,
+        hide_index=True,
+        column_config=column_config
+    )
+
+# --- CACHE DE GRÁFICOS ---
+# Montar figura do Plotly custa caro. Se a base e os controles não mudaram, a figura é a mesma.
+LIMIAR_WEBGL = 1000 # Acima disso, scatter vira WebGL (o navegador desenha na placa de vídeo)
+LIMITE_FIGURAS_CACHE = 64
+
+@st.cache_resource
+def _cache_figuras():
+    """Cache de figuras compartilhado pelo processo (protegido por lock)."""
+    return {"itens": OrderedDict(), "lock": threading.Lock()}
+
+def modo_render(qtd_pontos):
+    """Escolhe SVG para poucos pontos e WebGL para muitos."""
+    return "webgl" if qtd_pontos > LIMIAR_WEBGL else "svg"
+
+def grafico_em_cache(df, id_grafico, controles, construtor):
+    """
+    Devolve o resultado de construtor() memorizado por (versão da base, id do gráfico, controles).
+    O construtor pode devolver a figura ou uma tupla (figura, tabela auxiliar).
+    """
+    chave = (versao_dataset(df), id_grafico, controles)
+    cache = _cache_figuras()
+    with cache["lock"]:
+        if chave in cache["itens"]:
+            cache["itens"].move_to_end(chave)
+            return cache["itens"][chave]
+
+    with medir("grafico", id=id_grafico):
+        resultado = construtor()
+
+    with cache["lock"]:
+        cache["itens"][chave] = resultado
+        while len(cache["itens"]) > LIMITE_FIGURAS_CACHE:
+            cache["itens"].popitem(last=False)
+    return resultado
+
+# --- DRILL-DOWN DOS MOTIVOS ---
+
+def arvore_motivos(df, colunas=("Motivo de Contato",)):
+    """ArvoreMotivos do dataset: montada uma vez por versão da base (fica no cache das figuras, para todas as sessões)."""
+    return grafico_em_cache(df, "arvore_motivos", tuple(colunas), lambda: ArvoreMotivos(df, colunas))
+
+def navegar_arvore(arvore, chave):
+    """
+    Um seletor por nível, lado a lado: escolher um Motivo abre o nível de baixo.
+    Devolve o caminho escolhido (tupla; vazia = primeiro nível).
+    """
+    niveis = int(arvore.nos["Nível"].max()) if not arvore.nos.empty else 1
+    colunas = st.columns(niveis)
+    caminho = ()
+    for nivel, coluna in enumerate(colunas, start=1):
+        opcoes = arvore.filhos(caminho)["Motivo"].tolist()
+        if not opcoes:
+            break
+        with coluna:
+            # O caminho vai na key: trocar o nível de cima zera os de baixo
+            escolha = st.selectbox(f"Nível {nivel}:", ["(todos)"] + opcoes, key=f"{chave}_{nivel}_{'>'.join(caminho)}")
+        if escolha == "(todos)":
+            break
+        caminho += (escolha,)
+    return caminho
+
+# --- PAINEL DE DESEMPENHO ---
+ARQUIVO_LOG_DESEMPENHO = "perf_log.jsonl" # Pode ser trocado pelo secret ARQUIVO_LOG_DESEMPENHO
+
+def iniciar_medicao():
+    """Liga o cronômetro desta execução se o gestor ativou o painel ⏱ Performance."""
+    iniciar_coleta(st.session_state.get("perf_ativo", False))
+
+def _so_fragmento_rodando():
+    """True quando o Streamlit está rodando de novo só um fragmento (o resto da página não executa)."""
+    ctx = get_script_run_ctx()
+    return bool(ctx is not None and ctx.fragment_ids_this_run)
+
+@contextmanager
+def medicao_fragmento(pagina, nome):
+    """
+    Na execução completa, o que o fragmento mede entra na coleta da página (o painel_performance mostra).
+    Quando só o fragmento roda, a coleta começa ali e vai para o log no fim, com o total na própria seção
+    (a barra lateral só é redesenhada na execução completa).
+    """
+    if not _so_fragmento_rodando():
+        yield
+        return
+    iniciar_medicao()
+    registros = registros_atuais()
+    with medir("fragmento", nome=nome):
+        yield
+    if registros:
+        gravar_log(registros, st.secrets.get("ARQUIVO_LOG_DESEMPENHO", ARQUIVO_LOG_DESEMPENHO), pagina=pagina, fragmento=nome)
+        st.caption(f"⏱ {nome}: {registros[-1]['ms']:.0f} ms (só esta seção rodou)")
+
+def fragmento_medido(pagina):
+    """Igual ao @st.fragment, com a medição de cada execução do fragmento (ver medicao_fragmento)."""
+    def decorar(funcao):
+        @wraps(funcao)
+        def rodar(*args, **kwargs):
+            with medicao_fragmento(pagina, funcao.__name__):
+                return funcao(*args, **kwargs)
+        return st.fragment(rodar)
+    return decorar
+
+def painel_performance(pagina):
+    """
+    Expander da barra lateral (só para gestor) com os tempos da execução atual.
+    Cada execução medida também vira uma linha JSON no log local.
+    """
+    registros = registros_atuais()
+    with st.sidebar.expander("⏱ Performance"):
+        st.toggle("Medir tempos desta sessão", key="perf_ativo")
+        if registros:
+            tabela = pd.DataFrame(registros)
+            resumo = tabela.groupby("etapa", sort=False)["ms"].agg(["count", "sum"]).reset_index()
+            resumo.columns = ["Etapa", "Vezes", "Total (ms)"]
+            st.dataframe(resumo, hide_index=True, use_container_width=True)
+            with st.popover("Ver medições"):
+                st.dataframe(tabela, hide_index=True, use_container_width=True)
+            gravar_log(registros, st.secrets.get("ARQUIVO_LOG_DESEMPENHO", ARQUIVO_LOG_DESEMPENHO), pagina=pagina)
+        elif st.session_state.get("perf_ativo"):
+            st.caption("Nada medido nesta execução ainda.")
+
+        # Chamadas ao Intercom (sempre coletadas, não dependem do botão acima)
+        sessao = telemetria_sessao()
+        if sessao is not None and sessao.resumo():
+            st.write("**Intercom (esta sessão):**")
+            st.dataframe(pd.DataFrame(sessao.resumo()), hide_index=True, use_container_width=True)
+        if TELEMETRIA_PROCESSO.resumo():
+            st.write("**Intercom (servidor):**")
+            st.dataframe(pd.DataFrame(TELEMETRIA_PROCESSO.resumo()), hide_index=True, use_container_width=True)
+
+        vigia = iniciar_vigilancia()
+        if vigia is not None and vigia.ultima_rodada:
+            rodada = vigia.ultima_rodada
+            resumo = vigia.detector.resumo()
+            st.caption(
+                f"🚨 Vigilância: última rodada às {time.strftime('%H:%M', time.localtime(rodada['quando']))}, "
+                f"{rodada['alteradas']} alteradas em {rodada['ms']:.0f} ms | {resumo['conversas']} conversas no mês | "
+                f"em violação: {len(resumo['violacoes'])}"
+            )
+            if resumo['violacoes']:
+                with st.popover("Ver violações"):
+                    st.write("\n".join(f"- {v}" for v in resumo['violacoes']))
@@ -0,0 +1,314 @@
+"""
+Vigilância de violações em segundo plano (sem Streamlit).
+Acompanha, no mês corrente, a taxa de classificação de cada analista (meta de 90%)
+e o tempo médio de resolução por Motivo de Contato.
+
+Só olha as conversas novas ou alteradas desde a última sincronização (filtro por updated_at),
+então o custo acompanha o volume de mudanças e não o tamanho da base.
+E só avisa quando alguma coisa MUDA de estado (entrou ou saiu da violação), nada de repetir o alerta a cada rodada.
+
+Dá pra rodar sozinho (cron ou terminal):
+  python vigilancia.py --uma-vez
+  python vigilancia.py --intervalo 300
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+from nucleo import TIMES_SUPORTE, buscar_admins, buscar_alteradas, buscar_definicoes_atributos, tempo_resolucao
+
+META_CLASSIFICACAO = 90 # Mesma meta do Painel do Analista
+MINIMO_CONVERSAS_ANALISTA = 10 # Com pouca conversa a taxa pula demais, não vale alerta
+MINIMO_CONVERSAS_MOTIVO = 5
+SLA_RESOLUCAO_PADRAO_SEG = 24 * 3600
+INTERVALO_VIGILANCIA_SEG = 300
+LABEL_MOTIVO = "Motivo de Contato"
+
+def inicio_do_mes(ts=None):
+    agora = datetime.fromtimestamp(ts) if ts else datetime.now()
+    return int(datetime(agora.year, agora.month, 1).timestamp())
+
+def _horas(segundos):
+    return f"{segundos / 3600:.1f}h"
+
+class DetectorViolacoes:
+    """
+    Estado corrente (contadores por analista e por Motivo) montado a partir das conversas do mês.
+    Cada conversa guarda a "contribuição" que deu pros contadores: se ela mudar, tira a antiga e soma a nova.
+    """
+
+    def __init__(self, campo_motivo="motivo_contato", meta=META_CLASSIFICACAO, limites_motivo=None,
+                 limite_padrao_seg=SLA_RESOLUCAO_PADRAO_SEG, minimo_analista=MINIMO_CONVERSAS_ANALISTA,
+                 minimo_motivo=MINIMO_CONVERSAS_MOTIVO, times=TIMES_SUPORTE):
+        self.campo_motivo = campo_motivo
+        self.meta = meta
+        self.limites_motivo = dict(limites_motivo or {}) # "Financeiro" vale pra "Financeiro > Boleto > ..." também
+        self.limite_padrao_seg = limite_padrao_seg
+        self.minimo_analista = minimo_analista
+        self.minimo_motivo = minimo_motivo
+        self.times = set(int(t) for t in times) if times else None
+        self.lock = threading.Lock()
+        self.zerar(inicio_do_mes())
+
+    def zerar(self, periodo):
+        """Começa um período novo (virou o mês): a primeira rodada só monta a base, sem alertar."""
+        self.periodo = periodo
+        self.cursor = periodo # updated_at da última sincronização completa
+        self.contribuicoes = {} # id da conversa -> [admin, classificada, motivo, segundos de resolução]
+        self.analistas = {} # admin -> [fechadas, classificadas]
+        self.motivos = {} # motivo -> [conversas, soma dos segundos]
+        self.violacoes = {} # ("analista", id) ou ("motivo", nome) -> True/False
+        self.base_pronta = False
+
+    # --- CONTADORES ---
+
+    def _contribuicao(self, c):
+        """O que essa conversa soma nos contadores (None = não conta: aberta, outro time, back-office, fora do mês)."""
+        if c.get('state') != 'closed' or (c.get('created_at') or 0) < self.periodo:
+            return None
+        if self.times is not None and c.get('team_assignee_id') is not None and int(c['team_assignee_id']) not in self.times:
+            return None
+        attrs = c.get('custom_attributes') or {}
+        if attrs.get('Ticket category') == "Back-office ticket":
+            return None
+        motivo = attrs.get(self.campo_motivo) or None
+        admin = c.get('admin_assignee_id')
+        return [str(admin) if admin else None, bool(motivo), motivo, tempo_resolucao(c)]
+
+    def _somar(self, contrib, sinal, tocados):
+        admin, classificada, motivo, segundos = contrib
+        if admin:
+            conta = self.analistas.setdefault(admin, [0, 0])
+            conta[0] += sinal
+            conta[1] += sinal * classificada
+            tocados.add(("analista", admin))
+        if motivo and segundos:
+            conta = self.motivos.setdefault(motivo, [0, 0])
+            conta[0] += sinal
+            conta[1] += sinal * segundos
+            tocados.add(("motivo", motivo))
+
+    def processar(self, conversas, nomes=None, completo=True):
+        """
+        Aplica as conversas alteradas e devolve os alertas de quem mudou de estado.
+        completo=False (faltou página): aplica o que veio, mas se a base ainda está sendo montada ela continua
+        não pronta, senão a próxima rodada alertaria como novidade o que já era assim antes.
+        """
+        nomes = nomes or {}
+        tocados = set()
+        with self.lock:
+            for c in conversas:
+                cid = str(c['id'])
+                antiga = self.contribuicoes.pop(cid, None)
+                if antiga:
+                    self._somar(antiga, -1, tocados)
+                nova = self._contribuicao(c)
+                if nova:
+                    self.contribuicoes[cid] = nova
+                    self._somar(nova, +1, tocados)
+                self.cursor = max(self.cursor, c.get('updated_at') or 0)
+
+            # Só reavalia quem foi tocado nessa rodada
+            alertas = []
+            for chave in sorted(tocados, key=str):
+                em_violacao, texto = self._avaliar(chave, nomes)
+                if em_violacao != self.violacoes.get(chave, False) and self.base_pronta:
+                    alertas.append(texto)
+                self.violacoes[chave] = em_violacao
+            if completo:
+                self.base_pronta = True
+        return alertas
+
+    def limite_motivo(self, motivo):
+        """Limite do prefixo mais específico que bate com o Motivo (ou o padrão)."""
+        melhor = None
+        for prefixo in self.limites_motivo:
+            if motivo == prefixo or motivo.startswith(prefixo + " >"):
+                if melhor is None or len(prefixo) > len(melhor):
+                    melhor = prefixo
+        return self.limites_motivo[melhor] if melhor else self.limite_padrao_seg
+
+    def _avaliar(self, chave, nomes):
+        """(está em violação?, texto do alerta pra essa transição)."""
+        tipo, valor = chave
+        if tipo == "analista":
+            fechadas, classificadas = self.analistas.get(valor, [0, 0])
+            taxa = classificadas / fechadas * 100 if fechadas else 100
+            nome = nomes.get(valor, f"ID {valor}")
+            if fechadas >= self.minimo_analista and taxa < self.meta:
+                return True, f"⚠️ {nome} está com {taxa:.1f}% de classificação (meta {self.meta}%): {fechadas - classificadas} pendentes de {fechadas}."
+            return False, f"✅ {nome} voltou para {taxa:.1f}% de classificação (meta {self.meta}%)."
+
+        qtd, soma = self.motivos.get(valor, [0, 0])
+        media = soma / qtd if qtd else 0
+        limite = self.limite_motivo(valor)
+        if qtd >= self.minimo_motivo and media > limite:
+            return True, f"🐢 Resolução de *{valor}* acima do limite: média {_horas(media)} (limite {_horas(limite)}) em {qtd} conversas."
+        return False, f"✅ Resolução de *{valor}* voltou pro limite: média {_horas(media)} (limite {_horas(limite)})."
+
+    def resumo(self):
+        """Quem está em violação agora (pra mostrar em tela ou log)."""
+        with self.lock:
+            return {
+                "periodo": self.periodo,
+                "cursor": self.cursor,
+                "conversas": len(self.contribuicoes),
+                "violacoes": sorted(f"{t}:{v}" for (t, v), ruim in self.violacoes.items() if ruim),
+            }
+
+    # --- PERSISTÊNCIA (pra não baixar o mês inteiro de novo a cada reinício) ---
+
+    def salvar(self, caminho):
+        with self.lock:
+            dados = {
+                "periodo": self.periodo,
+                "cursor": self.cursor,
+                "contribuicoes": self.contribuicoes,
+                "base_pronta": self.base_pronta,
+                "violacoes": [[t, v] for (t, v), ruim in self.violacoes.items() if ruim],
+            }
+        temporario = f"{caminho}.tmp"
+        try:
+            with open(temporario, "w", encoding="utf-8") as f:
+                json.dump(dados, f, ensure_ascii=False)
+            os.replace(temporario, caminho)
+        except OSError as e:
+            print(f"Erro ao salvar estado da vigilância: {e}")
+
+    def carregar(self, caminho):
+        """Retoma o estado salvo (se for do mesmo mês). Os contadores são remontados na memória, sem chamar a API."""
+        try:
+            with open(caminho, encoding="utf-8") as f:
+                dados = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if dados.get("periodo") != inicio_do_mes():
+            return False
+        with self.lock:
+            self.zerar(dados["periodo"])
+            self.cursor = dados["cursor"]
+            descartar = set()
+            for cid, contrib in dados["contribuicoes"].items():
+                self.contribuicoes[cid] = contrib
+                self._somar(contrib, +1, descartar)
+            for chave in descartar:
+                self.violacoes[chave] = False
+            for t, v in dados["violacoes"]:
+                self.violacoes[(t, v)] = True
+            self.base_pronta = dados.get("base_pronta", True)
+        return True
+
+class Vigia:
+    """Thread que sincroniza o detector de tempos em tempos e manda os alertas pelo `alertar(texto)`."""
+
+    def __init__(self, detector, cliente, alertar, intervalo_seg=INTERVALO_VIGILANCIA_SEG, arquivo_estado=None):
+        self.detector = detector
+        self.cliente = cliente
+        self.alertar = alertar
+        self.intervalo_seg = intervalo_seg
+        self.arquivo_estado = arquivo_estado
+        self.nomes = None
+        self.parada = threading.Event()
+        self.thread = None
+        self.ultima_rodada = None # {"quando", "alteradas", "alertas", "ms"} pra mostrar em tela
+        if arquivo_estado:
+            detector.carregar(arquivo_estado)
+
+    def rodar_uma_vez(self):
+        """Uma sincronização: baixa só o que mudou, atualiza os contadores e dispara os alertas."""
+        inicio = time.perf_counter()
+        if self.detector.periodo != inicio_do_mes():
+            self.detector.zerar(inicio_do_mes())
+        if self.nomes is None:
+            self.nomes = buscar_admins(self.cliente)
+            mapa = buscar_definicoes_atributos(self.cliente)
+            campo = next((nome for nome, label in mapa.items() if label == LABEL_MOTIVO), None)
+            if campo:
+                self.detector.campo_motivo = campo
+
+        # -1: pega de novo o que mudou no mesmo segundo do cursor (reaplicar a mesma conversa não muda nada)
+        conversas, completo = buscar_alteradas(self.cliente, self.detector.cursor - 1, sorted(self.detector.times or []))
+        cursor_antes = self.detector.cursor
+        alertas = self.detector.processar(conversas, self.nomes, completo)
+        if not completo:
+            self.detector.cursor = cursor_antes # Faltou página: a próxima rodada busca de novo a partir daqui
+        for texto in alertas:
+            self.alertar(texto)
+        if self.arquivo_estado and conversas:
+            self.detector.salvar(self.arquivo_estado)
+        self.ultima_rodada = {
+            "quando": time.time(), "alteradas": len(conversas), "alertas": len(alertas),
+            "ms": (time.perf_counter() - inicio) * 1000, "completo": completo,
+        }
+        return alertas
+
+    def iniciar(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._loop, name="vigilancia", daemon=True)
+            self.thread.start()
+        return self
+
+    def parar(self, timeout=10):
+        self.parada.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def _loop(self):
+        while not self.parada.is_set():
+            try:
+                self.rodar_uma_vez()
+            except Exception as e: # A thread não pode morrer por causa de uma rodada ruim
+                print(f"Erro na vigilância: {e}")
+            self.parada.wait(self.intervalo_seg)
+
+def main(argv=None):
+    from alertas import criar_despachante
+    from nucleo import workspaces_da_config
+    from relatorio_batch import ler_secrets
+
+    parser = argparse.ArgumentParser(description="Vigia a meta de classificação e o SLA de resolução e avisa no Slack")
+    parser.add_argument("--uma-vez", action="store_true", help="Sincroniza uma vez e sai (bom pro cron)")
+    parser.add_argument("--intervalo", type=int, help=f"Segundos entre as sincronizações (padrão {INTERVALO_VIGILANCIA_SEG})")
+    parser.add_argument("--estado", help="Arquivo JSON do estado (padrão: ARQUIVO_VIGILANCIA do secrets ou vigilancia_estado.json)")
+    parser.add_argument("--secrets", default=".streamlit/secrets.toml")
+    args = parser.parse_args(argv)
+
+    secrets = ler_secrets(args.secrets)
+    if os.environ.get("INTERCOM_API_URL"):
+        secrets["INTERCOM_API_URL"] = os.environ["INTERCOM_API_URL"]
+    workspaces = workspaces_da_config(secrets, token=os.environ.get("INTERCOM_TOKEN"))
+    if not workspaces:
+        parser.error("Token do Intercom não configurado (INTERCOM_TOKEN ou secrets.toml).")
+    workspace = next(iter(workspaces.values())) # Vigia o primeiro workspace do secrets
+    webhook = secrets.get("SLACK_WEBHOOK")
+    despachante = criar_despachante(webhook, intervalo_seg=secrets.get("SLACK_INTERVALO_SEG", 10)) if webhook else None
+
+    vigia = Vigia(
+        DetectorViolacoes(limites_motivo=secrets.get("SLA_RESOLUCAO_MOTIVOS_SEG"),
+                          limite_padrao_seg=secrets.get("SLA_RESOLUCAO_PADRAO_SEG", SLA_RESOLUCAO_PADRAO_SEG),
+                          times=workspace.times_suporte),
+        workspace.cliente(),
+        alertar=despachante.enviar if despachante else print,
+        intervalo_seg=args.intervalo or secrets.get("VIGILANCIA_INTERVALO_SEG", INTERVALO_VIGILANCIA_SEG),
+        arquivo_estado=args.estado or secrets.get("ARQUIVO_VIGILANCIA", "vigilancia_estado.json"),
+    )
+    if args.uma_vez:
+        alertas = vigia.rodar_uma_vez()
+        print(f"{vigia.ultima_rodada['alteradas']} conversas alteradas, {len(alertas)} alertas.", file=sys.stderr)
+        if despachante:
+            despachante.flush(30)
+        return 0
+    vigia.iniciar()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        vigia.parar()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
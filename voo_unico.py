@@ -0,0 +1,141 @@
+"""
+Single-flight ("voo único") das consultas: quando várias sessões pedem a MESMA consulta ao mesmo tempo,
+só a primeira (a líder) baixa; as outras esperam e usam o resultado dela, sem chamar a API de novo.
+
+- No mesmo processo: um Event por chave (as seguidoras recebem o mesmo objeto da líder).
+- Entre processos do servidor (opcional, com pasta): trava com flock num arquivo por chave e o resultado
+  num arquivo ao lado (pickle). Quem não conseguiu a trava espera a líder soltar e lê o arquivo.
+  Sem fcntl (Windows), fica só o do processo.
+
+A chave tem que vir normalizada (times em ordem, período em dias inteiros): é a do chave_consulta.
+Não depende do Streamlit.
+"""
+import hashlib
+import os
+import pickle
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+_SEM_RESULTADO = object()
+
+class _Voo:
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.erro = None
+        self.abandonado = False # A líder parou sem resultado nem erro (ex.: rerun/stop do Streamlit)
+
+class VooUnico:
+    """Coordena as consultas iguais em andamento (uma por chave)."""
+
+    def __init__(self, pasta=None, validade_resultado_seg=300):
+        self.pasta = pasta # None = só coordena as sessões deste processo
+        self.validade_resultado_seg = validade_resultado_seg
+        self.voos = {} # chave -> _Voo em andamento
+        self.lock = threading.Lock()
+        self.estatisticas = {"lider": 0, "seguidor": 0, "outro_processo": 0}
+
+    def em_andamento(self, chave):
+        with self.lock:
+            return chave in self.voos
+
+    def executar(self, chave, funcao):
+        """
+        Roda funcao() uma vez só para cada chave em andamento. Devolve (resultado, papel):
+        "lider" (rodou aqui), "seguidor" (esperou outra sessão deste processo) ou "outro_processo".
+        Se a líder falhar (Exception), as seguidoras recebem o mesmo erro. Se ela for interrompida por
+        controle de fluxo (BaseException, como o rerun/stop da sessão dela), nada é repassado:
+        as seguidoras tentam de novo e uma delas vira a líder.
+        """
+        while True:
+            with self.lock:
+                voo = self.voos.get(chave)
+                lider = voo is None
+                if lider:
+                    voo = self.voos[chave] = _Voo()
+
+            if lider:
+                break
+            voo.evento.wait()
+            if voo.abandonado:
+                continue
+            self._contar("seguidor")
+            if voo.erro is not None:
+                raise voo.erro
+            return voo.resultado, "seguidor"
+
+        try:
+            voo.resultado, papel = self._entre_processos(chave, funcao)
+            self._contar(papel)
+            return voo.resultado, papel
+        except Exception as e:
+            voo.erro = e
+            raise
+        except BaseException:
+            voo.abandonado = True
+            raise
+        finally:
+            with self.lock:
+                self.voos.pop(chave, None)
+            voo.evento.set()
+
+    def _contar(self, papel):
+        with self.lock:
+            self.estatisticas[papel] += 1
+
+    # --- ENTRE PROCESSOS ---
+
+    def _entre_processos(self, chave, funcao):
+        if self.pasta is None or fcntl is None:
+            return funcao(), "lider"
+        os.makedirs(self.pasta, exist_ok=True)
+        base = os.path.join(self.pasta, hashlib.sha1(chave.encode("utf-8")).hexdigest())
+        pedido_em = time.time()
+        with open(f"{base}.lock", "a+") as trava:
+            try:
+                fcntl.flock(trava, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                fcntl.flock(trava, fcntl.LOCK_EX) # Outro processo está baixando: espera ele terminar
+                resultado = self._ler_resultado(base, pedido_em)
+                if resultado is not _SEM_RESULTADO:
+                    return resultado, "outro_processo"
+                # A líder de lá falhou ou não deixou resultado: agora é com a gente (a trava já é nossa)
+            resultado = funcao()
+            self._gravar_resultado(base, resultado)
+            return resultado, "lider"
+        # Fechar o arquivo solta a trava
+
+    def _ler_resultado(self, base, pedido_em):
+        """Só vale o resultado gravado depois que a gente começou a esperar (senão é de uma consulta antiga)."""
+        caminho = f"{base}.pkl"
+        try:
+            if os.path.getmtime(caminho) < pedido_em:
+                return _SEM_RESULTADO
+            with open(caminho, "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return _SEM_RESULTADO
+
+    def _gravar_resultado(self, base, resultado):
+        caminho = f"{base}.pkl"
+        with open(f"{caminho}.tmp", "wb") as f:
+            pickle.dump(resultado, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f"{caminho}.tmp", caminho)
+        self._limpar_velhos()
+
+    def _limpar_velhos(self):
+        """Apaga os resultados que ninguém mais vai ler (as travas ficam: são arquivos vazios)."""
+        limite = time.time() - self.validade_resultado_seg
+        for nome in os.listdir(self.pasta):
+            if nome.endswith(".pkl"):
+                caminho = os.path.join(self.pasta, nome)
+                try:
+                    if os.path.getmtime(caminho) < limite:
+                        os.remove(caminho)
+                except OSError:
+                    pass